@@ -0,0 +1,531 @@
+"""
+Executor de benchmarks dos workloads (bucket_sort, mandelbrot, gzip e shell).
+
+Substitui os laços dos execute_*.sh e o grep de logs dos analise*.sh: cada
+workload roda no próprio processo, chamando a sua função main(), e cada
+execução gera um registro JSON Lines (e opcionalmente CSV) com as métricas.
+
+Exemplos:
+    python benchmark.py run --workload bucket_sort \\
+        --param json_filepath=inputs/dataset.json --param num_buckets=50,100 \\
+        --repetitions 5 --output outputs/bucket_sort.jsonl
+
+    python benchmark.py run --config benchmarks.json
+
+    python benchmark.py summarize outputs/bucket_sort.jsonl
+
+    python benchmark.py sort_kernels --sizes 1000,100000,1000000
+"""
+
+import argparse
+import contextlib
+import csv
+import importlib
+import itertools
+import json
+import math
+import os
+import statistics
+import sys
+import time
+import traceback
+import uuid
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+from endpoints import label_endpoint
+
+# Módulo e parâmetros padrão de cada workload. Os nomes dos parâmetros são os
+# mesmos dos argumentos da função main() de cada script.
+WORKLOADS: Dict[str, Dict[str, Any]] = {
+    "bucket_sort": {
+        "module": "bucket_sort",
+        "defaults": {"json_filepath": "inputs/dataset.json", "num_buckets": 100},
+    },
+    "mandelbrot": {
+        "module": "mandelbrot",
+        "defaults": {
+            "image_width": 1200,
+            "image_height": 800,
+            "max_iterations": 255,
+            "lines_per_worker": 10,
+        },
+    },
+    "gzip": {
+        "module": "gzip_google_drive",
+        "defaults": {"one_per_worker": False},
+    },
+    # Lote de programas nativos (commands / commands_file), ver shell_batch.py
+    "shell": {"module": "shell_batch", "defaults": {}},
+}
+
+CSV_COLUMNS = [
+    "run_id",
+    "workload",
+    "repetition",
+    "started_at",
+    "status",
+    "wall_time",
+    "run_time",
+    "num_tasks",
+    "payload_bytes",
+    "task_time_mean",
+    "task_time_max",
+    "task_time_min",
+    "verified",
+]
+
+# Valores críticos da distribuição t de Student (bicaudal, 95%) por grau de liberdade
+T_CRITICAL_95 = {
+    1: 12.706,
+    2: 4.303,
+    3: 3.182,
+    4: 2.776,
+    5: 2.571,
+    6: 2.447,
+    7: 2.365,
+    8: 2.306,
+    9: 2.262,
+    10: 2.228,
+    12: 2.179,
+    15: 2.131,
+    20: 2.086,
+    25: 2.060,
+    30: 2.042,
+}
+
+
+# --- Execução ---
+
+
+def parse_value(raw: str) -> Any:
+    """Converte o texto de um parâmetro em bool, int, float ou str."""
+    lowered = raw.lower()
+    if lowered in ("true", "false"):
+        return lowered == "true"
+    for cast in (int, float):
+        try:
+            return cast(raw)
+        except ValueError:
+            pass
+    return raw
+
+
+def expand_matrix(params: Dict[str, List[Any]]) -> List[Dict[str, Any]]:
+    """Produto cartesiano dos valores de cada parâmetro."""
+    names = list(params)
+    return [
+        dict(zip(names, values))
+        for values in itertools.product(*(params[name] for name in names))
+    ]
+
+
+def count_tasks_per_endpoint(task_statuses: Any) -> Optional[Dict[str, int]]:
+    """
+    Conta as tarefas concluídas por endpoint a partir de master.get_task_statuses().
+
+    Returns:
+        dict: Tarefas por endpoint, ou None quando as entradas não informam o
+              endpoint ('endpoint_id'), como no Master padrão do mwfaas; só o
+              Dispatcher registra o endpoint de cada tarefa.
+    """
+    if isinstance(task_statuses, dict):
+        entries: Iterable[Any] = task_statuses.values()
+    elif isinstance(task_statuses, list):
+        entries = task_statuses
+    else:
+        return None
+
+    entries = [
+        entry for entry in entries if isinstance(entry, dict) and "endpoint_id" in entry
+    ]
+    if not entries:
+        return None
+    counts: Counter = Counter()
+    for entry in entries:
+        if entry.get("status", "completed") == "completed":
+            counts[label_endpoint(str(entry["endpoint_id"]))] += 1
+    return dict(counts)
+
+
+def task_times_per_endpoint(task_statuses: Any) -> Dict[str, List[float]]:
+    """
+    Duração das tarefas concluídas de cada endpoint, quando as entradas de
+    master.get_task_statuses() a informam ('duration', do Dispatcher).
+    """
+    if not isinstance(task_statuses, dict):
+        return {}
+    times: Dict[str, List[float]] = defaultdict(list)
+    for entry in task_statuses.values():
+        if (
+            isinstance(entry, dict)
+            and entry.get("status") == "completed"
+            and entry.get("duration") is not None
+            and "endpoint_id" in entry
+        ):
+            times[label_endpoint(str(entry["endpoint_id"]))].append(entry["duration"])
+    return dict(times)
+
+
+def run_once(
+    workload: str, params: Dict[str, Any], repetition: int, log_dir: Optional[str]
+) -> Dict[str, Any]:
+    """Executa o workload uma vez e devolve o registro da execução."""
+    spec = WORKLOADS[workload]
+    module = importlib.import_module(spec["module"])
+    call_params = {**spec["defaults"], **params}
+
+    run_id = uuid.uuid4().hex[:12]
+    if workload == "mandelbrot" and "output_filename" not in call_params:
+        output_dir = log_dir or "."
+        call_params["output_filename"] = os.path.join(output_dir, f"{run_id}.png")
+
+    record: Dict[str, Any] = {
+        "run_id": run_id,
+        "workload": workload,
+        "params": params,
+        "repetition": repetition,
+        "started_at": datetime.now(timezone.utc).isoformat(),
+    }
+
+    log_file = None
+    if log_dir:
+        os.makedirs(log_dir, exist_ok=True)
+        log_file = open(os.path.join(log_dir, f"{run_id}.txt"), "w")
+
+    start_time = time.perf_counter()
+    result = None
+    try:
+        with contextlib.ExitStack() as stack:
+            if log_file:
+                stack.enter_context(contextlib.redirect_stdout(log_file))
+                stack.enter_context(contextlib.redirect_stderr(log_file))
+            result = module.main(**call_params)
+        record["status"] = "ok" if isinstance(result, dict) else "no_result"
+    except (Exception, SystemExit) as e:
+        record["status"] = "error"
+        record["error"] = f"{type(e).__name__}: {e}"
+        if log_file:
+            traceback.print_exc(file=log_file)
+    finally:
+        record["wall_time"] = time.perf_counter() - start_time
+        if log_file:
+            log_file.close()
+
+    if isinstance(result, dict):
+        task_times = result.get("task_times", [])
+        record.update(
+            {
+                "run_time": result.get("run_time"),
+                "num_tasks": result.get("num_tasks"),
+                "payload_bytes": result.get("payload_bytes"),
+                "result_bytes": result.get("result_bytes"),
+                "ref_payload_bytes_saved": result.get("ref_payload_bytes_saved"),
+                "ref_bytes_served": result.get("ref_bytes_served"),
+                "first_preview_time": result.get("first_preview_time"),
+                "verified": result.get("verified"),
+                "task_times": task_times,
+                "task_time_mean": statistics.fmean(task_times) if task_times else None,
+                "task_time_max": max(task_times) if task_times else None,
+                "task_time_min": min(task_times) if task_times else None,
+                "endpoint_counts": count_tasks_per_endpoint(
+                    result.get("task_statuses")
+                ),
+                "task_statuses": result.get("task_statuses"),
+                "phases": result.get("phases"),
+                "telemetry": result.get("telemetry"),
+            }
+        )
+        if record["endpoint_counts"] is None and record["task_statuses"]:
+            print(
+                "    Aviso: as tarefas não informam o endpoint (Master padrão do mwfaas); "
+                "contagem e tempos por endpoint ficam nulos. Ative um recurso do "
+                "Dispatcher (por exemplo, trace_file) para obtê-los."
+            )
+    return record
+
+
+def run_matrix(
+    experiments: List[Dict[str, Any]],
+    output: str,
+    csv_output: Optional[str],
+    log_dir: Optional[str],
+):
+    """
+    Executa todas as combinações de parâmetros de cada experimento.
+
+    Cada experimento é um dict com 'workload', 'params' (nome -> lista de
+    valores) e 'repetitions'.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    csv_file = None
+    csv_writer = None
+    if csv_output:
+        new_file = not os.path.exists(csv_output)
+        csv_file = open(csv_output, "a", newline="")
+        csv_writer = csv.DictWriter(
+            csv_file, fieldnames=CSV_COLUMNS + ["params"], extrasaction="ignore"
+        )
+        if new_file:
+            csv_writer.writeheader()
+
+    with open(output, "a") as out:
+        for experiment in experiments:
+            workload = experiment["workload"]
+            if workload not in WORKLOADS:
+                raise ValueError(f"Workload desconhecido: {workload}")
+            combinations = expand_matrix(experiment.get("params", {}))
+            repetitions = experiment.get("repetitions", 1)
+            for params in combinations:
+                for repetition in range(1, repetitions + 1):
+                    print(
+                        f"--- {workload} {params} (execução {repetition} de {repetitions}) ---"
+                    )
+                    record = run_once(workload, params, repetition, log_dir)
+                    out.write(json.dumps(record, default=str) + "\n")
+                    out.flush()
+                    if csv_writer:
+                        csv_writer.writerow(
+                            {**record, "params": json.dumps(params, sort_keys=True)}
+                        )
+                        csv_file.flush()
+                    print(
+                        f"    status={record['status']} wall={record['wall_time']:.4f}s "
+                        f"run={record.get('run_time') or 0:.4f}s"
+                    )
+
+    if csv_file:
+        csv_file.close()
+    print(f"\nRegistros salvos em {output}")
+
+
+# --- Resumo ---
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Percentil com interpolação linear (q entre 0 e 100)."""
+    ordered = sorted(values)
+    if len(ordered) == 1:
+        return ordered[0]
+    position = (len(ordered) - 1) * q / 100
+    lower = math.floor(position)
+    upper = math.ceil(position)
+    fraction = position - lower
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * fraction
+
+
+def t_critical(df: int) -> float:
+    for limit in sorted(T_CRITICAL_95):
+        if df <= limit:
+            return T_CRITICAL_95[limit]
+    return 1.96
+
+
+def describe(values: List[float]) -> Dict[str, Any]:
+    """
+    Média, mediana, p95, desvio padrão e intervalo de confiança de 95% da
+    média.
+    """
+    n = len(values)
+    mean = statistics.fmean(values)
+    stdev = statistics.stdev(values) if n > 1 else 0.0
+    half_width = 0.0
+    if n > 1:
+        half_width = t_critical(n - 1) * stdev / math.sqrt(n)
+    return {
+        "n": n,
+        "mean": mean,
+        "median": statistics.median(values),
+        "p95": percentile(values, 95),
+        "stdev": stdev,
+        "ci95_low": mean - half_width,
+        "ci95_high": mean + half_width,
+    }
+
+
+def load_records(paths: List[str]) -> List[Dict[str, Any]]:
+    records = []
+    for path in paths:
+        with open(path, "r") as f:
+            records.extend(json.loads(line) for line in f if line.strip())
+    return records
+
+
+def summarize(paths: List[str]):
+    """Imprime as estatísticas agrupadas por workload e parâmetros."""
+    groups: Dict[Any, List[Dict[str, Any]]] = defaultdict(list)
+    for record in load_records(paths):
+        key = (record["workload"], json.dumps(record["params"], sort_keys=True))
+        groups[key].append(record)
+
+    for (workload, params), records in sorted(groups.items()):
+        ok = [r for r in records if r["status"] == "ok"]
+        print(f"\n=== {workload} {params} ===")
+        print(
+            f"Execuções: {len(records)} ({len(ok)} ok, {len(records) - len(ok)} com falha)"
+        )
+        if not ok:
+            continue
+
+        print(
+            f"{'métrica':<12} {'n':>3} {'média':>10} {'mediana':>10} {'p95':>10} "
+            f"{'desvio':>10} {'IC95%':>23}"
+        )
+        metrics = {
+            "wall_time": [r["wall_time"] for r in ok],
+            "run_time": [r["run_time"] for r in ok if r.get("run_time") is not None],
+            "task_time": [t for r in ok for t in r.get("task_times", [])],
+        }
+        for name, values in metrics.items():
+            if not values:
+                continue
+            d = describe(values)
+            print(
+                f"{name:<12} {d['n']:>3} {d['mean']:>10.4f} {d['median']:>10.4f} {d['p95']:>10.4f} "
+                f"{d['stdev']:>10.4f} [{d['ci95_low']:>9.4f}, {d['ci95_high']:>9.4f}]"
+            )
+
+        payloads = [r["payload_bytes"] for r in ok if r.get("payload_bytes")]
+        if payloads:
+            print(f"Payload médio: {statistics.fmean(payloads) / (1024 * 1024):.2f} MB")
+
+        endpoint_totals: Counter = Counter()
+        for r in ok:
+            endpoint_totals.update(r.get("endpoint_counts") or {})
+        without_endpoints = sum(1 for r in ok if r.get("endpoint_counts") is None)
+        if without_endpoints:
+            print(
+                f"Aviso: {without_endpoints} execuções sem endpoint por tarefa "
+                "(Master padrão do mwfaas); ficam fora das médias por endpoint."
+            )
+        if endpoint_totals:
+            with_endpoints = len(ok) - without_endpoints
+            print("Tarefas concluídas por endpoint (média por execução):")
+            for endpoint, total in sorted(endpoint_totals.items()):
+                print(f"  {endpoint}: {total / with_endpoints:.1f}")
+
+        endpoint_times: Dict[str, List[float]] = defaultdict(list)
+        for r in ok:
+            for endpoint, times in task_times_per_endpoint(
+                r.get("task_statuses")
+            ).items():
+                endpoint_times[endpoint].extend(times)
+        if endpoint_times:
+            print("Tempo das tarefas por endpoint (s):")
+            print(
+                f"  {'endpoint':<12} {'n':>5} {'média':>10} {'mediana':>10} {'p95':>10} {'desvio':>10}"
+            )
+            for endpoint, times in sorted(endpoint_times.items()):
+                d = describe(times)
+                print(
+                    f"  {endpoint:<12} {d['n']:>5} {d['mean']:>10.4f} {d['median']:>10.4f} "
+                    f"{d['p95']:>10.4f} {d['stdev']:>10.4f}"
+                )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Executa e resume benchmarks dos workloads do mwfaas."
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="Executa uma matriz de parâmetros.")
+    run_parser.add_argument(
+        "--config",
+        type=str,
+        default=None,
+        help="Arquivo JSON com uma lista de experimentos {workload, params, repetitions}",
+    )
+    run_parser.add_argument("--workload", choices=sorted(WORKLOADS), default=None)
+    run_parser.add_argument(
+        "--param",
+        action="append",
+        default=[],
+        help="nome=valor1,valor2,... (pode ser repetido; gera o produto cartesiano)",
+    )
+    run_parser.add_argument("--repetitions", type=int, default=1)
+    run_parser.add_argument(
+        "--output",
+        type=str,
+        default="outputs/benchmark.jsonl",
+        help="Arquivo JSON Lines de saída (registros são acrescentados)",
+    )
+    run_parser.add_argument(
+        "--csv", type=str, default=None, help="Arquivo CSV opcional"
+    )
+    run_parser.add_argument(
+        "--log_dir",
+        type=str,
+        default=None,
+        help="Diretório para a saída (stdout) de cada execução",
+    )
+
+    summary_parser = subparsers.add_parser(
+        "summarize", help="Resume um ou mais arquivos JSON Lines."
+    )
+    summary_parser.add_argument("files", nargs="+")
+
+    kernels_parser = subparsers.add_parser(
+        "sort_kernels",
+        help="Compara localmente os algoritmos do worker do bucket_sort com list.sort().",
+    )
+    kernels_parser.add_argument(
+        "--sizes",
+        type=str,
+        default="1000,10000,100000,1000000",
+        help="Tamanhos de balde, separados por vírgula",
+    )
+    kernels_parser.add_argument(
+        "--range_factors",
+        type=str,
+        default="0.015625,0.0625,0.25,1,16",
+        help="Intervalos de valores, em múltiplos do tamanho do balde",
+    )
+    kernels_parser.add_argument("--repetitions", type=int, default=3)
+    kernels_parser.add_argument(
+        "--output",
+        type=str,
+        default=None,
+        help="Arquivo JSON Lines opcional para os resultados",
+    )
+
+    args = parser.parse_args()
+
+    if args.command == "summarize":
+        summarize(args.files)
+        sys.exit(0)
+
+    if args.command == "sort_kernels":
+        from bucket_sort import compare_sort_kernels
+
+        records = compare_sort_kernels(
+            [int(v) for v in args.sizes.split(",")],
+            [float(v) for v in args.range_factors.split(",")],
+            args.repetitions,
+        )
+        if args.output:
+            with open(args.output, "a") as f:
+                for record in records:
+                    f.write(json.dumps(record) + "\n")
+        sys.exit(0)
+
+    if args.config:
+        with open(args.config, "r") as f:
+            experiments = json.load(f)
+    elif args.workload:
+        params = {}
+        for item in args.param:
+            name, _, values = item.partition("=")
+            params[name] = [parse_value(v) for v in values.split(",")]
+        experiments = [
+            {
+                "workload": args.workload,
+                "params": params,
+                "repetitions": args.repetitions,
+            }
+        ]
+    else:
+        parser.error("Informe --config ou --workload.")
+
+    run_matrix(experiments, args.output, args.csv, args.log_dir)
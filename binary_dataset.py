@@ -0,0 +1,356 @@
+"""
+Gerador e leitor de datasets de inteiros em formato binário para o bucket_sort.py.
+
+Formato: cabeçalho de 64 bytes seguido dos valores em little-endian.
+
+    magic        4s   b"MWDS"
+    version      B    1
+    itemsize     B    4 (int32) ou 8 (int64)
+    (padding)    2x
+    count        Q    número de valores
+    min_value    q    menor valor do dataset
+    max_value    q    maior valor do dataset
+    distribution 16s  nome da distribuição usada na geração
+    (padding)    até 64 bytes
+
+A leitura é feita por mmap e os valores são expostos como um memoryview sobre
+o próprio arquivo, sem cópias.
+"""
+
+import argparse
+import math
+import mmap
+import os
+import random
+import struct
+import sys
+import time
+from array import array
+from typing import Any, Dict, Iterable, Tuple
+
+MAGIC = b"MWDS"
+VERSION = 1
+
+HEADER_FORMAT = "<4sBB2xQqq16s"
+HEADER_SIZE = 64
+
+DISTRIBUTIONS = ("uniform", "normal", "zipf", "sorted", "reverse")
+
+# Tipos do módulo array com 4 e 8 bytes (o tamanho de 'l' varia por plataforma)
+TYPECODES = {4: "i", 8: "q"}
+
+BATCH_SIZE = 1_000_000
+
+
+def itemsize_for(min_value: int, max_value: int) -> int:
+    """Bytes por valor: int32 quando o intervalo cabe, senão int64."""
+    if min_value < -(2**31) or max_value >= 2**31:
+        return 8
+    return 4
+
+
+def is_binary_dataset(filepath: str) -> bool:
+    """Indica se o arquivo começa com o magic do formato binário."""
+    with open(filepath, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def read_header(raw: bytes) -> Dict[str, Any]:
+    magic, version, itemsize, count, min_value, max_value, distribution = (
+        struct.unpack_from(HEADER_FORMAT, raw)
+    )
+    if magic != MAGIC:
+        raise ValueError(
+            "Arquivo não está no formato binário de dataset (magic inválido)."
+        )
+    if version != VERSION:
+        raise ValueError(f"Versão de dataset não suportada: {version}")
+    if itemsize not in TYPECODES:
+        raise ValueError(f"Tamanho de item não suportado: {itemsize}")
+    return {
+        "itemsize": itemsize,
+        "count": count,
+        "min": min_value,
+        "max": max_value,
+        "distribution": distribution.rstrip(b"\0").decode("ascii"),
+    }
+
+
+def read_dataset(filepath: str) -> Tuple[memoryview, Dict[str, Any]]:
+    """
+    Abre um dataset binário via mmap.
+
+    Returns:
+        tuple: (valores como memoryview de inteiros, cabeçalho). O memoryview
+               mantém o mapeamento aberto enquanto for referenciado.
+    """
+    with open(filepath, "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    header = read_header(mapped[:HEADER_SIZE])
+    itemsize = header["itemsize"]
+    end = HEADER_SIZE + header["count"] * itemsize
+    if len(mapped) < end:
+        raise ValueError(
+            f"Arquivo truncado: esperados {end} bytes, encontrados {len(mapped)}."
+        )
+
+    typecode = TYPECODES[itemsize]
+    raw = memoryview(mapped)[HEADER_SIZE:end]
+    if sys.byteorder == "little":
+        return raw.cast(typecode), header
+
+    # Em máquinas big-endian não há como evitar a cópia para inverter os bytes
+    values = array(typecode, raw)
+    values.byteswap()
+    return memoryview(values), header
+
+
+def generate_values(
+    distribution: str, count: int, min_value: int, max_value: int, rng, zipf_s: float
+):
+    """Gera os valores em lotes de até BATCH_SIZE itens."""
+    span = max_value - min_value + 1
+
+    if distribution == "zipf":
+        # Valor min_value + k - 1 tem probabilidade proporcional a 1 / k^s
+        cum_weights = []
+        total = 0.0
+        for k in range(1, span + 1):
+            total += 1.0 / (k**zipf_s)
+            cum_weights.append(total)
+        population = range(min_value, max_value + 1)
+        remaining = count
+        while remaining > 0:
+            n = min(BATCH_SIZE, remaining)
+            yield rng.choices(population, cum_weights=cum_weights, k=n)
+            remaining -= n
+        return
+
+    if distribution in ("sorted", "reverse"):
+        values = rng.choices(range(min_value, max_value + 1), k=count)
+        values.sort(reverse=distribution == "reverse")
+        for start in range(0, count, BATCH_SIZE):
+            yield values[start : start + BATCH_SIZE]
+        return
+
+    remaining = count
+    if distribution == "normal":
+        mean = (min_value + max_value) / 2
+        sigma = span / 6
+        while remaining > 0:
+            n = min(BATCH_SIZE, remaining)
+            yield [
+                min(max_value, max(min_value, int(round(rng.gauss(mean, sigma)))))
+                for _ in range(n)
+            ]
+            remaining -= n
+        return
+
+    population = range(min_value, max_value + 1)
+    while remaining > 0:
+        n = min(BATCH_SIZE, remaining)
+        yield rng.choices(population, k=n)
+        remaining -= n
+
+
+def write_dataset(
+    filepath: str,
+    count: int,
+    distribution: str = "uniform",
+    min_value: int = 0,
+    max_value: int = 100000,
+    seed: int = 0,
+    zipf_s: float = 1.1,
+    output_format: str = "binary",
+) -> Dict[str, Any]:
+    """
+    Gera um dataset de `count` inteiros em [min_value, max_value].
+
+    Args:
+        filepath (str): Caminho do arquivo de saída.
+        count (int): Número de valores.
+        distribution (str): uniform, normal, zipf, sorted ou reverse.
+        min_value (int): Menor valor possível.
+        max_value (int): Maior valor possível.
+        seed (int): Semente do gerador.
+        zipf_s (float): Expoente da distribuição zipf.
+        output_format (str): 'binary' ou 'json' (mesmo formato do generate_json.go).
+
+    Returns:
+        dict: O cabeçalho com os valores mínimo e máximo efetivamente gerados.
+    """
+    if distribution not in DISTRIBUTIONS:
+        raise ValueError(f"Distribuição desconhecida: {distribution}")
+    if min_value > max_value:
+        raise ValueError("min_value deve ser menor ou igual a max_value.")
+
+    itemsize = itemsize_for(min_value, max_value)
+    typecode = TYPECODES[itemsize]
+
+    rng = random.Random(seed)
+    actual_min = math.inf
+    actual_max = -math.inf
+
+    with open(filepath, "wb") as f:
+        if output_format == "binary":
+            f.write(b"\0" * HEADER_SIZE)
+        else:
+            f.write(b"[")
+
+        first = True
+        for batch in generate_values(
+            distribution, count, min_value, max_value, rng, zipf_s
+        ):
+            if batch:
+                actual_min = min(actual_min, min(batch))
+                actual_max = max(actual_max, max(batch))
+            if output_format == "binary":
+                values = array(typecode, batch)
+                if sys.byteorder != "little":
+                    values.byteswap()
+                values.tofile(f)
+            else:
+                text = ",".join(map(str, batch))
+                if text and not first:
+                    f.write(b",")
+                f.write(text.encode("ascii"))
+                first = first and not text
+
+        if output_format != "binary":
+            f.write(b"]")
+
+    header = {
+        "itemsize": itemsize,
+        "count": count,
+        "min": int(actual_min) if count else 0,
+        "max": int(actual_max) if count else 0,
+        "distribution": distribution,
+    }
+    if output_format == "binary":
+        with open(filepath, "r+b") as f:
+            f.write(
+                struct.pack(
+                    HEADER_FORMAT,
+                    MAGIC,
+                    VERSION,
+                    itemsize,
+                    count,
+                    header["min"],
+                    header["max"],
+                    distribution.encode("ascii"),
+                )
+            )
+    return header
+
+
+def write_values(
+    filepath: str,
+    batches: Iterable[Iterable[int]],
+    count: int,
+    min_value: int,
+    max_value: int,
+    distribution: str = "sorted",
+) -> int:
+    """
+    Grava lotes de valores já conhecidos (ex.: a saída do bucket_sort.py) no
+    formato binário, sem juntar os lotes em memória.
+
+    Args:
+        batches: Iteráveis de inteiros, gravados na ordem.
+        count (int): Total de valores (vai para o cabeçalho).
+        min_value (int): Menor valor (cabeçalho e tamanho dos itens).
+        max_value (int): Maior valor (cabeçalho e tamanho dos itens).
+
+    Returns:
+        int: Número de valores efetivamente gravados.
+    """
+    itemsize = itemsize_for(min_value, max_value)
+    typecode = TYPECODES[itemsize]
+
+    written = 0
+    with open(filepath, "wb") as f:
+        f.write(
+            struct.pack(
+                HEADER_FORMAT,
+                MAGIC,
+                VERSION,
+                itemsize,
+                count,
+                min_value,
+                max_value,
+                distribution.encode("ascii"),
+            ).ljust(HEADER_SIZE, b"\0")
+        )
+        for batch in batches:
+            values = array(typecode, batch)
+            if sys.byteorder != "little":
+                values.byteswap()
+            values.tofile(f)
+            written += len(values)
+    if written != count:
+        raise ValueError(
+            f"Foram gravados {written} valores, mas o cabeçalho indica {count}."
+        )
+    return written
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Gera um dataset de inteiros para o bucket_sort.py.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument(
+        "output", type=str, help="Arquivo de saída (ex: inputs/dataset.bin)"
+    )
+    parser.add_argument(
+        "-n", "--count", type=int, default=10_000_000, help="Número de valores."
+    )
+    parser.add_argument(
+        "--distribution",
+        choices=DISTRIBUTIONS,
+        default="uniform",
+        help="Distribuição dos valores.",
+    )
+    parser.add_argument("--min", type=int, default=0, help="Menor valor possível.")
+    parser.add_argument(
+        "--max",
+        type=int,
+        default=100000,
+        help="Maior valor possível (o generate_json.go usa 100000).",
+    )
+    parser.add_argument("--zipf_s", type=float, default=1.1, help="Expoente da zipf.")
+    parser.add_argument("--seed", type=int, default=0, help="Semente do gerador.")
+    parser.add_argument(
+        "--format",
+        choices=("binary", "json"),
+        default="binary",
+        help="Formato de saída; 'json' serve para comparar com o leitor antigo.",
+    )
+    args = parser.parse_args()
+
+    if args.count < 0:
+        print("Erro: O número de valores não pode ser negativo.", file=sys.stderr)
+        sys.exit(1)
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    print(
+        f"Gerando {args.count:,} valores ({args.distribution}, [{args.min}, {args.max}]) em '{args.output}'..."
+    )
+    start_time = time.perf_counter()
+    header = write_dataset(
+        args.output,
+        args.count,
+        distribution=args.distribution,
+        min_value=args.min,
+        max_value=args.max,
+        seed=args.seed,
+        zipf_s=args.zipf_s,
+        output_format=args.format,
+    )
+    end_time = time.perf_counter()
+    size_mb = os.path.getsize(args.output) / (1024 * 1024)
+    print(
+        f"Concluído em {end_time - start_time:.2f} segundos: {size_mb:.2f} MB, "
+        f"min={header['min']}, max={header['max']}"
+    )
@@ -1,31 +1,155 @@
 import argparse
+import itertools
 import json
+import math
+import random
+import statistics
 import sys
 import time
-from collections import defaultdict
-from typing import Any, Dict, List, Tuple
+from collections import Counter, defaultdict
+from contextlib import nullcontext
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 
 import cloudpickle
 
+from binary_dataset import is_binary_dataset, read_dataset, write_values
+from chunk_tuner import DEFAULT_TUNING_PATH, tune_chunk_size
+from data_refs import REF_MODES, RefStager, with_data_refs
+from dispatcher import (
+    DEFAULT_MAX_OUTSTANDING,
+    DEFAULT_MAX_RETRIES,
+    DEFAULT_SPECULATION_FACTOR,
+    create_master,
+)
+from endpoint_profile import DEFAULT_PROFILE_PATH, load_weights
+from function_registry import DEFAULT_REGISTRY_PATH, FunctionRegistry
 from mwfaas.globus_compute_manager import GlobusComputeCloudManager
-from mwfaas.list_distribuition_strategy import ListDistributionStrategy
-from mwfaas.master import Master
+from task_tracing import TaskTracer
+from worker_telemetry import TelemetryCollector
+
+# Algoritmos do sort_bucket_worker ("auto" escolhe por balde)
+SORT_KERNELS = ("builtin", "counting", "radix", "auto")
+
+# Formatos do resultado: a lista ordenada ou os pares (valor, contagem)
+RESULT_FORMATS = ("list", "runs")
 
 
 def sort_bucket_worker(
-    chunk: List[Tuple[int, List[int]]], metadata: Dict[str, Any]
+    chunk: List[Tuple[int, List[int]]], metadata: Optional[Dict[str, Any]]
 ) -> Dict[str, Any]:
+    """
+    Ordena um balde. Com metadata["sort_kernel"] igual a "counting" ou
+    "radix", usa uma ordenação linear; com "auto", usa a contagem quando o
+    intervalo de valores do balde (calculado pelos limites em metadata) é
+    pequeno em relação ao número de itens. Sem metadata, usa list.sort().
+    O radix em Python puro raramente supera o list.sort() e só é usado quando
+    pedido.
+
+    Com metadata["result_format"] igual a "runs", devolve em "runs" os pares
+    (valor, contagem) do balde ordenado, como duas listas paralelas, em vez da
+    lista expandida em "data".
+    """
+    import math
     import time
+    from collections import Counter
+    from itertools import chain, repeat
+
+    # "auto" usa a contagem quando o intervalo do balde é no máximo esta
+    # fração do número de itens (muitos valores repetidos); acima dela o
+    # list.sort(), em C, é mais rápido (ver compare_sort_kernels)
+    COUNTING_RANGE_RATIO = 1 / 16
+
+    def bucket_bounds(bucket_index):
+        if not metadata or "bucket_size" not in metadata:
+            return None
+        # Mesma regra de distribute_into_buckets_local; o último balde
+        # recebe também os índices acima de num_buckets - 1
+        min_value = metadata["min_value"]
+        bucket_size = metadata["bucket_size"]
+        low = math.floor(min_value + bucket_index * bucket_size)
+        high = math.floor(min_value + (bucket_index + 1) * bucket_size)
+        if bucket_index == metadata["num_buckets"] - 1:
+            high = max(high, metadata["max_value"])
+        return low, high
+
+    def counting_sort(values, low, high):
+        # Contagem e expansão feitas em C (Counter, map, repeat, chain)
+        counts = Counter(values)
+        domain = range(low, high + 1)
+        frequencies = map(counts.get, domain, repeat(0))
+        result = list(chain.from_iterable(map(repeat, domain, frequencies)))
+        # Valores fora dos limites informados: volta para a ordenação comum
+        if len(result) != len(values):
+            return sorted(values)
+        return result
+
+    def radix_sort(values, low):
+        # LSD em base 256 sobre os valores deslocados para começar em zero
+        shifted = [value - low for value in values]
+        if any(value < 0 for value in shifted):
+            return sorted(values)
+        largest = max(shifted, default=0)
+        shift = 0
+        while largest >> shift:
+            digits = [[] for _ in range(256)]
+            for value in shifted:
+                digits[(value >> shift) & 0xFF].append(value)
+            shifted = [value for digit in digits for value in digit]
+            shift += 8
+        return [value + low for value in shifted]
 
     try:
         start_time = time.perf_counter()
         bucket_index, bucket_to_sort = chunk[0]
-        bucket_to_sort.sort()
+
+        kernel = (metadata or {}).get("sort_kernel", "builtin")
+        result_format = (metadata or {}).get("result_format", "list")
+        bounds = bucket_bounds(bucket_index)
+        if bounds is None:
+            low, high = min(bucket_to_sort, default=0), max(bucket_to_sort, default=0)
+        else:
+            low, high = bounds
+        if kernel == "auto":
+            value_range = high - low + 1
+            kernel = (
+                "counting"
+                if value_range <= COUNTING_RANGE_RATIO * len(bucket_to_sort)
+                else "builtin"
+            )
+
+        if result_format == "runs":
+            # Só os valores distintos precisam ser ordenados
+            counts = Counter(bucket_to_sort)
+            if kernel == "counting":
+                distinct = list(filter(counts.__contains__, range(low, high + 1)))
+                if len(distinct) != len(counts):
+                    distinct = sorted(counts)
+            elif kernel == "radix":
+                distinct = radix_sort(list(counts), low)
+            else:
+                kernel = "builtin"
+                distinct = sorted(counts)
+            end_time = time.perf_counter()
+            return {
+                "time": end_time - start_time,
+                "runs": [distinct, list(map(counts.__getitem__, distinct))],
+                "index": bucket_index,
+                "kernel": kernel,
+            }
+
+        if kernel == "counting":
+            bucket_to_sort = counting_sort(bucket_to_sort, low, high)
+        elif kernel == "radix":
+            bucket_to_sort = radix_sort(bucket_to_sort, low)
+        else:
+            kernel = "builtin"
+            bucket_to_sort.sort()
         end_time = time.perf_counter()
         return {
             "time": end_time - start_time,
             "data": bucket_to_sort,
             "index": bucket_index,
+            "kernel": kernel,
         }
 
     except Exception as e:
@@ -33,16 +157,131 @@ def sort_bucket_worker(
         raise e
 
 
+def bucket_metadata(
+    num_buckets: int,
+    max_value: int,
+    min_value: int,
+    sort_kernel: str,
+    result_format: str = "list",
+) -> Dict[str, Any]:
+    """
+    Metadata do sort_bucket_worker: o algoritmo, o formato do resultado e os
+    limites dos baldes, com a mesma largura usada por
+    distribute_into_buckets_local.
+    """
+    return {
+        "sort_kernel": sort_kernel,
+        "result_format": result_format,
+        "min_value": min_value,
+        "max_value": max_value,
+        "num_buckets": num_buckets,
+        "bucket_size": ((max_value - min_value) / num_buckets) + 1e-9,
+    }
+
+
+def compare_sort_kernels(
+    bucket_sizes: Sequence[int],
+    range_factors: Sequence[float] = (1 / 64, 1 / 16, 1 / 4, 1, 16),
+    repetitions: int = 3,
+    seed: int = 0,
+) -> List[Dict[str, Any]]:
+    """
+    Mede localmente cada algoritmo do sort_bucket_worker em baldes aleatórios
+    de cada tamanho, com intervalos de valores de `range_factors` vezes o
+    tamanho do balde, e imprime a comparação com list.sort() ("builtin").
+
+    Returns:
+        list: Um registro por (tamanho, intervalo) com a mediana de cada
+              algoritmo e a escolha do "auto".
+    """
+    rng = random.Random(seed)
+    records = []
+    print(
+        f"{'itens':>10} {'intervalo':>11} "
+        + " ".join(f"{kernel + '(ms)':>14}" for kernel in SORT_KERNELS)
+        + f" {'auto usou':>10} {'ganho':>7}"
+    )
+    for size, factor in itertools.product(bucket_sizes, range_factors):
+        value_range = max(1, int(size * factor))
+        bucket = [rng.randrange(value_range) for _ in range(size)]
+        expected = sorted(bucket)
+        record = {"items": size, "value_range": value_range, "times": {}}
+        for kernel in SORT_KERNELS:
+            metadata = bucket_metadata(1, value_range - 1, 0, kernel)
+            times = []
+            for _ in range(repetitions):
+                result = sort_bucket_worker([(0, list(bucket))], metadata)
+                if result["data"] != expected:
+                    raise AssertionError(f"Algoritmo {kernel} ordenou errado")
+                times.append(result["time"])
+            record["times"][kernel] = statistics.median(times)
+            if kernel == "auto":
+                record["auto_kernel"] = result["kernel"]
+        record["speedup"] = record["times"]["builtin"] / record["times"]["auto"]
+        records.append(record)
+        print(
+            f"{size:>10,} {value_range:>11,} "
+            + " ".join(
+                f"{record['times'][kernel] * 1000:>14.2f}" for kernel in SORT_KERNELS
+            )
+            + f" {record['auto_kernel']:>10} {record['speedup']:>6.2f}x"
+        )
+    return records
+
+
+def expand_runs(runs: List[List[int]]) -> Iterator[int]:
+    """Expande sob demanda os pares (valor, contagem) de um balde."""
+    values, counts = runs
+    return itertools.chain.from_iterable(map(itertools.repeat, values, counts))
+
+
+def bucket_values(result: Dict[str, Any]) -> Iterable[int]:
+    """Valores ordenados do resultado de um balde, em qualquer formato."""
+    if "runs" in result:
+        return expand_runs(result["runs"])
+    return result.get("data", [])
+
+
+def bucket_length(result: Dict[str, Any]) -> int:
+    if "runs" in result:
+        return sum(result["runs"][1])
+    return len(result.get("data", []))
+
+
+def pickled_int_size(value: int) -> int:
+    """Bytes de um inteiro dentro de uma lista serializada pelo pickle."""
+    if 0 <= value < 2**8:
+        return 2  # BININT1
+    if 0 <= value < 2**16:
+        return 3  # BININT2
+    if -(2**31) <= value < 2**31:
+        return 5  # BININT
+    return 2 + (value.bit_length() + 8) // 8  # LONG1
+
+
+def runs_payload_sizes(runs: List[List[int]]) -> Tuple[int, int]:
+    """
+    Bytes serializados dos pares (valor, contagem) de um balde e estimativa
+    dos bytes da mesma saída no formato de lista, calculada pelas contagens
+    sem expandir a lista.
+    """
+    values, counts = runs
+    as_list = sum(map(lambda v, c: pickled_int_size(v) * c, values, counts))
+    # Cabeçalho da lista e um APPENDS a cada 1000 itens
+    as_list += 16 + 2 * (sum(counts) // 1000 + 1)
+    return len(cloudpickle.dumps(runs)), as_list
+
+
 def distribute_into_buckets_local(
-    data: List[int], num_buckets: int, max_value: int
+    data: Sequence[int], num_buckets: int, max_value: int, min_value: int = 0
 ) -> List[List[int]]:
     print(
         f"[Master] Distribuindo {len(data)} itens em {num_buckets} baldes localmente..."
     )
-    bucket_size = (max_value / num_buckets) + 1e-9
+    bucket_size = ((max_value - min_value) / num_buckets) + 1e-9
     local_buckets = defaultdict(list)
     for number in data:
-        bucket_index = int(number // bucket_size)
+        bucket_index = int((number - min_value) // bucket_size)
         if bucket_index >= num_buckets:
             bucket_index = num_buckets - 1
         local_buckets[bucket_index].append(number)
@@ -51,32 +290,47 @@ def distribute_into_buckets_local(
     return bucket_list
 
 
-def prepare_data(
-    json_filepath: str, num_buckets: int
-) -> Tuple[List[Tuple[int, List[int]]], int]:
+def read_input(json_filepath: str) -> Tuple[Sequence[int], int, int]:
+    """
+    Lê o dataset (JSON ou binário) e encerra o programa com uma mensagem de
+    erro se ele for inválido.
+
+    Returns:
+        tuple: (dados, valor mínimo, valor máximo).
+    """
     print(f"[Master] Lendo dados de entrada do arquivo: {json_filepath}...")
-    print(f"[Master] Usando {num_buckets} baldes para a distribuição.")
 
+    read_start = time.perf_counter()
+    MIN_VALUE = 0
     try:
-        with open(json_filepath, "r") as f:
-            full_data_list = json.load(f)
+        if is_binary_dataset(json_filepath):
+            # Formato binário: mmap sem cópias, min/max vêm do cabeçalho
+            full_data_list, header = read_dataset(json_filepath)
+            MIN_VALUE = min(0, header["min"])
+            MAX_VALUE = header["max"]
+            print(f"[Master] Dataset binário ({header['distribution']}).")
+        else:
+            with open(json_filepath, "r") as f:
+                full_data_list = json.load(f)
+
+            if not isinstance(full_data_list, list):
+                raise TypeError("O arquivo JSON não contém uma lista (array) na raiz.")
 
-        if not isinstance(full_data_list, list):
-            raise TypeError("O arquivo JSON não contém uma lista (array) na raiz.")
+            MAX_VALUE = max(full_data_list) if full_data_list else 0
 
         if not full_data_list:
-            print("Arquivo JSON está vazio. Encerrando.")
+            print("Arquivo de entrada está vazio. Encerrando.")
             sys.exit(0)
 
         NUM_ITENS = len(full_data_list)
-        MAX_VALUE = max(full_data_list)
-        NUM_BUCKETS = num_buckets
 
         print(f"Dados lidos: {NUM_ITENS:,} itens, valor máximo encontrado: {MAX_VALUE}")
-        print(f"Configurando para {NUM_BUCKETS} baldes.")
+        print(
+            f"[Master] Tempo de leitura da entrada: {time.perf_counter() - read_start:.4f} segundos"
+        )
 
     except FileNotFoundError:
-        print(f"ERRO: Arquivo JSON não encontrado em '{json_filepath}'")
+        print(f"ERRO: Arquivo de entrada não encontrado em '{json_filepath}'")
         sys.exit(1)
     except json.JSONDecodeError:
         print(
@@ -84,16 +338,35 @@ def prepare_data(
         )
         sys.exit(1)
     except (TypeError, ValueError) as e:
-        print(f"ERRO: Os dados no JSON não são uma lista de números. Detalhe: {e}")
+        print(f"ERRO: Os dados de entrada não são uma lista de números. Detalhe: {e}")
         sys.exit(1)
 
+    return full_data_list, MIN_VALUE, MAX_VALUE
+
+
+def prepare_data(
+    json_filepath: str,
+    num_buckets: int,
+    input_data: Optional[Tuple[Sequence[int], int, int]] = None,
+    stager: Optional[RefStager] = None,
+) -> Tuple[List[Tuple[int, Any]], int, int]:
+    """
+    Distribui a entrada nos baldes e monta uma tarefa por balde não-vazio.
+    Com `stager`, os baldes são gravados no arquivo de staging e cada tarefa
+    leva só o descritor do seu trecho (data_refs.py).
+    """
+    full_data_list, MIN_VALUE, MAX_VALUE = input_data or read_input(json_filepath)
+    NUM_BUCKETS = num_buckets
+    print(f"[Master] Usando {NUM_BUCKETS} baldes para a distribuição.")
+
     unsorted_buckets = distribute_into_buckets_local(
-        full_data_list, NUM_BUCKETS, MAX_VALUE
+        full_data_list, NUM_BUCKETS, MAX_VALUE, MIN_VALUE
     )
 
     print("\n[Master] Analisando e filtrando baldes para envio...")
     tasks_to_run: List[Tuple[int, List[int]]] = []  # <-- Para isso
     total_payload_mb = 0
+    total_payload_bytes = 0
 
     for i, bucket in enumerate(unsorted_buckets):
         if bucket:
@@ -105,6 +378,7 @@ def prepare_data(
             )
             tasks_to_run.append((i, bucket))
             total_payload_mb += size_in_mb
+            total_payload_bytes += size_in_bytes
 
         else:
             print(f"  - Balde {i}: Vazio (ignorado).")
@@ -113,45 +387,249 @@ def prepare_data(
         f"\n[Master] {len(tasks_to_run)} baldes não-vazios serão enviados para ordenação."
     )
     print(f"[Master] Carga de trabalho total (Payload): {total_payload_mb:.2f} MB")
-    return tasks_to_run, len(full_data_list)
+
+    if stager:
+        refs = stager.stage("buckets", unsorted_buckets, MIN_VALUE, MAX_VALUE)
+        tasks_to_run = [(i, refs[i]) for i, _ in tasks_to_run]
+        total_payload_bytes = stager.stats["ref_bytes"]
+    return tasks_to_run, len(full_data_list), total_payload_bytes
 
 
-def main(json_filepath: str, num_buckets: int):
+def tune_num_buckets(
+    data: Sequence[int], tuning_file: str, retune: bool = False
+) -> int:
     """
-    Função principal que agora recebe os argumentos validados.
+    Escolhe o número de baldes com ensaios curtos nos endpoints. O tamanho do
+    chunk ajustado é o número de itens por balde.
     """
 
-    tasks_to_run, num_items = prepare_data(json_filepath, num_buckets)
+    def make_chunk(size: int) -> List[Tuple[int, List[int]]]:
+        # Amostra espalhada pela entrada, como o conteúdo de um balde
+        step = max(1, len(data) // size)
+        return [(0, list(data[::step][:size]))]
 
     with GlobusComputeCloudManager() as cloud_manager:
-        strategy = ListDistributionStrategy(items_per_chunk=1)
-        master = Master(cloud_manager, distribution_strategy=strategy)
+        endpoint_ids = list(cloud_manager.available_endpoint_ids)
+    items_per_bucket = tune_chunk_size(
+        "bucket_sort",
+        len(data),
+        len(data),
+        endpoint_ids,
+        sort_bucket_worker,
+        make_chunk,
+        path=tuning_file,
+        retune=retune,
+    )
+    return math.ceil(len(data) / items_per_bucket)
+
+
+def build_job(
+    json_filepath: str,
+    num_buckets: int,
+    sort_kernel: str = "builtin",
+    result_format: str = "list",
+    output_file: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Job para o job_scheduler.py: os baldes, a função e o metadata, e
+    `finish`, que confere (e opcionalmente grava) a saída ordenada.
+    """
+    input_data = read_input(json_filepath)
+    tasks_to_run, num_items, _ = prepare_data(json_filepath, num_buckets, input_data)
+    _, min_value, max_value = input_data
+    metadata = bucket_metadata(
+        num_buckets, max_value, min_value, sort_kernel, result_format
+    )
+
+    def finish(results: List[Any]):
+        results_in_order = sorted(
+            (r for r in results if isinstance(r, dict) and "index" in r),
+            key=lambda r: r["index"],
+        )
+        sorted_count = sum(bucket_length(r) for r in results_in_order)
+        if output_file:
+            write_values(
+                output_file,
+                (bucket_values(r) for r in results_in_order),
+                sorted_count,
+                min_value,
+                max_value,
+            )
+        status = "Sucesso" if sorted_count == num_items else "FALHA"
+        print(
+            f"[Bucket Sort] VERIFICAÇÃO: {status}! {sorted_count:,} de {num_items:,} itens ordenados."
+        )
+
+    return {
+        "data_input": tasks_to_run,
+        "user_function": sort_bucket_worker,
+        "metadata": metadata,
+        "items_per_chunk": 1,
+        "finish": finish,
+    }
+
+
+def main(
+    json_filepath: str,
+    num_buckets: int,
+    trace_file: Optional[str] = None,
+    profile_file: Optional[str] = None,
+    speculation_factor: Optional[float] = None,
+    max_outstanding: Optional[int] = None,
+    registry_file: Optional[str] = None,
+    tuning_file: Optional[str] = None,
+    retune: bool = False,
+    max_retries: int = 0,
+    collect_telemetry: bool = False,
+    sort_kernel: str = "builtin",
+    result_format: str = "list",
+    output_file: Optional[str] = None,
+    input_refs: Optional[str] = None,
+    ref_dir: Optional[str] = None,
+    data_host: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Função principal que agora recebe os argumentos validados.
+
+    Args:
+        trace_file (str): Se informado, rastreia cada tarefa e salva a linha do
+                          tempo (Chrome Trace) neste arquivo.
+        profile_file (str): Perfil de endpoint_profile.py; se informado, distribui
+                            a carga proporcionalmente à vazão de cada endpoint.
+        speculation_factor (float): Se informado, duplica em endpoints ociosos
+                                    as tarefas mais lentas que este múltiplo da
+                                    mediana; vale o primeiro resultado.
+        max_outstanding (int): Se informado, os chunks são entregues sob
+                               demanda, com no máximo este número de tarefas
+                               em andamento por endpoint.
+        registry_file (str): Se informado, reaproveita o ID da função
+                             registrado em execuções anteriores (cache em
+                             function_registry.py).
+        tuning_file (str): Se informado, ignora `num_buckets` e usa o número
+                           de baldes ajustado por chunk_tuner.py (salvo neste
+                           arquivo).
+        retune (bool): Refaz os ensaios mesmo que haja um ajuste salvo.
+        max_retries (int): Resubmissões permitidas para cada balde que falhar.
+        collect_telemetry (bool): Se True, cada worker devolve a telemetria de
+                                  recursos (CPU, memória, E/S), resumida por
+                                  endpoint no fim da execução.
+        sort_kernel (str): Algoritmo dos workers (SORT_KERNELS): "builtin"
+                           (list.sort), "counting", "radix" ou "auto".
+        result_format (str): "list" (cada balde volta como a lista ordenada)
+                             ou "runs" (pares (valor, contagem), expandidos
+                             sob demanda no Master).
+        output_file (str): Se informado, grava a saída ordenada neste arquivo
+                           no formato binário (binary_dataset.py), balde a
+                           balde, sem montar a lista completa.
+        input_refs (str): Se informado ("shared" ou "http"), os baldes não vão
+                          no payload: são gravados em um arquivo de staging e
+                          cada worker lê o seu trecho direto do diretório
+                          compartilhado ou do servidor HTTP do Master.
+        ref_dir (str): Diretório do arquivo de staging (no modo "shared", deve
+                       ser visível pelos workers no mesmo caminho).
+        data_host (str): No modo "http", nome ou IP do Master anunciado aos
+                         workers.
+
+    Returns:
+        dict: Métricas da execução (usadas pelo benchmark.py).
+    """
+
+    input_data = read_input(json_filepath)
+    if tuning_file:
+        num_buckets = tune_num_buckets(input_data[0], tuning_file, retune)
+    stager = RefStager(input_refs, ref_dir, data_host) if input_refs else None
+    tasks_to_run, num_items, payload_bytes = prepare_data(
+        json_filepath, num_buckets, input_data, stager
+    )
+    _, min_value, max_value = input_data
+    metadata = bucket_metadata(
+        num_buckets, max_value, min_value, sort_kernel, result_format
+    )
+
+    tracer = TaskTracer() if trace_file else None
+    telemetry = TelemetryCollector() if collect_telemetry else None
+    weights = load_weights(profile_file) if profile_file else None
+    function_registry = FunctionRegistry(registry_file) if registry_file else None
+
+    with GlobusComputeCloudManager() as cloud_manager, stager or nullcontext():
+        # O worker ordena um balde por tarefa: os endpoints mais rápidos
+        # recebem mais baldes em vez de chunks maiores
+        master = create_master(
+            cloud_manager,
+            items_per_chunk=1,
+            tracer=tracer,
+            weights=weights,
+            scale_chunks=False,
+            speculation_factor=speculation_factor,
+            max_outstanding=max_outstanding,
+            function_registry=function_registry,
+            max_retries=max_retries,
+            telemetry=telemetry,
+        )
 
         start_time = time.perf_counter()
         sorted_buckets_results = master.run(
             data_input=tasks_to_run,
-            user_function=sort_bucket_worker,
-            metadata=None,
+            user_function=(
+                with_data_refs(sort_bucket_worker) if stager else sort_bucket_worker
+            ),
+            metadata=metadata,
         )
         end_time = time.perf_counter()
 
         print("\n--- FASE DE AGREGAÇÃO (Concatenando resultados no Master) ---")
         execution_times = []
+        kernels_used = Counter()
         num_tasks = len(tasks_to_run)
-        sorted_buckets_in_order = [None] * num_tasks
+        # Indexado pelo número do balde: os baldes vazios não viram tarefas
+        results_by_bucket: Dict[int, Dict[str, Any]] = {}
+        # Só no formato "runs": o ganho em relação ao formato de lista
+        result_bytes = 0 if result_format == "runs" else None
+        result_list_bytes = 0
         for result in sorted_buckets_results:
             if isinstance(result, dict):
                 idx = result.get("index")
-                data = result.get("data", [])
                 exec_time = result.get("time", 0)
                 if idx is not None:
-                    sorted_buckets_in_order[idx] = data
+                    results_by_bucket[idx] = result
                     execution_times.append(exec_time)
+                    kernels_used[result.get("kernel", "builtin")] += 1
+                    if "runs" in result:
+                        returned, as_list = runs_payload_sizes(result["runs"])
+                        result_bytes += returned
+                        result_list_bytes += as_list
+        results_in_order = [results_by_bucket[i] for i in sorted(results_by_bucket)]
+
+        if result_format == "runs":
+            # A lista final não é montada: os valores são expandidos só na
+            # gravação da saída
+            sorted_count = sum(bucket_length(r) for r in results_in_order)
+        else:
+            final_sorted_list = []
+            for result in results_in_order:
+                final_sorted_list.extend(result.get("data", []))
+            sorted_count = len(final_sorted_list)
 
-        final_sorted_list = []
-        for bucket in sorted_buckets_in_order:
-            if bucket:
-                final_sorted_list.extend(bucket)
+        if result_bytes is not None:
+            print(
+                f"[Master] Resultados devolvidos ({result_format}): "
+                f"{result_bytes / (1024 * 1024):.2f} MB; no formato de lista seriam "
+                f"cerca de {result_list_bytes / (1024 * 1024):.2f} MB "
+                f"({result_list_bytes / max(1, result_bytes):.1f}x)"
+            )
+        if output_file:
+            write_start = time.perf_counter()
+            write_values(
+                output_file,
+                (bucket_values(r) for r in results_in_order),
+                sorted_count,
+                min_value,
+                max_value,
+            )
+            print(
+                f"[Master] Saída ordenada gravada em '{output_file}' em "
+                f"{time.perf_counter() - write_start:.4f} segundos"
+            )
 
         print(f"Tempo de execução master.run(): {end_time - start_time:.4f} segundos")
         if execution_times:
@@ -165,11 +643,22 @@ def main(json_filepath: str, num_buckets: int):
                 f"[Master] Tempo mínimo de execução de um worker: {min(execution_times):.4f}s"
             )
             print("[Master] Execution times:", execution_times)
+        print(f"[Master] Algoritmos usados nos baldes: {dict(kernels_used)}")
 
         print("\n" + "-" * 15 + " Status das Tarefas " + "-" * 15)
-        print(master.get_task_statuses())
-
-        if len(final_sorted_list) == num_items:
+        task_statuses = master.get_task_statuses()
+        print(task_statuses)
+
+        if tracer:
+            tracer.print_phase_table()
+            tracer.export_chrome_trace(trace_file)
+        if telemetry:
+            telemetry.print_summary()
+        if stager:
+            stager.print_summary()
+
+        verified = sorted_count == num_items
+        if verified:
             print("VERIFICAÇÃO: Sucesso! O tamanho da lista final bate com a original.")
         else:
             print(
@@ -177,14 +666,33 @@ def main(json_filepath: str, num_buckets: int):
             )
         # print(f"final_sorted_list: {final_sorted_list}")
 
+        return {
+            "run_time": end_time - start_time,
+            "task_times": execution_times,
+            "num_tasks": num_tasks,
+            "payload_bytes": payload_bytes,
+            "ref_payload_bytes_saved": (
+                stager.payload_bytes_saved() if stager else None
+            ),
+            "ref_bytes_served": stager.bytes_served() if stager else None,
+            "result_bytes": result_bytes,
+            "task_statuses": task_statuses,
+            "verified": verified,
+            "phases": tracer.summary() if tracer else None,
+            "telemetry": telemetry.summary() if telemetry else None,
+        }
+
 
-def main_local(json_filepath: str, num_buckets: int):
-    tasks_to_run, num_items = prepare_data(json_filepath, num_buckets)
+def main_local(json_filepath: str, num_buckets: int, sort_kernel: str = "builtin"):
+    input_data = read_input(json_filepath)
+    tasks_to_run, num_items, _ = prepare_data(json_filepath, num_buckets, input_data)
+    _, min_value, max_value = input_data
+    metadata = bucket_metadata(num_buckets, max_value, min_value, sort_kernel)
     results = []
 
     start_time = time.perf_counter()
     for bucket in tasks_to_run:
-        results.append(sort_bucket_worker([bucket], {}))
+        results.append(sort_bucket_worker([bucket], metadata))
     end_time = time.perf_counter()
 
     sorted_buckets = []
@@ -221,13 +729,13 @@ def main_local(json_filepath: str, num_buckets: int):
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(
-        description="Processa um arquivo JSON e o divide em buckets."
+        description="Processa um arquivo JSON ou binário (binary_dataset.py) e o divide em buckets."
     )
 
     parser.add_argument(
         "json_filepath",
         type=str,
-        help="Caminho para o arquivo .json de entrada (obrigatório)",
+        help="Caminho para o arquivo .json ou .bin de entrada (obrigatório)",
     )
 
     parser.add_argument(
@@ -238,12 +746,131 @@ if __name__ == "__main__":
         help="Número de buckets para dividir (opcional, padrão: 100)",
     )
 
+    parser.add_argument(
+        "--tune",
+        type=str,
+        nargs="?",
+        const=DEFAULT_TUNING_PATH,
+        default=None,
+        metavar="TUNING",
+        help=f"Ignora num_buckets e usa o valor ajustado por ensaios nos endpoints (salvo em {DEFAULT_TUNING_PATH})",
+    )
+    parser.add_argument(
+        "--retune",
+        action="store_true",
+        help="Com --tune, refaz os ensaios mesmo que haja um ajuste salvo",
+    )
+
     parser.add_argument(
         "--run_local",
         action="store_true",
         help="Se presente, executa o script localmente",
     )
 
+    parser.add_argument(
+        "--trace",
+        type=str,
+        default=None,
+        help="Arquivo JSON (Chrome Trace) para a linha do tempo de cada tarefa",
+    )
+
+    parser.add_argument(
+        "--weighted",
+        type=str,
+        nargs="?",
+        const=DEFAULT_PROFILE_PATH,
+        default=None,
+        help=f"Dimensiona os chunks pela vazão de cada endpoint (perfil padrão: {DEFAULT_PROFILE_PATH})",
+    )
+
+    parser.add_argument(
+        "--speculative",
+        type=float,
+        nargs="?",
+        const=DEFAULT_SPECULATION_FACTOR,
+        default=None,
+        metavar="FACTOR",
+        help=f"Duplica em endpoints ociosos as tarefas mais lentas que FACTOR vezes a mediana (padrão: {DEFAULT_SPECULATION_FACTOR})",
+    )
+
+    parser.add_argument(
+        "--register_functions",
+        type=str,
+        nargs="?",
+        const=DEFAULT_REGISTRY_PATH,
+        default=None,
+        metavar="REGISTRY",
+        help=f"Reaproveita o ID da função registrado em execuções anteriores (cache padrão: {DEFAULT_REGISTRY_PATH})",
+    )
+
+    parser.add_argument(
+        "--retries",
+        type=int,
+        nargs="?",
+        const=DEFAULT_MAX_RETRIES,
+        default=0,
+        metavar="N",
+        help=f"Resubmete até N vezes, com backoff e em outro endpoint, os chunks que falharem (padrão: {DEFAULT_MAX_RETRIES})",
+    )
+
+    parser.add_argument(
+        "--telemetry",
+        action="store_true",
+        help="Coleta CPU, memória e E/S de cada tarefa e resume por endpoint",
+    )
+
+    parser.add_argument(
+        "--dynamic",
+        type=int,
+        nargs="?",
+        const=DEFAULT_MAX_OUTSTANDING,
+        default=None,
+        metavar="MAX_OUTSTANDING",
+        help=f"Entrega os chunks sob demanda, com até MAX_OUTSTANDING tarefas por endpoint (padrão: {DEFAULT_MAX_OUTSTANDING})",
+    )
+
+    parser.add_argument(
+        "--result_format",
+        choices=RESULT_FORMATS,
+        default="list",
+        help="Formato devolvido pelos workers: a lista ordenada ou pares (valor, contagem)",
+    )
+
+    parser.add_argument(
+        "--output",
+        type=str,
+        default=None,
+        help="Grava a saída ordenada neste arquivo (formato binário do binary_dataset.py)",
+    )
+
+    parser.add_argument(
+        "--sort_kernel",
+        choices=SORT_KERNELS,
+        default="builtin",
+        help="Algoritmo dos workers: list.sort, contagem, radix LSD ou auto (contagem quando o intervalo do balde é pequeno)",
+    )
+
+    parser.add_argument(
+        "--input_refs",
+        choices=REF_MODES,
+        default=None,
+        help="Os workers leem os baldes de um diretório compartilhado ou do servidor HTTP do Master, em vez de recebê-los no payload",
+    )
+
+    parser.add_argument(
+        "--ref_dir",
+        type=str,
+        default=None,
+        help="Diretório do arquivo de staging dos baldes (em --input_refs shared, visível pelos workers no mesmo caminho)",
+    )
+
+    parser.add_argument(
+        "--data_host",
+        type=str,
+        default=None,
+        help="Com --input_refs http, nome ou IP do Master anunciado aos workers (padrão: nome da máquina)",
+    )
+
     args = parser.parse_args()
     if args.num_buckets <= 0:
         print(
@@ -253,6 +880,24 @@ if __name__ == "__main__":
         sys.exit(1)
 
     if args.run_local:
-        main_local(args.json_filepath, args.num_buckets)
+        main_local(args.json_filepath, args.num_buckets, args.sort_kernel)
     else:
-        main(args.json_filepath, args.num_buckets)
+        main(
+            args.json_filepath,
+            args.num_buckets,
+            args.trace,
+            args.weighted,
+            args.speculative,
+            args.dynamic,
+            args.register_functions,
+            args.tune,
+            args.retune,
+            args.retries,
+            args.telemetry,
+            args.sort_kernel,
+            args.result_format,
+            args.output,
+            args.input_refs,
+            args.ref_dir,
+            args.data_host,
+        )
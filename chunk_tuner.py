@@ -0,0 +1,242 @@
+"""
+Ajuste automático do tamanho dos chunks.
+
+Roda tarefas curtas com alguns tamanhos de chunk em todos os endpoints, ajusta
+o modelo
+
+    duração da tarefa = overhead fixo + custo por item * tamanho do chunk
+
+e escolhe, entre os tamanhos candidatos, o que minimiza o makespan previsto
+para a entrada completa:
+
+    makespan = tarefas * custo de submissão
+               + ceil(tarefas / slots) * duração da tarefa
+
+onde `slots` é o paralelismo observado nos ensaios. A escolha é salva por
+(workload, tamanho da entrada, conjunto de endpoints) e reaproveitada nas
+execuções seguintes.
+"""
+
+import hashlib
+import json
+import math
+import os
+import statistics
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from globus_compute_sdk import Executor
+
+DEFAULT_TUNING_PATH = ".chunk_tuning.json"
+
+DEFAULT_TRIAL_SIZES = 4
+
+DEFAULT_TRIAL_REPETITIONS = 4
+
+# Os ensaios usam no máximo esta fração da parte de cada endpoint na entrada
+TRIAL_FRACTION = 1 / 8
+
+
+def tuning_key(workload: str, input_key: Any, endpoint_ids: Sequence[str]) -> str:
+    endpoints = hashlib.sha256(",".join(sorted(endpoint_ids)).encode()).hexdigest()
+    return f"{workload}:{input_key}:{endpoints[:12]}"
+
+
+def candidate_sizes(num_items: int, endpoint_count: int) -> List[int]:
+    """Potências de 2 até a parte de cada endpoint (um chunk por endpoint)."""
+    largest = max(1, math.ceil(num_items / max(1, endpoint_count)))
+    sizes = []
+    size = 1
+    while size < largest:
+        sizes.append(size)
+        size *= 2
+    sizes.append(largest)
+    return sizes
+
+
+def trial_sizes(
+    num_items: int, endpoint_count: int, count: int = DEFAULT_TRIAL_SIZES
+) -> List[int]:
+    """Tamanhos em progressão geométrica entre 1 e o limite dos ensaios."""
+    largest = max(1, int(num_items / max(1, endpoint_count) * TRIAL_FRACTION))
+    if count <= 1 or largest == 1:
+        return [largest]
+    ratio = largest ** (1 / (count - 1))
+    return sorted({max(1, round(ratio**i)) for i in range(count)})
+
+
+def run_trials(
+    endpoint_ids: Sequence[str],
+    user_function: Callable,
+    make_chunk: Callable[[int], list],
+    metadata: Any,
+    sizes: Sequence[int],
+    repetitions: int = DEFAULT_TRIAL_REPETITIONS,
+) -> Tuple[List[Dict[str, float]], float]:
+    """
+    Para cada tamanho, submete `repetitions` tarefas a cada endpoint ao mesmo
+    tempo e mede a duração de ida e volta de cada uma.
+
+    Returns:
+        tuple: (amostras {size, submit, duration}, paralelismo observado).
+    """
+    executors = {e: Executor(endpoint_id=e) for e in endpoint_ids}
+    samples: List[Dict[str, float]] = []
+    parallelism = 1.0
+    try:
+        # Aquecimento descartado: a primeira tarefa paga o cold start do worker
+        warmup = [
+            executor.submit(user_function, make_chunk(1), metadata)
+            for executor in executors.values()
+        ]
+        for future in warmup:
+            future.result()
+
+        for size in sizes:
+            chunk = make_chunk(size)
+            pending = []
+            batch_start = time.perf_counter()
+            for executor in executors.values():
+                for _ in range(repetitions):
+                    submit_start = time.perf_counter()
+                    future = executor.submit(user_function, chunk, metadata)
+                    submit_time = time.perf_counter() - submit_start
+                    done_at: Dict[str, float] = {}
+                    future.add_done_callback(
+                        lambda _, done_at=done_at: done_at.setdefault(
+                            "time", time.perf_counter()
+                        )
+                    )
+                    pending.append((future, submit_start, submit_time, done_at))
+
+            batch_busy = 0.0
+            for future, submit_start, submit_time, done_at in pending:
+                future.result()
+                duration = done_at.get("time", time.perf_counter()) - submit_start
+                batch_busy += duration
+                samples.append(
+                    {"size": size, "submit": submit_time, "duration": duration}
+                )
+            batch_wall = time.perf_counter() - batch_start
+            parallelism = max(parallelism, batch_busy / batch_wall)
+    finally:
+        for executor in executors.values():
+            executor.shutdown(wait=False, cancel_futures=True)
+    return samples, parallelism
+
+
+def fit_overhead_model(samples: List[Dict[str, float]]) -> Dict[str, float]:
+    """
+    Mínimos quadrados de duração = overhead + per_item * size.
+
+    Returns:
+        dict: overhead (s por tarefa), per_item (s por item) e submit (custo
+              serial de submissão por tarefa, no Master).
+    """
+    sizes = [s["size"] for s in samples]
+    durations = [s["duration"] for s in samples]
+    mean_size = statistics.mean(sizes)
+    mean_duration = statistics.mean(durations)
+    variance = sum((x - mean_size) ** 2 for x in sizes)
+    if variance == 0:
+        per_item = mean_duration / mean_size
+    else:
+        covariance = sum(
+            (x - mean_size) * (y - mean_duration) for x, y in zip(sizes, durations)
+        )
+        per_item = max(0.0, covariance / variance)
+    overhead = max(0.0, mean_duration - per_item * mean_size)
+    return {
+        "overhead": overhead,
+        "per_item": per_item,
+        "submit": statistics.median(s["submit"] for s in samples),
+    }
+
+
+def predict_makespan(
+    num_items: int, chunk_size: int, model: Dict[str, float], slots: float
+) -> float:
+    tasks = math.ceil(num_items / chunk_size)
+    waves = math.ceil(tasks / max(1.0, slots))
+    task_time = model["overhead"] + model["per_item"] * chunk_size
+    return tasks * model["submit"] + waves * task_time
+
+
+def load_tuning(path: str = DEFAULT_TUNING_PATH) -> Dict[str, Any]:
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def tune_chunk_size(
+    workload: str,
+    input_key: Any,
+    num_items: int,
+    endpoint_ids: Sequence[str],
+    user_function: Callable,
+    make_chunk: Callable[[int], list],
+    metadata: Any = None,
+    path: str = DEFAULT_TUNING_PATH,
+    retune: bool = False,
+    candidates: Optional[List[int]] = None,
+) -> int:
+    """
+    Retorna o tamanho de chunk salvo para esta combinação ou, se não houver
+    (ou com `retune`), roda os ensaios, escolhe e salva um novo.
+
+    Args:
+        workload (str): Nome do workload.
+        input_key: Identifica a entrada (ex.: dimensões da imagem).
+        num_items (int): Itens da entrada completa.
+        make_chunk: Monta um chunk de ensaio com o número de itens pedido.
+        candidates (list): Tamanhos avaliados (padrão: candidate_sizes).
+
+    Returns:
+        int: Tamanho de chunk escolhido.
+    """
+    key = tuning_key(workload, input_key, endpoint_ids)
+    tuning = load_tuning(path)
+    if key in tuning and not retune:
+        entry = tuning[key]
+        print(
+            f"[Tuner] Usando chunk de {entry['chunk_size']} itens ajustado em {entry['measured_at']}"
+        )
+        return entry["chunk_size"]
+
+    sizes = trial_sizes(num_items, len(endpoint_ids))
+    print(
+        f"[Tuner] Ensaios com chunks de {sizes} itens em {len(endpoint_ids)} endpoints..."
+    )
+    start_time = time.perf_counter()
+    samples, slots = run_trials(
+        endpoint_ids, user_function, make_chunk, metadata, sizes
+    )
+    model = fit_overhead_model(samples)
+    print(
+        f"[Tuner] Ensaios concluídos em {time.perf_counter() - start_time:.2f}s: "
+        f"overhead {model['overhead']:.4f}s/tarefa, {model['per_item'] * 1000:.4f}ms/item, "
+        f"submissão {model['submit'] * 1000:.2f}ms, paralelismo {slots:.1f}"
+    )
+
+    candidates = candidates or candidate_sizes(num_items, len(endpoint_ids))
+    predictions = {c: predict_makespan(num_items, c, model, slots) for c in candidates}
+    best = min(predictions, key=predictions.get)
+
+    print(f"{'chunk':>8} {'tarefas':>8} {'makespan previsto':>18}")
+    for size, makespan in predictions.items():
+        marker = " <" if size == best else ""
+        print(f"{size:>8} {math.ceil(num_items / size):>8} {makespan:>17.2f}s{marker}")
+
+    tuning[key] = {
+        "chunk_size": best,
+        "predicted_makespan": predictions[best],
+        "model": model,
+        "slots": slots,
+        "measured_at": datetime.now(timezone.utc).isoformat(),
+    }
+    with open(path, "w") as f:
+        json.dump(tuning, f, indent=2)
+    print(f"[Tuner] Chunk de {best} itens salvo em '{path}'")
+    return best
@@ -1,42 +1,110 @@
 import argparse
+import math
 import os
+import random
+import string
 import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
 ONE_MEGABYTE = 1024 * 1024
 
 CHUNK_SIZE = ONE_MEGABYTE
 
+PROFILES = ("zeros", "random", "text", "mixed")
 
-def create_dummy_file(full_filepath, size_mb):
+SIZE_DISTRIBUTIONS = ("fixed", "lognormal", "exponential")
+
+# Bloco de texto reaproveitado por processo. É bem maior que a janela de 32 KB
+# do gzip, então as repetições entre blocos não alteram a taxa de compressão.
+TEXT_POOL_SIZE = 8 * ONE_MEGABYTE
+
+TEXT_ALPHABET = string.ascii_letters + string.digits + string.punctuation
+
+_text_pools = {}
+
+
+def get_text_pool(entropy):
+    """
+    Gera (uma vez por processo) um bloco de texto com entropia de ordem zero
+    aproximada de `entropy` bits por caractere, separado em palavras e linhas.
+    """
+    if entropy in _text_pools:
+        return _text_pools[entropy]
+
+    alphabet_size = int(round(2**entropy))
+    alphabet_size = max(2, min(alphabet_size, len(TEXT_ALPHABET)))
+    alphabet = TEXT_ALPHABET[:alphabet_size]
+
+    rng = random.Random(alphabet_size)
+    words = []
+    total = 0
+    while total < TEXT_POOL_SIZE:
+        word = "".join(rng.choices(alphabet, k=rng.randint(2, 10)))
+        separator = "\n" if rng.random() < 0.1 else " "
+        words.append(word + separator)
+        total += len(word) + 1
+    pool = "".join(words).encode("ascii")[:TEXT_POOL_SIZE]
+    _text_pools[entropy] = pool
+    return pool
+
+
+def write_content(f, total_size_bytes, profile, entropy, rng):
+    """Escreve `total_size_bytes` bytes do perfil indicado em `f` (modo binário)."""
+    if profile == "zeros":
+        # Arquivo esparso: o sistema de arquivos não grava os blocos de zeros
+        f.truncate(total_size_bytes)
+        return
+
+    if hasattr(os, "posix_fallocate") and total_size_bytes > 0:
+        try:
+            os.posix_fallocate(f.fileno(), 0, total_size_bytes)
+        except OSError:
+            pass  # Nem todo sistema de arquivos suporta pré-alocação
+
+    pool = get_text_pool(entropy) if profile == "text" else None
+    remaining = total_size_bytes
+    while remaining > 0:
+        size = min(CHUNK_SIZE, remaining)
+        if pool is None:
+            f.write(rng.randbytes(size))
+        else:
+            start = rng.randrange(0, len(pool) - size + 1)
+            f.write(pool[start : start + size])
+        remaining -= size
+    f.truncate(total_size_bytes)
+
+
+def create_dummy_file(full_filepath, size_mb, profile="zeros", entropy=4.0, seed=0):
     """
-    Cria um arquivo de texto com um tamanho (aproximado) em Megabytes.
+    Cria um arquivo binário com um tamanho (aproximado) em Megabytes.
 
     Args:
         full_filepath (str): O caminho completo (incluindo diretório) do arquivo.
         size_mb (float): O tamanho desejado em MB.
+        profile (str): Conteúdo do arquivo: 'zeros' (esparso), 'random'
+                       (incompressível) ou 'text' (texto com entropia configurável).
+        entropy (float): Bits por caractere do perfil 'text'.
+        seed (int): Semente do gerador, para arquivos reprodutíveis.
+
+    Returns:
+        int: O tamanho final do arquivo em bytes (0 em caso de erro).
     """
     try:
         total_size_bytes = int(size_mb * ONE_MEGABYTE)
 
         # Pega apenas o nome do arquivo para o log
         filename = os.path.basename(full_filepath)
-        print(f"Criando '{filename}' (Tamanho: {size_mb} MB)...")
-
-        chunk_data = "0" * CHUNK_SIZE
-        num_chunks = total_size_bytes // CHUNK_SIZE
-        remainder = total_size_bytes % CHUNK_SIZE
+        print(f"Criando '{filename}' (Tamanho: {size_mb:.2f} MB, perfil: {profile})...")
 
-        with open(full_filepath, "w", encoding="utf-8") as f:
-            for _ in range(num_chunks):
-                f.write(chunk_data)
-
-            if remainder > 0:
-                f.write("0" * remainder)
+        rng = random.Random(seed)
+        with open(full_filepath, "wb") as f:
+            write_content(f, total_size_bytes, profile, entropy, rng)
 
         final_size = os.path.getsize(full_filepath)
         print(
             f" -> Concluído: '{full_filepath}' (Tamanho real: {(final_size / ONE_MEGABYTE):.2f} MB)"
         )
+        return final_size
 
     except IOError as e:
         print(
@@ -47,6 +115,21 @@ def create_dummy_file(full_filepath, size_mb):
             f"Um erro inesperado ocorreu durante a criação de '{full_filepath}': {e}",
             file=sys.stderr,
         )
+    return 0
+
+
+def draw_sizes_mb(size_mb, count, distribution, sigma, rng):
+    """
+    Sorteia o tamanho de cada arquivo.
+
+    'fixed' usa sempre `size_mb`; 'lognormal' usa mediana `size_mb` e desvio
+    `sigma` (em escala log); 'exponential' usa média `size_mb`.
+    """
+    if distribution == "lognormal":
+        return [rng.lognormvariate(math.log(size_mb), sigma) for _ in range(count)]
+    if distribution == "exponential":
+        return [rng.expovariate(1.0 / size_mb) for _ in range(count)]
+    return [size_mb] * count
 
 
 def get_output_filename(base_name, index):
@@ -73,7 +156,7 @@ def ensure_directory_exists(directory_path):
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(
-        description="Cria N arquivos de texto 'dummy' em um diretório específico."
+        description="Cria N arquivos 'dummy' em um diretório específico."
     )
 
     parser.add_argument(
@@ -104,6 +187,50 @@ if __name__ == "__main__":
         help="Diretório de destino para salvar os arquivos (padrão: diretório atual)",
     )
 
+    parser.add_argument(
+        "-p",
+        "--profile",
+        choices=PROFILES,
+        default="zeros",
+        help="Conteúdo dos arquivos; 'mixed' sorteia um perfil por arquivo (padrão: zeros)",
+    )
+
+    parser.add_argument(
+        "--entropy",
+        type=float,
+        default=4.0,
+        help="Bits por caractere do perfil 'text', entre 1 e 6.5 (padrão: 4.0)",
+    )
+
+    parser.add_argument(
+        "--size_distribution",
+        choices=SIZE_DISTRIBUTIONS,
+        default="fixed",
+        help="Distribuição dos tamanhos; size_mb é a mediana (lognormal) ou média (exponential)",
+    )
+
+    parser.add_argument(
+        "--size_sigma",
+        type=float,
+        default=1.0,
+        help="Desvio em escala log da distribuição lognormal (padrão: 1.0)",
+    )
+
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Número de processos gerando arquivos em paralelo (padrão: núcleos da máquina)",
+    )
+
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=0,
+        help="Semente para tornar conteúdo e tamanhos reprodutíveis (padrão: 0)",
+    )
+
     args = parser.parse_args()
 
     if args.numero <= 0:
@@ -114,14 +241,39 @@ if __name__ == "__main__":
 
     print(f"\nIniciando criação de {args.numero} arquivo(s)...")
     print(f"Diretório de destino: {args.directory}")
-    print(f"Tamanho por arquivo: {args.size_mb} MB")
+    print(f"Tamanho por arquivo: {args.size_mb} MB ({args.size_distribution})")
+    print(f"Perfil de conteúdo: {args.profile}")
+    print(f"Processos: {args.jobs}")
     print(f"Nome base: {args.output}\n")
 
-    for i in range(1, args.numero + 1):
-        filename = get_output_filename(args.output, i)
-        full_output_path = os.path.join(args.directory, filename)
-        create_dummy_file(full_output_path, args.size_mb)
+    rng = random.Random(args.seed)
+    sizes_mb = draw_sizes_mb(
+        args.size_mb, args.numero, args.size_distribution, args.size_sigma, rng
+    )
+
+    total_bytes = 0
+    with ProcessPoolExecutor(max_workers=max(1, args.jobs)) as executor:
+        futures = []
+        for i in range(1, args.numero + 1):
+            filename = get_output_filename(args.output, i)
+            full_output_path = os.path.join(args.directory, filename)
+            profile = args.profile
+            if profile == "mixed":
+                profile = rng.choice(PROFILES[:-1])
+            futures.append(
+                executor.submit(
+                    create_dummy_file,
+                    full_output_path,
+                    sizes_mb[i - 1],
+                    profile,
+                    args.entropy,
+                    args.seed + i,
+                )
+            )
+        for future in as_completed(futures):
+            total_bytes += future.result()
 
     print(
-        f"\nOperação concluída. {args.numero} arquivo(s) criado(s) em '{args.directory}'."
+        f"\nOperação concluída. {args.numero} arquivo(s) criado(s) em '{args.directory}' "
+        f"({total_bytes / ONE_MEGABYTE:.2f} MB no total)."
     )
@@ -0,0 +1,326 @@
+"""
+Entradas por referência: a tarefa leva um descritor do seu trecho de dados em
+vez dos dados.
+
+O Master grava os trechos das tarefas (por exemplo, os baldes do
+bucket_sort.py) em um arquivo no formato binário do binary_dataset.py, um após
+o outro, e cada tarefa recebe só {caminho ou URL, deslocamento, tamanho}. O
+worker, envolvido por `with_data_refs()`, lê o trecho direto da fonte:
+
+- "shared": o arquivo fica em um diretório visível pelos workers (sistema de
+  arquivos compartilhado) e o worker lê com seek/read;
+- "http": o Master serve o arquivo por um servidor HTTP local (DataServer) e o
+  worker pede só o intervalo de bytes do seu trecho (cabeçalho Range).
+
+Assim os dados não passam pelo payload das tarefas. Os bytes que deixaram de
+ir no payload ficam em RefStager.stats. No modo "http" os trechos continuam
+saindo do Master, só que pelo DataServer em vez do payload; os bytes que ele
+entregou ficam em DataServer.bytes_served.
+"""
+
+import os
+import secrets
+import shutil
+import socket
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import cloudpickle
+
+from binary_dataset import HEADER_SIZE, itemsize_for, write_values
+
+REF_KEY = "__data_ref__"
+
+REF_MODES = ("shared", "http")
+
+# Tamanho dos blocos enviados pelo DataServer
+SEND_BLOCK = 1024 * 1024
+
+
+def make_ref(location: str, offset: int, length: int, itemsize: int) -> Dict[str, Any]:
+    """
+    Descritor de um trecho de inteiros: `location` é um caminho ou uma URL
+    http(s); `offset` e `length` estão em bytes.
+    """
+    kind = "url" if location.startswith(("http://", "https://")) else "path"
+    return {
+        REF_KEY: True,
+        kind: location,
+        "offset": offset,
+        "length": length,
+        "itemsize": itemsize,
+    }
+
+
+def is_ref(value: Any) -> bool:
+    return isinstance(value, dict) and REF_KEY in value
+
+
+def with_data_refs(user_function: Callable) -> Callable:
+    """
+    Envolve a função do worker para que os descritores no chunk (itens ou
+    elementos de tuplas) sejam trocados pelos valores lidos da fonte antes da
+    chamada.
+    """
+
+    def data_ref_worker(chunk, metadata):
+        import sys
+        import urllib.request
+        from array import array
+
+        def read_range(ref):
+            offset, length = ref["offset"], ref["length"]
+            if length == 0:
+                raw = b""
+            elif "url" in ref:
+                request = urllib.request.Request(
+                    ref["url"],
+                    headers={"Range": f"bytes={offset}-{offset + length - 1}"},
+                )
+                with urllib.request.urlopen(request, timeout=300) as response:
+                    if response.status != 206:
+                        raise IOError(
+                            f"O servidor ignorou o intervalo pedido (HTTP {response.status})."
+                        )
+                    raw = response.read()
+            else:
+                with open(ref["path"], "rb") as f:
+                    f.seek(offset)
+                    raw = f.read(length)
+            if len(raw) != length:
+                raise IOError(f"Lidos {len(raw)} bytes de {length} esperados.")
+            values = array({4: "i", 8: "q"}[ref["itemsize"]], raw)
+            if sys.byteorder != "little":
+                values.byteswap()
+            return values.tolist()
+
+        def resolve(value):
+            if isinstance(value, dict) and "__data_ref__" in value:
+                return read_range(value)
+            if isinstance(value, tuple):
+                return tuple(resolve(v) for v in value)
+            return value
+
+        return user_function([resolve(item) for item in chunk], metadata)
+
+    return data_ref_worker
+
+
+class _RangeHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        parts = self.path.strip("/").split("/")
+        path = None
+        if len(parts) == 2 and parts[0] == self.server.token:
+            path = self.server.files.get(parts[1])
+        if path is None:
+            self.send_error(404)
+            return
+
+        size = os.path.getsize(path)
+        start, end = 0, size - 1
+        requested = self.headers.get("Range")
+        if requested:
+            try:
+                unit, _, span = requested.partition("=")
+                first, _, last = span.partition("-")
+                if unit.strip() != "bytes" or "," in span:
+                    raise ValueError(requested)
+                start = int(first)
+                end = min(int(last), size - 1) if last else size - 1
+            except ValueError:
+                self.send_error(400, "Intervalo inválido")
+                return
+            if start > end or start >= size:
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{size}")
+                self.end_headers()
+                return
+
+        self.send_response(206 if requested else 200)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Length", str(end - start + 1))
+        if requested:
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        self.end_headers()
+        with open(path, "rb") as f:
+            f.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                block = f.read(min(SEND_BLOCK, remaining))
+                if not block:
+                    break
+                self.wfile.write(block)
+                remaining -= len(block)
+                with self.server.lock:
+                    self.server.bytes_served += len(block)
+
+    def log_message(self, *_):
+        pass
+
+
+class DataServer:
+    """
+    Servidor HTTP do Master que entrega intervalos de bytes dos arquivos
+    publicados. As URLs levam um token aleatório, então só quem recebeu o
+    descritor consegue ler os arquivos.
+
+    Args:
+        host (str): Nome ou IP anunciado nas URLs (padrão: nome da máquina).
+        port (int): Porta; 0 escolhe uma livre.
+        bind (str): Endereço em que o servidor escuta.
+    """
+
+    def __init__(self, host: Optional[str] = None, port: int = 0, bind: str = ""):
+        self._server = ThreadingHTTPServer((bind, port), _RangeHandler)
+        self._server.daemon_threads = True
+        self._server.token = secrets.token_urlsafe(16)
+        self._server.files = {}
+        self._server.lock = threading.Lock()
+        self._server.bytes_served = 0
+        self.host = host or socket.getfqdn()
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def publish(self, path: str) -> str:
+        """Publica um arquivo e devolve a sua URL."""
+        name = os.path.basename(path)
+        self._server.files[name] = os.path.abspath(path)
+        return f"http://{self.host}:{self.port}/{self._server.token}/{name}"
+
+    @property
+    def bytes_served(self) -> int:
+        """Bytes de arquivo entregues aos workers até agora."""
+        with self._server.lock:
+            return self._server.bytes_served
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+
+class RefStager:
+    """
+    Grava os trechos das tarefas em arquivos de staging e devolve os
+    descritores, contabilizando o payload que deixou de ser enviado.
+
+    Args:
+        mode (str): "shared" ou "http" (REF_MODES).
+        directory (str): Onde gravar os arquivos. No modo "shared" deve ser
+                         visível pelos workers no mesmo caminho; se omitido,
+                         usa um diretório temporário (só serve para workers
+                         na mesma máquina).
+        host (str): No modo "http", nome ou IP anunciado aos workers.
+        port (int): No modo "http", porta do servidor (0 escolhe uma livre).
+    """
+
+    def __init__(
+        self,
+        mode: str,
+        directory: Optional[str] = None,
+        host: Optional[str] = None,
+        port: int = 0,
+    ):
+        if mode not in REF_MODES:
+            raise ValueError(f"Modo de referência desconhecido: {mode}")
+        self.mode = mode
+        self._own_directory = directory is None
+        self.directory = os.path.abspath(
+            directory or tempfile.mkdtemp(prefix="mwfaas_refs_")
+        )
+        os.makedirs(self.directory, exist_ok=True)
+        self.server = DataServer(host, port) if mode == "http" else None
+        self.files: List[str] = []
+        self.stats = {"staged_bytes": 0, "inline_bytes": 0, "ref_bytes": 0}
+
+    def stage(
+        self,
+        name: str,
+        parts: Sequence[Sequence[int]],
+        min_value: int,
+        max_value: int,
+    ) -> List[Optional[Dict[str, Any]]]:
+        """
+        Grava os trechos em um único arquivo, na ordem.
+
+        Returns:
+            list: O descritor de cada trecho (None para os vazios).
+        """
+        path = os.path.join(self.directory, f"{name}-{secrets.token_hex(4)}.bin")
+        count = sum(len(part) for part in parts)
+        write_values(path, parts, count, min_value, max_value, distribution="staged")
+        self.files.append(path)
+        location = self.server.publish(path) if self.server else path
+
+        itemsize = itemsize_for(min_value, max_value)
+        refs: List[Optional[Dict[str, Any]]] = []
+        offset = HEADER_SIZE
+        for part in parts:
+            length = len(part) * itemsize
+            if not part:
+                refs.append(None)
+                continue
+            ref = make_ref(location, offset, length, itemsize)
+            refs.append(ref)
+            offset += length
+            self.stats["staged_bytes"] += length
+            self.stats["inline_bytes"] += len(cloudpickle.dumps(part))
+            self.stats["ref_bytes"] += len(cloudpickle.dumps(ref))
+        return refs
+
+    def payload_bytes_saved(self) -> int:
+        """
+        Bytes que os trechos ocupariam a mais no payload das tarefas. No modo
+        "http" não é economia de tráfego do Master, que serve os mesmos dados
+        pelo DataServer (ver bytes_served()).
+        """
+        return self.stats["inline_bytes"] - self.stats["ref_bytes"]
+
+    def bytes_served(self) -> Optional[int]:
+        """Bytes entregues pelo DataServer (None fora do modo "http")."""
+        return self.server.bytes_served if self.server else None
+
+    def print_summary(self, prefix: str = "Master"):
+        """Resume o staging; chamado após a execução, mostra também o tráfego HTTP."""
+        source = (
+            f"servidor HTTP em {self.server.host}:{self.server.port}"
+            if self.server
+            else f"diretório compartilhado {self.directory}"
+        )
+        print(
+            f"[{prefix}] Entradas por referência ({source}): "
+            f"{self.stats['staged_bytes'] / (1024 * 1024):.2f} MB em staging; "
+            f"payload das tarefas de {self.stats['ref_bytes'] / 1024:.1f} KB em vez de "
+            f"{self.stats['inline_bytes'] / (1024 * 1024):.2f} MB "
+            f"({self.payload_bytes_saved() / (1024 * 1024):.2f} MB a menos no payload)"
+        )
+        if self.server:
+            print(
+                f"[{prefix}] O Master serviu {self.bytes_served() / (1024 * 1024):.2f} MB "
+                "pelo servidor HTTP: os dados saíram do payload, mas não do Master."
+            )
+
+    def close(self):
+        """Para o servidor e apaga os arquivos de staging."""
+        if self.server:
+            self.server.close()
+        for path in self.files:
+            if os.path.exists(path):
+                os.remove(path)
+        if self._own_directory:
+            shutil.rmtree(self.directory, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
@@ -0,0 +1,558 @@
+"""
+Despacho de tarefas direto pelo Executor do Globus Compute.
+
+O Master do mwfaas não expõe o ciclo de vida de cada tarefa, não aceita
+escolher o endpoint de cada chunk e divide toda a entrada antes de começar. O Dispatcher tem a mesma interface (run() e
+get_task_statuses()) e submete os chunks aos endpoints de
+`cloud_manager.available_endpoint_ids` conforme a estratégia de distribuição
+(distribution.py), o que permite rastrear cada tarefa individualmente.
+"""
+
+import contextlib
+import statistics
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from globus_compute_sdk import Executor
+
+from distribution import (
+    DynamicDistribution,
+    RoundRobinDistribution,
+    create_distribution,
+    describe_assignments,
+)
+from endpoints import label_endpoint
+from function_registry import FunctionRegistry
+from mwfaas.list_distribuition_strategy import ListDistributionStrategy
+from mwfaas.master import Master
+from shared_context import ContextBroadcaster, is_context_missing, with_shared_context
+from task_tracing import TaskTracer, traced
+from worker_telemetry import TelemetryCollector, with_telemetry
+
+SPECULATION_POLL_INTERVAL = 0.5
+
+DEFAULT_SPECULATION_FACTOR = 2.0
+
+DEFAULT_SPECULATION_THRESHOLD = 0.5
+
+DEFAULT_MAX_OUTSTANDING = 2
+
+DEFAULT_MAX_RETRIES = 3
+
+DEFAULT_RETRY_BACKOFF = 1.0
+
+
+class Dispatcher:
+    """
+    Distribui os chunks entre os endpoints e aguarda os resultados.
+
+    Args:
+        cloud_manager: GlobusComputeCloudManager já autenticado.
+        distribution_strategy: Estratégia de distribution.py (padrão: rodízio
+                               com um item por chunk). Com uma
+                               DynamicDistribution, os chunks são submetidos
+                               conforme cada endpoint conclui tarefas.
+        tracer (TaskTracer): Se informado, registra a linha do tempo de cada tarefa.
+        speculation_factor (float): Se informado, ativa a reexecução
+                                    especulativa: depois que a fração
+                                    `speculation_threshold` das tarefas terminou,
+                                    uma tarefa em andamento há mais de
+                                    `speculation_factor` vezes a mediana é
+                                    duplicada em um endpoint ocioso e vale o
+                                    primeiro resultado. A função do worker deve
+                                    ser idempotente.
+        speculation_threshold (float): Fração de tarefas concluídas a partir da
+                                       qual a especulação começa.
+        share_metadata (bool): Se True, o metadata vai completo só na primeira
+                               tarefa de cada endpoint e as demais levam apenas
+                               o hash do conteúdo (shared_context.py).
+        function_registry (FunctionRegistry): Se informado, a função é
+                                              serializada uma vez por execução
+                                              e o ID registrado é reaproveitado
+                                              entre execuções.
+        max_retries (int): Quantas vezes uma tarefa que falhou é
+                           resubmetida antes de ser dada como perdida.
+        retry_backoff (float): Espera, em segundos, antes da primeira
+                               resubmissão; dobra a cada nova tentativa.
+        retry_other_endpoint (bool): Se True, a resubmissão vai para o
+                                     endpoint menos ocupado entre os que
+                                     ainda não falharam com a tarefa.
+        telemetry (TelemetryCollector): Se informado, cada resultado traz a
+                                        telemetria de recursos do worker,
+                                        agregada por endpoint.
+        on_result: Se informado, é chamada com (índice do chunk, resultado)
+                   assim que cada tarefa conclui; o valor que ela devolve
+                   substitui o resultado na lista de run() (ex.: sem os dados
+                   já consumidos, para não mantê-los em memória).
+    """
+
+    def __init__(
+        self,
+        cloud_manager,
+        distribution_strategy=None,
+        tracer: Optional[TaskTracer] = None,
+        speculation_factor: Optional[float] = None,
+        speculation_threshold: float = DEFAULT_SPECULATION_THRESHOLD,
+        share_metadata: bool = False,
+        function_registry: Optional[FunctionRegistry] = None,
+        max_retries: int = 0,
+        retry_backoff: float = DEFAULT_RETRY_BACKOFF,
+        retry_other_endpoint: bool = True,
+        telemetry: Optional[TelemetryCollector] = None,
+        on_result: Optional[Callable[[int, Any], Any]] = None,
+    ):
+        self.cloud_manager = cloud_manager
+        self.distribution_strategy = distribution_strategy or RoundRobinDistribution()
+        self.tracer = tracer
+        self.speculation_factor = speculation_factor
+        self.speculation_threshold = speculation_threshold
+        self.share_metadata = share_metadata
+        self.function_registry = function_registry
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.retry_other_endpoint = retry_other_endpoint
+        self.telemetry = telemetry
+        self.on_result = on_result
+        self.task_statuses: Dict[int, Dict[str, Any]] = {}
+        self.speculation_stats: Dict[str, Any] = {}
+
+    def run(
+        self,
+        data_input: Sequence[Any],
+        user_function: Callable,
+        metadata: Any = None,
+    ) -> List[Any]:
+        endpoint_ids = list(self.cloud_manager.available_endpoint_ids)
+        if not endpoint_ids:
+            raise RuntimeError("Nenhum endpoint disponível para executar as tarefas.")
+
+        dynamic = isinstance(self.distribution_strategy, DynamicDistribution)
+        if dynamic:
+            self.distribution_strategy.start(data_input, endpoint_ids)
+            assignments = []
+        else:
+            assignments = self.distribution_strategy.assign(data_input, endpoint_ids)
+            self._print_distribution(assignments)
+
+        function_name = getattr(user_function, "__name__", None)
+        if self.telemetry:
+            user_function = with_telemetry(user_function)
+        self._broadcaster = None
+        if self.share_metadata:
+            self._broadcaster = ContextBroadcaster(metadata)
+            user_function = with_shared_context(user_function)
+        self._function = traced(user_function) if self.tracer else user_function
+        self._metadata = metadata
+        self._inflight: Dict[Any, Dict[str, Any]] = {}
+        self._abandoned: List[Dict[str, Any]] = []
+        self._tasks: List[Dict[str, Any]] = []
+        self._endpoint_ids = endpoint_ids
+        # (horário, tarefa) das resubmissões aguardando o backoff
+        self._retry_queue: List[Any] = []
+        self.task_statuses = {}
+        self.speculation_stats = {"launched": 0, "won": 0, "time_saved": 0.0}
+
+        if self.tracer:
+            self.tracer.start_run()
+
+        with contextlib.ExitStack() as stack:
+            self._executors = {}
+            for endpoint_id in endpoint_ids:
+                executor = Executor(endpoint_id=endpoint_id)
+                # Cópias especulativas perdedoras não devem segurar o fim da execução
+                stack.callback(executor.shutdown, wait=False, cancel_futures=True)
+                self._executors[endpoint_id] = executor
+            if self.function_registry:
+                self.function_registry.register(
+                    self._function, self._executors, function_name
+                )
+
+            if dynamic:
+                for endpoint_id in endpoint_ids:
+                    self._refill(endpoint_id)
+            else:
+                for endpoint_id, chunk in assignments:
+                    self._submit(self._new_task(chunk, endpoint_id), endpoint_id)
+
+            results: Dict[int, Any] = {}
+            poll = SPECULATION_POLL_INTERVAL if self.speculation_factor else None
+            while self._inflight or self._retry_queue:
+                timeout = poll
+                if self._retry_queue:
+                    next_retry = max(0.0, self._retry_queue[0][0] - time.time())
+                    timeout = next_retry if poll is None else min(poll, next_retry)
+                if not self._inflight:
+                    time.sleep(timeout)
+                done, _ = wait(
+                    list(self._inflight), timeout=timeout, return_when=FIRST_COMPLETED
+                )
+                for future in done:
+                    copy = self._inflight.pop(future, None)
+                    if copy is None:
+                        continue
+                    self._handle_done(copy, results)
+                    if dynamic:
+                        self._refill(copy["endpoint_id"])
+                self._submit_due_retries()
+                # No modo dinâmico só há endpoints ociosos depois que a fila esvazia
+                if self.speculation_factor:
+                    self._speculate(endpoint_ids)
+
+        if self.tracer:
+            self.tracer.end_run()
+        if dynamic:
+            self._print_distribution(
+                [
+                    (s["endpoint_id"], [None] * s["items"])
+                    for s in self.task_statuses.values()
+                ]
+            )
+        if self.speculation_factor:
+            self._report_speculation()
+        if self.max_retries:
+            self._report_retries()
+        if self._broadcaster:
+            self._broadcaster.report()
+        if self.function_registry:
+            self.function_registry.report()
+        return [results[task_id] for task_id in sorted(results)]
+
+    def _print_distribution(self, assignments):
+        for endpoint_id, counts in describe_assignments(assignments).items():
+            print(
+                f"[Dispatcher] {label_endpoint(endpoint_id)}: {counts['chunks']} chunks, {counts['items']} itens"
+            )
+
+    def _new_task(self, chunk: list, endpoint_id: str) -> Dict[str, Any]:
+        task_id = len(self._tasks)
+        task = {
+            "task_id": task_id,
+            "chunk": chunk,
+            "copies": [],
+            "done": False,
+            "errors": [],
+        }
+        self.task_statuses[task_id] = {
+            "status": "pending",
+            "endpoint_id": endpoint_id,
+            "items": len(chunk),
+        }
+        self._tasks.append(task)
+        return task
+
+    def _refill(self, endpoint_id: str):
+        """Completa as tarefas em andamento do endpoint puxando chunks da fila."""
+        strategy = self.distribution_strategy
+        outstanding = sum(
+            1 for copy in self._inflight.values() if copy["endpoint_id"] == endpoint_id
+        )
+        while outstanding < strategy.max_outstanding:
+            chunk = strategy.next_chunk(endpoint_id)
+            if chunk is None:
+                return
+            self._submit(self._new_task(chunk, endpoint_id), endpoint_id)
+            outstanding += 1
+
+    def _submit(
+        self,
+        task: Dict[str, Any],
+        endpoint_id: str,
+        speculative=False,
+        full_context=False,
+    ) -> Dict[str, Any]:
+        trace_id = self.tracer.next_task_id() if self.tracer else None
+
+        chunk = task["chunk"]
+        metadata = self._metadata
+        if self._broadcaster:
+            metadata = self._broadcaster.envelope(endpoint_id, full_context)
+        if self.tracer:
+            self.tracer.measure_serialization(trace_id, (chunk, metadata))
+            info = {"speculative_of": task["task_id"]} if speculative else {}
+            self.tracer.mark(
+                trace_id,
+                "submit_start",
+                endpoint_id=endpoint_id,
+                items=len(chunk),
+                **info,
+            )
+
+        copy = {
+            "task": task,
+            "endpoint_id": endpoint_id,
+            "speculative": speculative,
+            "trace_id": trace_id,
+            "submitted_at": time.time(),
+            "done_at": None,
+        }
+        future = self._executors[endpoint_id].submit(self._function, chunk, metadata)
+        copy["future"] = future
+
+        if self.tracer:
+            self.tracer.mark(trace_id, "submit_end")
+
+        # O horário de chegada é marcado assim que o resultado chega, mesmo que o
+        # laço principal ainda esteja tratando outra tarefa
+        def on_done(_, copy=copy):
+            copy["done_at"] = time.time()
+            if self.tracer:
+                self.tracer.mark(copy["trace_id"], "received")
+
+        future.add_done_callback(on_done)
+        task["copies"].append(copy)
+        self._inflight[future] = copy
+        return copy
+
+    def _handle_done(self, copy: Dict[str, Any], results: Dict[int, Any]):
+        task = copy["task"]
+        task_id = task["task_id"]
+        status = self.task_statuses[task_id]
+        future = copy["future"]
+        try:
+            result = future.result()
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            if self.tracer:
+                self.tracer.attach_worker_trace(copy["trace_id"], None, "failed")
+            task["errors"].append((copy["endpoint_id"], error))
+            if any(c["future"] in self._inflight for c in task["copies"]):
+                print(
+                    f"[Dispatcher] Uma cópia da tarefa {task_id} falhou ({error}); aguardando a outra."
+                )
+                return
+            if len(task["errors"]) <= self.max_retries:
+                self._schedule_retry(task, error)
+                return
+            status["status"] = "failed"
+            status["error"] = error
+            print(f"[Dispatcher] Tarefa {task_id} falhou: {error}")
+            return
+
+        if is_context_missing(result):
+            self._resend_with_context(copy, result)
+            return
+
+        if self.tracer:
+            self.tracer.attach_worker_trace(copy["trace_id"], result)
+        if self.telemetry:
+            self.telemetry.record(copy["endpoint_id"], result)
+        finished_at = copy["done_at"] or time.time()
+        task["done"] = True
+        task["duration"] = finished_at - task["copies"][0]["submitted_at"]
+        if self.on_result:
+            result = self.on_result(task_id, result)
+        results[task_id] = result
+        status["status"] = "completed"
+        status["endpoint_id"] = copy["endpoint_id"]
+        status["duration"] = task["duration"]
+        status["task_id"] = getattr(future, "task_id", None)
+
+        if copy["speculative"]:
+            status["speculative"] = "won"
+            self.speculation_stats["won"] += 1
+        for other in task["copies"]:
+            if other is not copy and other["future"] in self._inflight:
+                del self._inflight[other["future"]]
+                other["winner_done_at"] = finished_at
+                self._abandoned.append(other)
+
+    def _schedule_retry(self, task: Dict[str, Any], error: str):
+        attempt = len(task["errors"])
+        delay = self.retry_backoff * 2 ** (attempt - 1)
+        self.task_statuses[task["task_id"]]["status"] = "retrying"
+        print(
+            f"[Dispatcher] Tarefa {task['task_id']} falhou ({error}); "
+            f"nova tentativa ({attempt}/{self.max_retries}) em {delay:.1f}s"
+        )
+        self._retry_queue.append((time.time() + delay, task))
+        self._retry_queue.sort(key=lambda entry: entry[0])
+
+    def _submit_due_retries(self):
+        now = time.time()
+        while self._retry_queue and self._retry_queue[0][0] <= now:
+            _, task = self._retry_queue.pop(0)
+            endpoint_id = task["copies"][-1]["endpoint_id"]
+            if self.retry_other_endpoint:
+                failed_on = {e for e, _ in task["errors"]}
+                candidates = [
+                    e for e in self._endpoint_ids if e not in failed_on
+                ] or self._endpoint_ids
+                load = {e: 0 for e in candidates}
+                for copy in self._inflight.values():
+                    if copy["endpoint_id"] in load:
+                        load[copy["endpoint_id"]] += 1
+                endpoint_id = min(candidates, key=lambda e: load[e])
+            status = self.task_statuses[task["task_id"]]
+            status["status"] = "pending"
+            status["endpoint_id"] = endpoint_id
+            self._submit(task, endpoint_id)
+
+    def _resend_with_context(self, copy: Dict[str, Any], result: Dict[str, Any]):
+        """
+        A tarefa caiu em um processo do worker que ainda não tinha o metadata em
+        cache: reenvia ao mesmo endpoint com o conteúdo completo, no lugar da
+        cópia original e mantendo o horário da primeira submissão.
+        """
+        if self.tracer:
+            self.tracer.attach_worker_trace(copy["trace_id"], result, "context_missing")
+        task = copy["task"]
+        index = task["copies"].index(copy)
+        task["copies"].pop(index)
+        retry = self._submit(
+            task, copy["endpoint_id"], copy["speculative"], full_context=True
+        )
+        task["copies"].insert(index, task["copies"].pop())
+        retry["submitted_at"] = copy["submitted_at"]
+
+    def _speculate(self, endpoint_ids: List[str]):
+        tasks = self._tasks
+        durations = [t["duration"] for t in tasks if t["done"]]
+        if not durations or len(durations) < self.speculation_threshold * len(tasks):
+            return
+
+        busy = {copy["endpoint_id"] for copy in self._inflight.values()}
+        idle = [e for e in endpoint_ids if e not in busy]
+        if not idle:
+            return
+
+        now = time.time()
+        limit = self.speculation_factor * statistics.median(durations)
+        stragglers = [
+            t
+            for t in tasks
+            if not t["done"]
+            and len(t["copies"]) == 1
+            and t["copies"][0]["future"] in self._inflight
+            and now - t["copies"][0]["submitted_at"] > limit
+        ]
+        stragglers.sort(key=lambda t: t["copies"][0]["submitted_at"])
+
+        for endpoint_id, task in zip(idle, stragglers):
+            original = task["copies"][0]
+            print(
+                f"[Dispatcher] Tarefa {task['task_id']} em {label_endpoint(original['endpoint_id'])} "
+                f"há {now - original['submitted_at']:.2f}s (limite {limit:.2f}s); "
+                f"cópia especulativa em {label_endpoint(endpoint_id)}"
+            )
+            self.task_statuses[task["task_id"]]["speculative"] = "launched"
+            self.speculation_stats["launched"] += 1
+            self._submit(task, endpoint_id, speculative=True)
+
+    def _report_speculation(self):
+        """
+        Tempo economizado: para cada cópia vencedora, quanto a original ainda
+        levou para terminar. Originais que não terminaram até o fim da execução
+        contam só o tempo até ali, então o total é um limite inferior.
+        """
+        end = time.time()
+        saved = 0.0
+        unfinished = 0
+        for loser in self._abandoned:
+            if loser["done_at"] is None:
+                unfinished += 1
+            loser_end = loser["done_at"] or end
+            saved += max(0.0, loser_end - loser["winner_done_at"])
+        self.speculation_stats["time_saved"] = saved
+        self.speculation_stats["unfinished_originals"] = unfinished
+
+        stats = self.speculation_stats
+        message = (
+            f"[Dispatcher] Execução especulativa: {stats['launched']} cópias lançadas, "
+            f"{stats['won']} venceram, {saved:.2f}s economizados"
+        )
+        if unfinished:
+            message += (
+                f" (pelo menos; {unfinished} originais ainda não tinham terminado)"
+            )
+        print(message)
+
+    def _report_retries(self):
+        """Lista as tarefas que precisaram de novas tentativas."""
+        retried = [t for t in self._tasks if t["errors"]]
+        recovered = 0
+        for task in retried:
+            status = self.task_statuses[task["task_id"]]
+            status["attempts"] = len(task["errors"]) + (1 if task["done"] else 0)
+            status["errors"] = [
+                f"{label_endpoint(e)}: {error}" for e, error in task["errors"]
+            ]
+            failures = ", ".join(label_endpoint(e) for e, _ in task["errors"])
+            if task["done"]:
+                recovered += 1
+                outcome = f"recuperada em {label_endpoint(status['endpoint_id'])}"
+            else:
+                outcome = "perdida"
+            print(
+                f"[Dispatcher] Tarefa {task['task_id']} ({len(task['chunk'])} itens): "
+                f"falhou em {failures}; {outcome}"
+            )
+        print(
+            f"[Dispatcher] Novas tentativas: {len(retried)} tarefas com falha, "
+            f"{recovered} recuperadas, {len(retried) - recovered} perdidas"
+        )
+
+    def get_task_statuses(self) -> Dict[int, Dict[str, Any]]:
+        return self.task_statuses
+
+
+def create_master(
+    cloud_manager,
+    items_per_chunk: int,
+    tracer: Optional[TaskTracer] = None,
+    weights: Optional[Dict[str, float]] = None,
+    scale_chunks: bool = True,
+    speculation_factor: Optional[float] = None,
+    max_outstanding: Optional[int] = None,
+    share_metadata: bool = False,
+    function_registry: Optional[FunctionRegistry] = None,
+    max_retries: int = 0,
+    telemetry: Optional[TelemetryCollector] = None,
+    on_result: Optional[Callable[[int, Any], Any]] = None,
+):
+    """
+    Retorna o Master do mwfaas ou, quando algum recurso que ele não oferece é
+    pedido (rastreamento por tarefa, distribuição ponderada ou dinâmica,
+    reexecução especulativa, metadata compartilhado, cache de funções,
+    novas tentativas, telemetria dos workers, consumo dos resultados conforme
+    chegam), um Dispatcher com a mesma interface.
+
+    Args:
+        weights (dict): Vazão relativa de cada endpoint (endpoint_profile.py).
+        scale_chunks (bool): Ver WeightedDistributionStrategy.
+        speculation_factor (float): Ver Dispatcher.
+        max_outstanding (int): Se informado, usa a DynamicDistribution com
+                               este limite de tarefas em andamento por endpoint.
+        share_metadata (bool): Ver Dispatcher.
+        function_registry (FunctionRegistry): Ver Dispatcher.
+        max_retries (int): Ver Dispatcher.
+        telemetry (TelemetryCollector): Ver Dispatcher.
+        on_result: Ver Dispatcher.
+    """
+    if not (
+        tracer
+        or weights
+        or speculation_factor
+        or max_outstanding
+        or share_metadata
+        or function_registry
+        or max_retries
+        or telemetry
+        or on_result
+    ):
+        strategy = ListDistributionStrategy(items_per_chunk=items_per_chunk)
+        return Master(cloud_manager, distribution_strategy=strategy)
+    distribution = create_distribution(
+        items_per_chunk, weights, scale_chunks, max_outstanding
+    )
+    return Dispatcher(
+        cloud_manager,
+        distribution_strategy=distribution,
+        tracer=tracer,
+        speculation_factor=speculation_factor,
+        share_metadata=share_metadata,
+        function_registry=function_registry,
+        max_retries=max_retries,
+        telemetry=telemetry,
+        on_result=on_result,
+    )
@@ -0,0 +1,208 @@
+"""
+Estratégias de distribuição usadas pelo Dispatcher.
+
+As estratégias estáticas (assign) transformam a entrada, de uma vez, em uma
+lista de tarefas (endpoint, chunk). A DynamicDistribution entrega um chunk por
+vez, conforme cada endpoint termina o que recebeu.
+"""
+
+import math
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+Assignment = Tuple[str, list]
+
+
+def split_into_chunks(data_input: Sequence[Any], items_per_chunk: int) -> List[list]:
+    """Divide a entrada em chunks consecutivos, como a ListDistributionStrategy."""
+    items_per_chunk = max(1, items_per_chunk)
+    return [
+        list(data_input[start : start + items_per_chunk])
+        for start in range(0, len(data_input), items_per_chunk)
+    ]
+
+
+class RoundRobinDistribution:
+    """Chunks de tamanho fixo entregues aos endpoints em rodízio."""
+
+    def __init__(self, items_per_chunk: int = 1):
+        self.items_per_chunk = items_per_chunk
+
+    def assign(
+        self, data_input: Sequence[Any], endpoint_ids: Sequence[str]
+    ) -> List[Assignment]:
+        return [
+            (endpoint_ids[i % len(endpoint_ids)], chunk)
+            for i, chunk in enumerate(
+                split_into_chunks(data_input, self.items_per_chunk)
+            )
+        ]
+
+
+class WeightedDistributionStrategy:
+    """
+    Distribui a entrada proporcionalmente ao peso (vazão relativa) de cada
+    endpoint.
+
+    Args:
+        weights (dict): Peso de cada endpoint. Endpoints sem peso recebem a
+                        média dos pesos conhecidos.
+        items_per_chunk (int): Tamanho médio dos chunks.
+        scale_chunks (bool): Se True, cada endpoint recebe um chunk por rodada,
+                             com tamanho proporcional ao seu peso. Se False, os
+                             chunks têm tamanho fixo e os endpoints mais rápidos
+                             recebem mais chunks (para funções que processam um
+                             único item por tarefa).
+    """
+
+    def __init__(
+        self,
+        weights: Dict[str, float],
+        items_per_chunk: int = 1,
+        scale_chunks: bool = True,
+    ):
+        self.weights = weights
+        self.items_per_chunk = max(1, items_per_chunk)
+        self.scale_chunks = scale_chunks
+
+    def normalized_weights(self, endpoint_ids: Sequence[str]) -> Dict[str, float]:
+        """Pesos dos endpoints disponíveis, somando 1."""
+        known = [self.weights[e] for e in endpoint_ids if self.weights.get(e, 0) > 0]
+        default = sum(known) / len(known) if known else 1.0
+        raw = {
+            e: self.weights[e] if self.weights.get(e, 0) > 0 else default
+            for e in endpoint_ids
+        }
+        total = sum(raw.values())
+        return {e: w / total for e, w in raw.items()}
+
+    def chunk_sizes(self, endpoint_ids: Sequence[str]) -> Dict[str, int]:
+        """Tamanho do chunk de cada endpoint em uma rodada."""
+        weights = self.normalized_weights(endpoint_ids)
+        per_round = self.items_per_chunk * len(endpoint_ids)
+        return {e: max(1, round(per_round * w)) for e, w in weights.items()}
+
+    def assign(
+        self, data_input: Sequence[Any], endpoint_ids: Sequence[str]
+    ) -> List[Assignment]:
+        if self.scale_chunks:
+            return self._assign_scaled(data_input, endpoint_ids)
+        return self._assign_counted(data_input, endpoint_ids)
+
+    def _assign_scaled(self, data_input, endpoint_ids) -> List[Assignment]:
+        sizes = self.chunk_sizes(endpoint_ids)
+        assignments = []
+        start = 0
+        while start < len(data_input):
+            for endpoint_id in endpoint_ids:
+                if start >= len(data_input):
+                    break
+                end = start + sizes[endpoint_id]
+                assignments.append((endpoint_id, list(data_input[start:end])))
+                start = end
+        return assignments
+
+    def _assign_counted(self, data_input, endpoint_ids) -> List[Assignment]:
+        # Rodízio ponderado suave (como o do nginx): intercala os endpoints
+        # mantendo a proporção de chunks igual à dos pesos.
+        weights = self.normalized_weights(endpoint_ids)
+        credits = {e: 0.0 for e in endpoint_ids}
+        assignments = []
+        for chunk in split_into_chunks(data_input, self.items_per_chunk):
+            for endpoint_id in endpoint_ids:
+                credits[endpoint_id] += weights[endpoint_id]
+            chosen = max(endpoint_ids, key=lambda e: credits[e])
+            credits[chosen] -= 1.0
+            assignments.append((chosen, chunk))
+        return assignments
+
+
+class DynamicDistribution:
+    """
+    Fila compartilhada da qual cada endpoint puxa um novo chunk ao concluir
+    uma tarefa, com no máximo `max_outstanding` tarefas em andamento por
+    endpoint.
+
+    O tamanho dos chunks segue o guided self-scheduling: cada chunk leva
+    restante / (endpoints * max_outstanding) itens, limitado entre
+    `min_chunk_size` e `items_per_chunk`, então os chunks encolhem no fim da
+    execução e os últimos endpoints a terminar recebem pouco trabalho.
+
+    Args:
+        items_per_chunk (int): Tamanho máximo dos chunks.
+        min_chunk_size (int): Tamanho mínimo dos chunks.
+        max_outstanding (int): Tarefas em andamento por endpoint.
+        weights (dict): Vazão relativa dos endpoints (endpoint_profile.py); se
+                        informado, o chunk de cada endpoint é escalado pelo
+                        seu peso.
+    """
+
+    def __init__(
+        self,
+        items_per_chunk: int = 1,
+        min_chunk_size: int = 1,
+        max_outstanding: int = 2,
+        weights: Optional[Dict[str, float]] = None,
+    ):
+        self.items_per_chunk = max(1, items_per_chunk)
+        self.min_chunk_size = max(1, min(min_chunk_size, self.items_per_chunk))
+        self.max_outstanding = max(1, max_outstanding)
+        self.weights = weights or {}
+        self._data: Sequence[Any] = []
+        self._offset = 0
+        self._scale: Dict[str, float] = {}
+        self._slots = 1
+
+    def start(self, data_input: Sequence[Any], endpoint_ids: Sequence[str]):
+        self._data = data_input
+        self._offset = 0
+        self._slots = len(endpoint_ids) * self.max_outstanding
+        # Peso relativo à média: 1.0 para todos quando não há perfil
+        weights = WeightedDistributionStrategy(self.weights).normalized_weights(
+            endpoint_ids
+        )
+        self._scale = {e: w * len(endpoint_ids) for e, w in weights.items()}
+
+    def remaining(self) -> int:
+        return len(self._data) - self._offset
+
+    def next_chunk(self, endpoint_id: str) -> Optional[list]:
+        remaining = self.remaining()
+        if remaining <= 0:
+            return None
+        guided = math.ceil(remaining * self._scale.get(endpoint_id, 1.0) / self._slots)
+        size = max(self.min_chunk_size, min(self.items_per_chunk, guided))
+        chunk = list(self._data[self._offset : self._offset + size])
+        self._offset += len(chunk)
+        return chunk
+
+
+def describe_assignments(assignments: List[Assignment]) -> Dict[str, Dict[str, int]]:
+    """Número de chunks e de itens atribuídos a cada endpoint."""
+    summary: Dict[str, Dict[str, int]] = {}
+    for endpoint_id, chunk in assignments:
+        entry = summary.setdefault(endpoint_id, {"chunks": 0, "items": 0})
+        entry["chunks"] += 1
+        entry["items"] += len(chunk)
+    return summary
+
+
+def create_distribution(
+    items_per_chunk: int,
+    weights: Optional[Dict[str, float]] = None,
+    scale_chunks: bool = True,
+    max_outstanding: Optional[int] = None,
+):
+    """
+    Escolhe a estratégia: dinâmica se `max_outstanding` for informado,
+    ponderada se houver pesos e, caso contrário, rodízio.
+    """
+    if max_outstanding:
+        # Sem chunks escaláveis (um item por tarefa) o tamanho fica fixo em 1
+        return DynamicDistribution(
+            items_per_chunk,
+            max_outstanding=max_outstanding,
+            weights=weights if scale_chunks else None,
+        )
+    if weights:
+        return WeightedDistributionStrategy(weights, items_per_chunk, scale_chunks)
+    return RoundRobinDistribution(items_per_chunk)
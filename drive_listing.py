@@ -0,0 +1,230 @@
+"""
+Listagem de pastas do Drive compartilhada entre google_drive.py e
+gzip_google_drive.py.
+
+Usa o tamanho máximo de página, pede apenas os campos necessários, percorre
+subpastas em paralelo e, opcionalmente, guarda a listagem em um cache local
+validado pelo token de alterações (changes) do Drive.
+"""
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from googleapiclient.errors import HttpError
+
+LIST_PAGE_SIZE = 1000
+
+FOLDER_MIME_TYPE = "application/vnd.google-apps.folder"
+
+DEFAULT_CACHE_DIR = ".drive_cache"
+
+DEFAULT_LIST_WORKERS = 8
+
+DEFAULT_FIELDS = ("id", "name")
+
+
+def _list_single_folder(service, folder_id: str, fields: Sequence[str]):
+    """Lista (paginando) os itens diretos de uma pasta."""
+    items = []
+    page_token = None
+    fields_param = f"nextPageToken, files({', '.join(fields)})"
+    while True:
+        response = (
+            service.files()
+            .list(
+                q=f"'{folder_id}' in parents and trashed=false",
+                spaces="drive",
+                fields=fields_param,
+                pageSize=LIST_PAGE_SIZE,
+                pageToken=page_token,
+            )
+            .execute()
+        )
+        items.extend(response.get("files", []))
+        page_token = response.get("nextPageToken", None)
+        if page_token is None:
+            return items
+
+
+def _list_recursive(
+    service,
+    folder_id: str,
+    fields: Sequence[str],
+    service_factory: Optional[Callable[[], Any]],
+    max_workers: int,
+):
+    """
+    Percorre a árvore de pastas em largura, listando várias pastas ao mesmo
+    tempo. Os objetos de serviço não são thread-safe, então cada thread
+    constrói o seu com `service_factory`.
+
+    Returns:
+        tuple: (arquivos encontrados, IDs de todas as pastas visitadas).
+    """
+    local = threading.local()
+
+    def list_in_thread(current_id: str):
+        if service_factory is None:
+            svc = service
+        else:
+            svc = getattr(local, "service", None)
+            if svc is None:
+                svc = local.service = service_factory()
+        return _list_single_folder(svc, current_id, fields)
+
+    if service_factory is None:
+        max_workers = 1
+
+    files: List[Dict[str, Any]] = []
+    folders = [folder_id]
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = {executor.submit(list_in_thread, folder_id): ""}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                prefix = pending.pop(future)
+                for item in future.result():
+                    path = f"{prefix}{item['name']}"
+                    if item.get("mimeType") == FOLDER_MIME_TYPE:
+                        folders.append(item["id"])
+                        pending[executor.submit(list_in_thread, item["id"])] = (
+                            f"{path}/"
+                        )
+                    else:
+                        item["path"] = path
+                        files.append(item)
+    return files, folders
+
+
+def _cache_path(cache_dir: str, folder_id: str, recursive: bool) -> str:
+    suffix = "_recursive" if recursive else ""
+    return os.path.join(cache_dir, f"{folder_id}{suffix}.json")
+
+
+def _load_valid_cache(service, cache_file: str, fields: Sequence[str]):
+    """
+    Retorna a listagem do cache se nenhuma alteração posterior ao token salvo
+    atingir os arquivos ou pastas listados; caso contrário, retorna None.
+    """
+    if not os.path.exists(cache_file):
+        return None
+    with open(cache_file, "r") as f:
+        cache = json.load(f)
+    if list(cache.get("fields", [])) != list(fields):
+        return None
+
+    folder_ids = set(cache["folders"])
+    known_ids = folder_ids | {item["id"] for item in cache["files"]}
+    page_token = cache["start_page_token"]
+    while page_token is not None:
+        response = (
+            service.changes()
+            .list(
+                pageToken=page_token,
+                spaces="drive",
+                pageSize=LIST_PAGE_SIZE,
+                fields="nextPageToken, newStartPageToken, changes(fileId, removed, file(parents))",
+            )
+            .execute()
+        )
+        for change in response.get("changes", []):
+            parents = set(change.get("file", {}).get("parents", []))
+            if change.get("fileId") in known_ids or parents & folder_ids:
+                return None
+        if "newStartPageToken" in response:
+            cache["start_page_token"] = response["newStartPageToken"]
+        page_token = response.get("nextPageToken")
+
+    with open(cache_file, "w") as f:
+        json.dump(cache, f)
+    return cache["files"]
+
+
+def list_folder(
+    service,
+    folder_id: str,
+    recursive: bool = False,
+    fields: Sequence[str] = DEFAULT_FIELDS,
+    service_factory: Optional[Callable[[], Any]] = None,
+    max_workers: int = DEFAULT_LIST_WORKERS,
+    cache_dir: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Lista os itens de uma pasta do Drive.
+
+    Args:
+        service: Objeto de serviço da API do Drive.
+        folder_id (str): O ID da pasta do Drive a ser pesquisada.
+        recursive (bool): Se True, desce nas subpastas e retorna apenas arquivos,
+                          cada um com a chave 'path' relativa à pasta raiz.
+        fields (list): Campos de cada arquivo pedidos à API.
+        service_factory (callable): Cria um novo serviço por thread; sem ele a
+                                    listagem recursiva é sequencial.
+        max_workers (int): Número de pastas listadas ao mesmo tempo.
+        cache_dir (str): Diretório do cache local (None desativa o cache).
+
+    Returns:
+        list: Uma lista de dicionários com os campos pedidos de cada item.
+    """
+    fields = list(fields)
+    if recursive and "mimeType" not in fields:
+        fields.append("mimeType")
+
+    start_time = time.perf_counter()
+    cache_file = None
+    start_page_token = None
+    if cache_dir:
+        cache_file = _cache_path(cache_dir, folder_id, recursive)
+        # O token é obtido antes da listagem para que alterações feitas
+        # durante ela invalidem o cache na próxima execução.
+        start_page_token = (
+            service.changes().getStartPageToken().execute()["startPageToken"]
+        )
+        cached = _load_valid_cache(service, cache_file, fields)
+        if cached is not None:
+            print(
+                f"Fase de listagem: {len(cached)} arquivos do cache em {time.perf_counter() - start_time:.4f} segundos"
+            )
+            return cached
+
+    if recursive:
+        files, folders = _list_recursive(
+            service, folder_id, fields, service_factory, max_workers
+        )
+    else:
+        files, folders = _list_single_folder(service, folder_id, fields), [folder_id]
+
+    if cache_file:
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(cache_file, "w") as f:
+            json.dump(
+                {
+                    "folder_id": folder_id,
+                    "fields": fields,
+                    "start_page_token": start_page_token,
+                    "folders": folders,
+                    "files": files,
+                },
+                f,
+            )
+
+    print(
+        f"Fase de listagem: {len(files)} arquivos em {len(folders)} pasta(s) em {time.perf_counter() - start_time:.4f} segundos"
+    )
+    return files
+
+
+def list_folder_or_empty(service, folder_id: str, **kwargs) -> List[Dict[str, Any]]:
+    """Como `list_folder`, mas registra o erro da API e retorna lista vazia."""
+    try:
+        print(f"Listando arquivos da pasta ID: {folder_id}...")
+        files = list_folder(service, folder_id, **kwargs)
+        print(f"Encontrados {len(files)} arquivos.")
+        return files
+    except HttpError as error:
+        print(f"Um erro ocorreu ao listar os arquivos: {error}")
+        return []
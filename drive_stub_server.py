@@ -0,0 +1,538 @@
+"""
+Servidor HTTP local que emula o subconjunto da API Drive v3 usado por
+google_drive.py e gzip_google_drive.py, para medir o pipeline sem depender do
+Google Drive real nem da variação da rede.
+
+Rotas emuladas:
+    GET  /drive/v3/files                        (files.list com paginação)
+    GET  /drive/v3/files/generateIds            (files.generateIds)
+    GET  /drive/v3/files/<id>                   (files.get, metadados)
+    GET  /drive/v3/files/<id>?alt=media         (get_media, com Range)
+    GET  /drive/v3/changes/startPageToken       (changes.getStartPageToken)
+    GET  /drive/v3/changes                      (changes.list)
+    POST /upload/drive/v3/files?uploadType=...  (create: media, multipart, resumable)
+    PUT  /upload/drive/v3/files?upload_id=...   (chunks da sessão resumable)
+    DELETE /drive/v3/files/<id>                 (files.delete)
+
+Uso:
+    python drive_stub_server.py --seed_dir ./inputs/files --latency_ms 20 --bandwidth_mbps 100
+
+Os scripts apontam para o servidor com --drive_api_url; nos workers a URL
+chega pela chave 'drive_api_url' do metadata.
+"""
+
+import argparse
+import json
+import os
+import re
+import socket
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+FOLDER_MIME_TYPE = "application/vnd.google-apps.folder"
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+DEFAULT_FIELDS = ["kind", "id", "name", "mimeType"]
+
+# Tamanho das fatias usadas para simular a limitação de banda
+THROTTLE_SLICE = 64 * 1024
+
+
+class DriveStore:
+    """Armazena em memória os arquivos e pastas do Drive emulado."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.files: Dict[str, Dict[str, Any]] = {}
+        self.sessions: Dict[str, Dict[str, Any]] = {}
+        # Log de alterações: o token N corresponde à posição N-1 do log
+        self.changes: List[str] = []
+        self._next_id = 0
+
+    def _new_id(self) -> str:
+        self._next_id += 1
+        return f"stub-{self._next_id:08d}"
+
+    def add_file(
+        self,
+        name: str,
+        parents: Optional[List[str]] = None,
+        data: bytes = b"",
+        mime_type: str = "application/octet-stream",
+        file_id: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        with self.lock:
+            if file_id in self.files:
+                raise FileExistsError(file_id)
+            file_id = file_id or self._new_id()
+            entry = {
+                "kind": "drive#file",
+                "id": file_id,
+                "name": name,
+                "mimeType": mime_type,
+                "parents": list(parents or []),
+                "trashed": False,
+                "size": str(len(data)),
+                "data": data,
+            }
+            self.files[file_id] = entry
+            self.changes.append(file_id)
+            return entry
+
+    def add_folder(
+        self, name: str, parent: Optional[str] = None, file_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        parents = [parent] if parent else []
+        return self.add_file(name, parents, b"", FOLDER_MIME_TYPE, file_id)
+
+    def seed_from_directory(self, directory: str, folder_id: str):
+        """Replica um diretório local (recursivamente) sob a pasta `folder_id`."""
+        for entry in sorted(os.scandir(directory), key=lambda e: e.name):
+            if entry.is_dir():
+                folder = self.add_folder(entry.name, folder_id)
+                self.seed_from_directory(entry.path, folder["id"])
+            elif entry.is_file():
+                with open(entry.path, "rb") as f:
+                    self.add_file(entry.name, [folder_id], f.read())
+
+    def remove_file(self, file_id: str) -> bool:
+        with self.lock:
+            if self.files.pop(file_id, None) is None:
+                return False
+            self.changes.append(file_id)
+            return True
+
+    def query(self, q: str) -> List[Dict[str, Any]]:
+        """Avalia o subconjunto da sintaxe de 'q' usado pelos scripts."""
+        conditions = []
+        for parent in re.findall(r"'([^']+)'\s+in\s+parents", q):
+            conditions.append(lambda f, p=parent: p in f["parents"])
+        if re.search(r"trashed\s*=\s*false", q):
+            conditions.append(lambda f: not f["trashed"])
+        for op, value in re.findall(r"mimeType\s*(!?=)\s*'([^']+)'", q):
+            if op == "=":
+                conditions.append(lambda f, v=value: f["mimeType"] == v)
+            else:
+                conditions.append(lambda f, v=value: f["mimeType"] != v)
+        for value in re.findall(r"name\s*=\s*'([^']+)'", q):
+            conditions.append(lambda f, v=value: f["name"] == v)
+
+        with self.lock:
+            files = list(self.files.values())
+        return [f for f in files if all(cond(f) for cond in conditions)]
+
+
+def project_fields(entry: Dict[str, Any], fields: Optional[List[str]]):
+    fields = fields or DEFAULT_FIELDS
+    return {k: entry[k] for k in fields if k in entry and k != "data"}
+
+
+def split_fields(fields_param: Optional[str]) -> Optional[List[str]]:
+    """Separa um parâmetro 'fields' simples. Ex: "id, name" -> ["id", "name"]"""
+    if not fields_param:
+        return None
+    return [f.strip() for f in fields_param.split(",") if f.strip()]
+
+
+def parse_fields(fields_param: Optional[str]):
+    """
+    Separa o parâmetro 'fields' em campos de topo e campos de 'files(...)'.
+    Ex: "nextPageToken, files(id, name)" -> (["nextPageToken"], ["id", "name"])
+    """
+    if not fields_param:
+        return None, None
+    file_fields = None
+    match = re.search(r"files\(([^)]*)\)", fields_param)
+    if match:
+        file_fields = [f.strip() for f in match.group(1).split(",") if f.strip()]
+        fields_param = fields_param.replace(match.group(0), "")
+    top_fields = [f.strip() for f in fields_param.split(",") if f.strip()]
+    return top_fields, file_fields
+
+
+class DriveStubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    # --- Utilitários ---
+
+    @property
+    def store(self) -> DriveStore:
+        return self.server.store  # type: ignore[attr-defined]
+
+    def log_message(self, format, *args):
+        if self.server.verbose:  # type: ignore[attr-defined]
+            super().log_message(format, *args)
+
+    def _simulate_latency(self):
+        latency = self.server.latency  # type: ignore[attr-defined]
+        if latency > 0:
+            time.sleep(latency)
+
+    def _write_throttled(self, data: bytes):
+        bandwidth = self.server.bandwidth  # type: ignore[attr-defined]
+        if bandwidth <= 0:
+            self.wfile.write(data)
+            return
+        for offset in range(0, len(data), THROTTLE_SLICE):
+            piece = data[offset : offset + THROTTLE_SLICE]
+            self.wfile.write(piece)
+            time.sleep(len(piece) / bandwidth)
+
+    def _read_body(self) -> bytes:
+        length = int(self.headers.get("Content-Length", 0))
+        data = self.rfile.read(length) if length else b""
+        bandwidth = self.server.bandwidth  # type: ignore[attr-defined]
+        if bandwidth > 0 and data:
+            time.sleep(len(data) / bandwidth)
+        return data
+
+    def _send(
+        self,
+        status: int,
+        body: bytes = b"",
+        content_type: str = "application/json",
+        headers: Optional[Dict[str, str]] = None,
+    ):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        if body:
+            self._write_throttled(body)
+
+    def _send_json(self, status: int, payload: Any, headers=None):
+        self._send(status, json.dumps(payload).encode("utf-8"), headers=headers)
+
+    def _send_error(self, status: int, message: str):
+        self._send_json(
+            status, {"error": {"code": status, "message": message, "errors": []}}
+        )
+
+    # --- Rotas ---
+
+    def do_GET(self):
+        self._simulate_latency()
+        url = urlparse(self.path)
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+
+        if url.path == "/drive/v3/files":
+            return self._files_list(params)
+
+        if url.path == "/drive/v3/changes/startPageToken":
+            with self.store.lock:
+                token = len(self.store.changes) + 1
+            return self._send_json(200, {"startPageToken": str(token)})
+
+        if url.path == "/drive/v3/changes":
+            return self._changes_list(params)
+
+        if url.path == "/drive/v3/files/generateIds":
+            return self._generate_ids(params)
+
+        match = re.fullmatch(r"/drive/v3/files/([^/]+)", url.path)
+        if match:
+            entry = self.store.files.get(match.group(1))
+            if entry is None:
+                return self._send_error(404, f"File not found: {match.group(1)}")
+            if params.get("alt") == "media":
+                return self._files_get_media(entry)
+            return self._send_json(
+                200, project_fields(entry, split_fields(params.get("fields")))
+            )
+
+        self._send_error(404, f"Rota não emulada: GET {url.path}")
+
+    def do_POST(self):
+        self._simulate_latency()
+        url = urlparse(self.path)
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+
+        if url.path == "/upload/drive/v3/files":
+            upload_type = params.get("uploadType", "media")
+            if upload_type == "resumable":
+                return self._start_resumable(params)
+            if upload_type == "multipart":
+                return self._create_multipart(params)
+            body = self._read_body()
+            return self._create({}, body, params)
+
+        if url.path == "/drive/v3/files":
+            metadata = json.loads(self._read_body() or b"{}")
+            return self._create(metadata, b"", params)
+
+        self._send_error(404, f"Rota não emulada: POST {url.path}")
+
+    def do_PUT(self):
+        self._simulate_latency()
+        url = urlparse(self.path)
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        if url.path == "/upload/drive/v3/files" and "upload_id" in params:
+            return self._resumable_chunk(params)
+        self._send_error(404, f"Rota não emulada: PUT {url.path}")
+
+    def do_DELETE(self):
+        self._simulate_latency()
+        url = urlparse(self.path)
+        match = re.fullmatch(r"/drive/v3/files/([^/]+)", url.path)
+        if not match:
+            return self._send_error(404, f"Rota não emulada: DELETE {url.path}")
+        if not self.store.remove_file(match.group(1)):
+            return self._send_error(404, f"File not found: {match.group(1)}")
+        self._send(204)
+
+    # --- Implementações ---
+
+    def _files_list(self, params: Dict[str, str]):
+        matches = self.store.query(params.get("q", ""))
+        page_size = min(int(params.get("pageSize", DEFAULT_PAGE_SIZE)), MAX_PAGE_SIZE)
+        offset = int(params.get("pageToken", 0) or 0)
+        _, file_fields = parse_fields(params.get("fields"))
+
+        page = matches[offset : offset + page_size]
+        payload: Dict[str, Any] = {
+            "kind": "drive#fileList",
+            "files": [project_fields(f, file_fields) for f in page],
+        }
+        if offset + page_size < len(matches):
+            payload["nextPageToken"] = str(offset + page_size)
+        self._send_json(200, payload)
+
+    def _changes_list(self, params: Dict[str, str]):
+        page_size = min(int(params.get("pageSize", DEFAULT_PAGE_SIZE)), MAX_PAGE_SIZE)
+        start = int(params["pageToken"]) - 1
+        with self.store.lock:
+            log = self.store.changes[start : start + page_size]
+            end = start + len(log)
+            total = len(self.store.changes)
+            changes = []
+            for file_id in log:
+                entry = self.store.files.get(file_id)
+                change: Dict[str, Any] = {"fileId": file_id, "removed": entry is None}
+                if entry is not None:
+                    change["file"] = {"parents": entry["parents"]}
+                changes.append(change)
+
+        payload: Dict[str, Any] = {"kind": "drive#changeList", "changes": changes}
+        if end < total:
+            payload["nextPageToken"] = str(end + 1)
+        else:
+            payload["newStartPageToken"] = str(total + 1)
+        self._send_json(200, payload)
+
+    def _files_get_media(self, entry: Dict[str, Any]):
+        data = entry["data"]
+        total = len(data)
+        range_header = self.headers.get("Range")
+        match = re.fullmatch(r"bytes=(\d+)-(\d*)", range_header or "")
+        if not match:
+            return self._send(200, data, "application/octet-stream")
+        if total == 0:
+            return self._send(416, headers={"Content-Range": "bytes */0"})
+        start = int(match.group(1))
+        end = int(match.group(2)) if match.group(2) else total - 1
+        end = min(end, total - 1)
+        if start > end:
+            return self._send(416, headers={"Content-Range": f"bytes */{total}"})
+        self._send(
+            206,
+            data[start : end + 1],
+            "application/octet-stream",
+            {"Content-Range": f"bytes {start}-{end}/{total}"},
+        )
+
+    def _generate_ids(self, params: Dict[str, str]):
+        count = min(int(params.get("count", 10)), MAX_PAGE_SIZE)
+        with self.store.lock:
+            ids = [self.store._new_id() for _ in range(count)]
+        self._send_json(
+            200, {"kind": "drive#generatedIds", "space": "drive", "ids": ids}
+        )
+
+    def _create(self, metadata: Dict[str, Any], data: bytes, params: Dict[str, str]):
+        try:
+            entry = self.store.add_file(
+                name=metadata.get("name", "Untitled"),
+                parents=metadata.get("parents"),
+                data=data,
+                mime_type=metadata.get("mimeType", "application/octet-stream"),
+                file_id=metadata.get("id"),
+            )
+        except FileExistsError as e:
+            return self._send_error(409, f"The provided file ID is already in use: {e}")
+        self._send_json(200, project_fields(entry, split_fields(params.get("fields"))))
+
+    def _create_multipart(self, params: Dict[str, str]):
+        content_type = self.headers.get("Content-Type", "")
+        match = re.search(r'boundary="?([^";]+)"?', content_type)
+        if not match:
+            return self._send_error(400, "Multipart sem boundary")
+        delimiter = b"--" + match.group(1).encode("ascii")
+        body = self._read_body()
+
+        parts = []
+        for raw in body.split(delimiter)[1:]:
+            if raw.startswith(b"--"):
+                break
+            raw = raw[2:] if raw.startswith(b"\r\n") else raw[1:]
+            separator = b"\r\n\r\n" if b"\r\n\r\n" in raw.split(b"\n\n")[0] else b"\n\n"
+            _, _, content = raw.partition(separator)
+            if content.endswith(b"\r\n"):
+                content = content[:-2]
+            elif content.endswith(b"\n"):
+                content = content[:-1]
+            parts.append(content)
+        if len(parts) != 2:
+            return self._send_error(400, "Multipart deve conter metadados e mídia")
+        self._create(json.loads(parts[0] or b"{}"), parts[1], params)
+
+    def _start_resumable(self, params: Dict[str, str]):
+        metadata = json.loads(self._read_body() or b"{}")
+        upload_id = uuid.uuid4().hex
+        with self.store.lock:
+            self.store.sessions[upload_id] = {
+                "metadata": metadata,
+                "data": bytearray(),
+                "fields": params.get("fields", ""),
+            }
+        address, port = self.server.server_address[:2]
+        host = self.headers.get("Host", f"{address}:{port}")
+        location = f"http://{host}/upload/drive/v3/files?uploadType=resumable&upload_id={upload_id}"
+        self._send(200, headers={"Location": location})
+
+    def _resumable_chunk(self, params: Dict[str, str]):
+        session = self.store.sessions.get(params["upload_id"])
+        body = self._read_body()
+        if session is None:
+            return self._send_error(404, "Sessão de upload não encontrada")
+
+        received = session["data"]
+        content_range = self.headers.get("Content-Range", "")
+        match = re.fullmatch(r"bytes (\d+)-(\d+)/(\d+|\*)", content_range)
+        status_query = re.fullmatch(r"bytes \*/(\d+|\*)", content_range)
+        if match:
+            start = int(match.group(1))
+            total = match.group(3)
+            # Chunks fora de ordem são ignorados; o cliente descobre o offset
+            # correto pela resposta 308.
+            if start == len(received):
+                received.extend(body)
+        elif status_query:
+            total = status_query.group(1)
+        else:
+            return self._send_error(400, f"Content-Range inválido: {content_range}")
+
+        if total != "*" and len(received) == int(total):
+            with self.store.lock:
+                self.store.sessions.pop(params["upload_id"], None)
+            return self._create(
+                session["metadata"], bytes(received), {"fields": session["fields"]}
+            )
+
+        headers = {}
+        if received:
+            headers["Range"] = f"bytes=0-{len(received) - 1}"
+        self._send(308, headers=headers)
+
+
+def start_server(
+    store: DriveStore,
+    host: str = "127.0.0.1",
+    port: int = 0,
+    latency_ms: float = 0.0,
+    bandwidth_mbps: float = 0.0,
+    verbose: bool = False,
+):
+    """
+    Inicia o servidor em uma thread de fundo.
+
+    Args:
+        store (DriveStore): Conteúdo do Drive emulado.
+        host (str): Endereço de escuta.
+        port (int): Porta de escuta (0 escolhe uma porta livre).
+        latency_ms (float): Latência adicionada a cada requisição.
+        bandwidth_mbps (float): Banda máxima por conexão em megabits/s (0 = ilimitada).
+        verbose (bool): Se True, registra cada requisição.
+
+    Returns:
+        tuple: (servidor, URL base para o parâmetro 'drive_api_url').
+    """
+    server = ThreadingHTTPServer((host, port), DriveStubHandler)
+    server.daemon_threads = True
+    server.store = store  # type: ignore[attr-defined]
+    server.latency = latency_ms / 1000.0  # type: ignore[attr-defined]
+    server.bandwidth = bandwidth_mbps * 1_000_000 / 8  # type: ignore[attr-defined]
+    server.verbose = verbose  # type: ignore[attr-defined]
+
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    address, bound_port = server.server_address[:2]
+    return server, f"http://{address}:{bound_port}/"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Emula localmente o subconjunto da API Drive v3 usado pelos scripts.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument("--host", default="0.0.0.0", help="Endereço de escuta.")
+    parser.add_argument("--port", type=int, default=8089, help="Porta de escuta.")
+    parser.add_argument(
+        "--seed_dir",
+        default=None,
+        help="Diretório local cujos arquivos serão publicados na pasta de entrada.",
+    )
+    parser.add_argument(
+        "--folder_id", default="stub-input", help="ID da pasta de entrada emulada."
+    )
+    parser.add_argument(
+        "--output_folder_id",
+        default="stub-output",
+        help="ID da pasta de saída emulada.",
+    )
+    parser.add_argument(
+        "--latency_ms", type=float, default=0.0, help="Latência por requisição (ms)."
+    )
+    parser.add_argument(
+        "--bandwidth_mbps",
+        type=float,
+        default=0.0,
+        help="Banda por conexão em megabits/s (0 = ilimitada).",
+    )
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    store = DriveStore()
+    store.add_folder("input", file_id=args.folder_id)
+    store.add_folder("output", file_id=args.output_folder_id)
+    if args.seed_dir:
+        store.seed_from_directory(args.seed_dir, args.folder_id)
+
+    server, url = start_server(
+        store,
+        host=args.host,
+        port=args.port,
+        latency_ms=args.latency_ms,
+        bandwidth_mbps=args.bandwidth_mbps,
+        verbose=args.verbose,
+    )
+    if args.host == "0.0.0.0":
+        # Os workers precisam de um endereço alcançável, não do endereço de escuta
+        url = f"http://{socket.gethostname()}:{args.port}/"
+    print(f"Servidor Drive emulado em {url}")
+    print(f"Pasta de entrada: {args.folder_id} ({len(store.files) - 2} itens)")
+    print(f"Pasta de saída: {args.output_folder_id}")
+    print(f"Use: --drive_api_url {url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
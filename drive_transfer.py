@@ -0,0 +1,350 @@
+"""
+Camada de transferência compartilhada entre google_drive.py e o worker do
+gzip_google_drive.py.
+
+O worker importa este módulo dentro da função, então o diretório do repositório
+precisa estar no PYTHONPATH do endpoint (ver setup.sh).
+"""
+
+import io
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from urllib.parse import urlparse
+
+from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
+from googleapiclient.http import MediaIoBaseDownload, MediaIoBaseUpload, build_http
+
+ONE_MEGABYTE = 1024 * 1024
+
+# A API exige que os chunks de upload resumable sejam múltiplos de 256 KB
+CHUNK_GRANULARITY = 256 * 1024
+
+DEFAULT_CHUNK_SIZE = 8 * ONE_MEGABYTE
+
+# Abaixo deste tamanho o upload é feito em uma única requisição (multipart)
+SIMPLE_UPLOAD_THRESHOLD = 5 * ONE_MEGABYTE
+
+MAX_RETRIES = 5
+
+RETRYABLE_STATUS = (408, 429, 500, 502, 503, 504)
+
+# Máximo de IDs por chamada de files.generateIds
+GENERATE_IDS_MAX = 1000
+
+
+def build_drive_service(credentials=None, api_url: Optional[str] = None):
+    """
+    Constrói o serviço da API do Drive.
+
+    Se `api_url` for informada (ex: servidor do drive_stub_server.py), as
+    requisições vão para ela e as credenciais são dispensadas.
+    """
+    if api_url:
+        return build(
+            "drive",
+            "v3",
+            http=_PlainHttp(api_url),
+            client_options={"api_endpoint": api_url.rstrip("/") + "/drive/v3/"},
+            static_discovery=True,
+        )
+    return build("drive", "v3", credentials=credentials)
+
+
+class _PlainHttp:
+    """
+    Cliente http para o servidor emulado: a biblioteca monta a URL de upload
+    sempre com https://, então o esquema é corrigido antes de cada requisição.
+    """
+
+    def __init__(self, api_url: str):
+        parsed = urlparse(api_url)
+        self._http = build_http()
+        self._https_prefix = f"https://{parsed.netloc}"
+        self._prefix = f"{parsed.scheme}://{parsed.netloc}"
+
+    def request(self, uri, *args, **kwargs):
+        if uri.startswith(self._https_prefix):
+            uri = self._prefix + uri[len(self._https_prefix) :]
+        return self._http.request(uri, *args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._http, name)
+
+
+class _CountingHttp:
+    """Envolve o objeto http de uma requisição e conta as chamadas feitas."""
+
+    def __init__(self, http):
+        self._http = http
+        self.requests = 0
+
+    def request(self, *args, **kwargs):
+        self.requests += 1
+        return self._http.request(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._http, name)
+
+
+def normalize_chunk_size(chunk_size: Optional[int]) -> int:
+    """Arredonda o tamanho do chunk para um múltiplo de 256 KB (mínimo 256 KB)."""
+    if not chunk_size:
+        return DEFAULT_CHUNK_SIZE
+    chunks = max(1, int(chunk_size) // CHUNK_GRANULARITY)
+    return chunks * CHUNK_GRANULARITY
+
+
+def _is_retryable(error: Exception) -> bool:
+    if isinstance(error, HttpError):
+        return error.resp.status in RETRYABLE_STATUS
+    # Erros de conexão/timeout (socket, ssl, httplib2) herdam de OSError
+    return isinstance(error, OSError)
+
+
+def is_file_id_in_use(error: Exception) -> bool:
+    """Indica se a criação falhou porque o ID pedido já pertence a um arquivo."""
+    if not isinstance(error, HttpError):
+        return False
+    return error.resp.status == 409 or b"fileIdInUse" in (error.content or b"")
+
+
+def generate_file_ids(service, count: int) -> List[str]:
+    """
+    Reserva `count` IDs de arquivo (files.generateIds). Criar um arquivo com
+    um ID que já existe falha, então enviar o ID junto com o upload o torna
+    idempotente: uma segunda tentativa com o mesmo ID não duplica o arquivo.
+    """
+    ids: List[str] = []
+    while len(ids) < count:
+        response = (
+            service.files()
+            .generateIds(
+                count=min(GENERATE_IDS_MAX, count - len(ids)),
+                space="drive",
+                fields="ids",
+            )
+            .execute()
+        )
+        ids.extend(response["ids"])
+    return ids
+
+
+def _backoff(attempt: int):
+    time.sleep(min(2**attempt, 32) * 0.5)
+
+
+def download_to_stream(
+    service,
+    file_id: str,
+    fh: io.IOBase,
+    chunk_size: Optional[int] = None,
+    max_retries: int = MAX_RETRIES,
+) -> Dict[str, Any]:
+    """
+    Baixa um arquivo do Drive escrevendo diretamente em `fh`.
+
+    Em caso de falha transitória o download continua a partir do último byte
+    recebido, em vez de recomeçar do início.
+
+    Args:
+        service: Objeto de serviço da API do Drive.
+        file_id (str): ID do arquivo no Drive.
+        fh: Stream binário de destino (arquivo aberto ou io.BytesIO).
+        chunk_size (int): Tamanho de cada requisição de download, em bytes.
+        max_retries (int): Número máximo de novas tentativas consecutivas.
+
+    Returns:
+        dict: Estatísticas da transferência ('bytes', 'requests', 'retries',
+              'time', 'chunk_size').
+    """
+    chunk_size = normalize_chunk_size(chunk_size)
+    request = service.files().get_media(fileId=file_id)
+    counting_http = _CountingHttp(request.http)
+    request.http = counting_http
+
+    downloader = MediaIoBaseDownload(fh, request, chunksize=chunk_size)
+
+    start_time = time.perf_counter()
+    retries = 0
+    attempt = 0
+    # Bytes já gravados em `fh`, segundo o status de cada next_chunk()
+    received = 0
+    done = False
+    while not done:
+        try:
+            status, done = downloader.next_chunk()
+            received = status.resumable_progress
+            attempt = 0
+        except Exception as e:
+            if not _is_retryable(e) or attempt >= max_retries:
+                raise
+            retries += 1
+            attempt += 1
+            print(
+                f"Falha transitória no download de {file_id} ({e}), retomando do byte {received}..."
+            )
+            _backoff(attempt)
+
+    return {
+        "bytes": received,
+        "requests": counting_http.requests,
+        "retries": retries,
+        "time": time.perf_counter() - start_time,
+        "chunk_size": chunk_size,
+    }
+
+
+def download_range_to_stream(
+    service,
+    file_id: str,
+    fh: io.IOBase,
+    start: int,
+    end: int,
+    chunk_size: Optional[int] = None,
+    max_retries: int = MAX_RETRIES,
+) -> Dict[str, Any]:
+    """
+    Baixa só os bytes de `start` a `end` (inclusive) de um arquivo do Drive,
+    em requisições get_media com cabeçalho Range de até `chunk_size` bytes.
+    Uma falha transitória repete só a requisição que falhou.
+
+    Returns:
+        dict: Estatísticas da transferência, como em `download_to_stream`.
+    """
+    chunk_size = normalize_chunk_size(chunk_size)
+    start_time = time.perf_counter()
+    requests = 0
+    retries = 0
+    attempt = 0
+    position = start
+    while position <= end:
+        last = min(end, position + chunk_size - 1)
+        request = service.files().get_media(fileId=file_id)
+        request.headers["range"] = f"bytes={position}-{last}"
+        requests += 1
+        try:
+            content = request.execute()
+            attempt = 0
+        except Exception as e:
+            if not _is_retryable(e) or attempt >= max_retries:
+                raise
+            retries += 1
+            attempt += 1
+            print(
+                f"Falha transitória no download de {file_id} ({e}), retomando do byte {position}..."
+            )
+            _backoff(attempt)
+            continue
+        if not content:
+            raise IOError(
+                f"O Drive não devolveu os bytes {position}-{last} de {file_id}."
+            )
+        fh.write(content)
+        position += len(content)
+
+    return {
+        "bytes": position - start,
+        "requests": requests,
+        "retries": retries,
+        "time": time.perf_counter() - start_time,
+        "chunk_size": chunk_size,
+    }
+
+
+def upload_stream(
+    service,
+    fh: io.IOBase,
+    file_metadata: Dict[str, Any],
+    mime_type: str,
+    chunk_size: Optional[int] = None,
+    simple_upload_threshold: int = SIMPLE_UPLOAD_THRESHOLD,
+    max_retries: int = MAX_RETRIES,
+    fields: str = "id, name",
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Faz upload do conteúdo de `fh` para o Drive.
+
+    Arquivos até `simple_upload_threshold` bytes vão em uma única requisição;
+    os maiores usam uma sessão resumable, que em caso de falha é retomada a
+    partir do último offset confirmado pelo servidor.
+
+    Args:
+        service: Objeto de serviço da API do Drive.
+        fh: Stream binário com o conteúdo (posicionado no início).
+        file_metadata (dict): Metadados do arquivo ('name', 'parents', ...).
+        mime_type (str): Tipo MIME do conteúdo.
+        chunk_size (int): Tamanho de cada requisição da sessão resumable.
+        simple_upload_threshold (int): Tamanho máximo para upload simples.
+        max_retries (int): Número máximo de novas tentativas consecutivas.
+        fields (str): Campos retornados pela API.
+
+    Returns:
+        tuple: (arquivo criado, estatísticas da transferência).
+    """
+    chunk_size = normalize_chunk_size(chunk_size)
+    fh.seek(0, io.SEEK_END)
+    size = fh.tell()
+    fh.seek(0)
+
+    resumable = size > simple_upload_threshold
+    media = MediaIoBaseUpload(
+        fh, mimetype=mime_type, chunksize=chunk_size, resumable=resumable
+    )
+    request = service.files().create(
+        body=file_metadata, media_body=media, fields=fields
+    )
+    counting_http = _CountingHttp(request.http)
+    request.http = counting_http
+
+    start_time = time.perf_counter()
+    retries = 0
+    attempt = 0
+    response = None
+    while response is None:
+        try:
+            if resumable:
+                # Após uma falha, next_chunk consulta o servidor e continua do
+                # último byte confirmado na mesma sessão.
+                _, response = request.next_chunk()
+            else:
+                response = request.execute()
+            attempt = 0
+        except Exception as e:
+            if not _is_retryable(e) or attempt >= max_retries:
+                raise
+            retries += 1
+            attempt += 1
+            print(
+                f"Falha transitória no upload de {file_metadata.get('name')} ({e}), retomando..."
+            )
+            _backoff(attempt)
+
+    stats = {
+        "bytes": size,
+        "requests": counting_http.requests,
+        "retries": retries,
+        "time": time.perf_counter() - start_time,
+        "chunk_size": chunk_size,
+        "resumable": resumable,
+    }
+    return response, stats
+
+
+def delete_files(service, file_ids: List[str]) -> int:
+    """
+    Apaga arquivos do Drive; os que já não existem são ignorados.
+
+    Returns:
+        int: Número de arquivos apagados.
+    """
+    deleted = 0
+    for file_id in file_ids:
+        try:
+            service.files().delete(fileId=file_id).execute()
+            deleted += 1
+        except HttpError as error:
+            if error.resp.status != 404:
+                raise
+    return deleted
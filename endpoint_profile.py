@@ -0,0 +1,224 @@
+"""
+Calibração da vazão de cada endpoint do Globus Compute.
+
+Executa um kernel curto de CPU em todos os endpoints disponíveis e salva a
+vazão relativa em um arquivo de perfil local. O perfil é usado pela
+WeightedDistributionStrategy (distribution.py) para dimensionar os chunks de
+cada endpoint.
+
+Uso:
+    python endpoint_profile.py calibrate
+    python endpoint_profile.py show
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from globus_compute_sdk import Executor
+
+from endpoints import label_endpoint
+from mwfaas.globus_compute_manager import GlobusComputeCloudManager
+
+DEFAULT_PROFILE_PATH = ".endpoint_profile.json"
+
+DEFAULT_PROBE_SIZE = 200
+
+DEFAULT_REPETITIONS = 3
+
+
+def probe_kernel(size: int) -> Dict[str, Any]:
+    """
+    Kernel de calibração executado no worker: iterações de Mandelbrot em uma
+    grade size x size, em Python puro como os workers dos workloads.
+    """
+    import time
+
+    start_time = time.perf_counter()
+    operations = 0
+    for y in range(size):
+        c_imag = -1.0 + 2.0 * y / size
+        for x in range(size):
+            c = complex(-2.0 + 3.0 * x / size, c_imag)
+            z = 0j
+            iteration = 0
+            while abs(z) <= 2 and iteration < 100:
+                z = z * z + c
+                iteration += 1
+            operations += iteration
+    elapsed = time.perf_counter() - start_time
+    return {"operations": operations, "time": elapsed}
+
+
+def calibrate(
+    endpoint_ids: List[str],
+    probe_size: int = DEFAULT_PROBE_SIZE,
+    repetitions: int = DEFAULT_REPETITIONS,
+) -> Dict[str, Any]:
+    """
+    Executa o kernel `repetitions` vezes em cada endpoint, em paralelo, e
+    calcula a vazão em operações por segundo. Antes, cada endpoint roda um
+    aquecimento que é aguardado e descartado, para que o cold start do worker
+    não caia nas medições.
+
+    Returns:
+        dict: Perfil com a vazão absoluta e relativa (ao mais rápido) de cada
+              endpoint.
+    """
+    executors = {e: Executor(endpoint_id=e) for e in endpoint_ids}
+    try:
+        warmups = {
+            e: executor.submit(probe_kernel, probe_size)
+            for e, executor in executors.items()
+        }
+        for endpoint_id, future in warmups.items():
+            try:
+                future.result()
+            except Exception as e:
+                print(
+                    f"[Calibração] Falha no aquecimento de {label_endpoint(endpoint_id)}: "
+                    f"{type(e).__name__}: {e}"
+                )
+
+        futures = {
+            e: [executor.submit(probe_kernel, probe_size) for _ in range(repetitions)]
+            for e, executor in executors.items()
+        }
+
+        endpoints: Dict[str, Dict[str, Any]] = {}
+        for endpoint_id, endpoint_futures in futures.items():
+            samples = []
+            for future in endpoint_futures:
+                try:
+                    result = future.result()
+                    samples.append(result["operations"] / result["time"])
+                except Exception as e:
+                    print(
+                        f"[Calibração] Falha em {label_endpoint(endpoint_id)}: {type(e).__name__}: {e}"
+                    )
+            if not samples:
+                continue
+            endpoints[endpoint_id] = {
+                "label": label_endpoint(endpoint_id),
+                "throughput": statistics.median(samples),
+                "samples": samples,
+            }
+    finally:
+        for executor in executors.values():
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    fastest = max((e["throughput"] for e in endpoints.values()), default=0)
+    for entry in endpoints.values():
+        entry["relative"] = entry["throughput"] / fastest if fastest else 0
+
+    return {
+        "measured_at": datetime.now(timezone.utc).isoformat(),
+        "probe_size": probe_size,
+        "repetitions": repetitions,
+        "endpoints": endpoints,
+    }
+
+
+def save_profile(profile: Dict[str, Any], path: str = DEFAULT_PROFILE_PATH):
+    with open(path, "w") as f:
+        json.dump(profile, f, indent=2)
+
+
+def load_profile(path: str = DEFAULT_PROFILE_PATH) -> Optional[Dict[str, Any]]:
+    if not os.path.exists(path):
+        return None
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def load_weights(path: str = DEFAULT_PROFILE_PATH) -> Dict[str, float]:
+    """
+    Vazão relativa de cada endpoint calibrado, para a distribuição ponderada.
+    Retorna um dict vazio (distribuição uniforme) se o perfil não existir.
+    """
+    profile = load_profile(path)
+    if profile is None:
+        print(
+            f"Aviso: perfil de endpoints '{path}' não encontrado; usando distribuição uniforme."
+        )
+        print("Execute 'python endpoint_profile.py calibrate' para criá-lo.")
+        return {}
+    return {
+        endpoint_id: entry["relative"]
+        for endpoint_id, entry in profile.get("endpoints", {}).items()
+    }
+
+
+def print_profile(profile: Dict[str, Any]):
+    print(
+        f"Perfil medido em {profile['measured_at']} (grade {profile['probe_size']}, {profile['repetitions']} repetições)"
+    )
+    print(f"{'endpoint':<40} {'ops/s':>14} {'relativa':>9}")
+    ordered = sorted(
+        profile["endpoints"].items(), key=lambda item: -item[1]["throughput"]
+    )
+    for endpoint_id, entry in ordered:
+        print(
+            f"{entry.get('label', endpoint_id):<40} {entry['throughput']:>14,.0f} {entry['relative']:>9.2f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Mede a vazão relativa dos endpoints do Globus Compute.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    calibrate_parser = subparsers.add_parser(
+        "calibrate", help="Executa o kernel de calibração em todos os endpoints."
+    )
+    calibrate_parser.add_argument(
+        "--output", type=str, default=DEFAULT_PROFILE_PATH, help="Arquivo de perfil."
+    )
+    calibrate_parser.add_argument(
+        "--probe_size",
+        type=int,
+        default=DEFAULT_PROBE_SIZE,
+        help="Lado da grade do kernel de calibração.",
+    )
+    calibrate_parser.add_argument(
+        "--repetitions",
+        type=int,
+        default=DEFAULT_REPETITIONS,
+        help="Execuções medidas por endpoint.",
+    )
+
+    show_parser = subparsers.add_parser("show", help="Mostra o perfil salvo.")
+    show_parser.add_argument(
+        "--profile", type=str, default=DEFAULT_PROFILE_PATH, help="Arquivo de perfil."
+    )
+
+    args = parser.parse_args()
+
+    if args.command == "show":
+        profile = load_profile(args.profile)
+        if profile is None:
+            print(f"Erro: perfil '{args.profile}' não encontrado.")
+            sys.exit(1)
+        print_profile(profile)
+        sys.exit(0)
+
+    with GlobusComputeCloudManager(auto_authenticate=True) as cloud_manager:
+        endpoint_ids = list(cloud_manager.available_endpoint_ids)
+    if not endpoint_ids:
+        print("Erro: nenhum endpoint disponível.")
+        sys.exit(1)
+
+    print(f"Calibrando {len(endpoint_ids)} endpoints...")
+    start_time = time.perf_counter()
+    profile = calibrate(endpoint_ids, args.probe_size, args.repetitions)
+    print(f"Calibração concluída em {time.perf_counter() - start_time:.2f} segundos")
+    save_profile(profile, args.output)
+    print_profile(profile)
+    print(f"Perfil salvo em '{args.output}'")
@@ -0,0 +1,19 @@
+"""
+Endpoints do Globus Compute usados nos laboratórios.
+"""
+
+# Nomes dos endpoints (antes fixos nos analise*.sh)
+ENDPOINT_LABELS = {
+    "c5d1ef1f-76c0-40e0-a9b0-e1cfbd95ecd8": "lab_1",
+    "d93b465f-d252-4574-8946-9ea53e5cdd6e": "lab_2",
+    "814c4221-8c4a-45d4-b70f-379fd28d5ef9": "lab_3",
+    "9b55bf7c-c552-451e-b424-174e59d8ad50": "lab_4",
+    "e0888edc-7356-4a27-91bc-936113288f10": "lab_5",
+    "af3264fb-0cf3-49b2-b104-68863dec7cb8": "desktop",
+    "9f08856d-404c-4775-a23a-6c7afa5c768e": "laptop_1",
+    "d2652e35-4b34-4496-9e0e-d51b65b7d194": "laptop_2",
+}
+
+
+def label_endpoint(endpoint_id: str) -> str:
+    return ENDPOINT_LABELS.get(str(endpoint_id), str(endpoint_id))
@@ -4,43 +4,29 @@ set -e  #  para o script se uma execução falhar
 
 which python3
 
-SCRIPT_NAME="mandelbrot.py"
 NUM_EXECUTIONS=5
 
 WIDTH=3000
 HEIGHT=2000
 MAX_ITER=4000
 
-LINES_PER_WORKER=100
-OUTPUT_DIR="outputs/mandelbrot/heterogeneous/${HEIGHT}_${LINES_PER_WORKER}"
+OUTPUT_DIR="outputs/mandelbrot/heterogeneous/${WIDTH}x${HEIGHT}_${MAX_ITER}"
 mkdir -p "$OUTPUT_DIR"
 
-echo "Iniciando $NUM_EXECUTIONS execuções..."
-echo "Salvando logs em $OUTPUT_DIR/"
-
-for (( i=1; i<=$NUM_EXECUTIONS; i++ ))
-do
-    LOG_FILE="${OUTPUT_DIR}/${i}_${WIDTH}x${HEIGHT}_${MAX_ITER}.txt"
-    OUTPUT_FILE="${OUTPUT_DIR}/${i}_${WIDTH}x${HEIGHT}_${MAX_ITER}.png"
-    echo "--- Execução $i de $NUM_EXECUTIONS ---"
-    python3 "$SCRIPT_NAME" "$OUTPUT_FILE"  --width $WIDTH --height $HEIGHT --iter $MAX_ITER --lines $LINES_PER_WORKER &> "$LOG_FILE" 2>&1
-    echo "Log da Execução $i salvo em $LOG_FILE"
-done
-
-LINES_PER_WORKER=400
-OUTPUT_DIR="outputs/mandelbrot/heterogeneous/${HEIGHT}_${LINES_PER_WORKER}"
-mkdir -p "$OUTPUT_DIR"
-
-echo "Iniciando $NUM_EXECUTIONS execuções..."
-echo "Salvando logs em $OUTPUT_DIR/"
-
-for (( i=1; i<=$NUM_EXECUTIONS; i++ ))
-do
-    LOG_FILE="${OUTPUT_DIR}/${i}_${WIDTH}x${HEIGHT}_${MAX_ITER}.txt"
-    OUTPUT_FILE="${OUTPUT_DIR}/${i}_${WIDTH}x${HEIGHT}_${MAX_ITER}.png"
-    echo "--- Execução $i de $NUM_EXECUTIONS ---"
-    python3 "$SCRIPT_NAME" "$OUTPUT_FILE"  --width $WIDTH --height $HEIGHT --iter $MAX_ITER --lines $LINES_PER_WORKER &> "$LOG_FILE" 2>&1
-    echo "Log da Execução $i salvo em $LOG_FILE"
-done
+echo "Iniciando $NUM_EXECUTIONS execuções por configuração..."
+echo "Salvando registros e imagens em $OUTPUT_DIR/"
+
+python3 benchmark.py run \
+    --workload mandelbrot \
+    --param image_width=$WIDTH \
+    --param image_height=$HEIGHT \
+    --param max_iterations=$MAX_ITER \
+    --param lines_per_worker=100,400 \
+    --repetitions $NUM_EXECUTIONS \
+    --output "$OUTPUT_DIR/results.jsonl" \
+    --csv "$OUTPUT_DIR/results.csv" \
+    --log_dir "$OUTPUT_DIR/logs"
+
+python3 benchmark.py summarize "$OUTPUT_DIR/results.jsonl"
 
 echo "--- Todas as execuções foram concluídas. ---"
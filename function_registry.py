@@ -0,0 +1,108 @@
+"""
+Cache local dos IDs de função registrados no Globus Compute.
+
+O Executor do SDK registra a função na primeira submissão e guarda o ID só
+enquanto existir, então cada execução (e cada endpoint, já que o Dispatcher usa
+um Executor por endpoint) serializa e envia a função de novo. O
+FunctionRegistry serializa a função uma vez por execução, usa o hash do
+resultado como identidade do código e reaproveita o ID registrado em execuções
+anteriores enquanto o código não mudar.
+"""
+
+import hashlib
+import json
+import os
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Optional
+
+import cloudpickle
+
+DEFAULT_REGISTRY_PATH = ".function_registry.json"
+
+
+class FunctionRegistry:
+    """
+    Args:
+        path (str): Arquivo JSON com os IDs já registrados, indexados por
+                    nome da função e hash do código serializado.
+    """
+
+    def __init__(self, path: str = DEFAULT_REGISTRY_PATH):
+        self.path = path
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(path):
+            with open(path, "r") as f:
+                self.entries = json.load(f)
+        self.stats: Dict[str, Dict[str, Any]] = {}
+
+    def _save(self):
+        with open(self.path, "w") as f:
+            json.dump(self.entries, f, indent=2)
+
+    def register(
+        self,
+        user_function: Callable,
+        executors: Dict[str, Any],
+        name: Optional[str] = None,
+    ) -> str:
+        """
+        Associa a função ao mesmo ID em todos os Executors, registrando-a no
+        serviço só se esta versão do código ainda não tiver um ID.
+
+        Args:
+            user_function: Função exatamente como será passada ao submit().
+            executors (dict): Executor de cada endpoint.
+            name (str): Nome usado no cache e no relatório (padrão: o nome da
+                        função; útil quando ela é um wrapper).
+
+        Returns:
+            str: ID da função no Globus Compute.
+        """
+        name = name or getattr(user_function, "__name__", repr(user_function))
+
+        start_time = time.perf_counter()
+        payload = cloudpickle.dumps(user_function)
+        serialize_time = time.perf_counter() - start_time
+        key = f"{name}:{hashlib.sha256(payload).hexdigest()}"
+
+        register_time = 0.0
+        entry = self.entries.get(key)
+        reused = entry is not None
+        if entry is None:
+            client = next(iter(executors.values())).client
+            start_time = time.perf_counter()
+            function_id = client.register_function(user_function)
+            register_time = time.perf_counter() - start_time
+            entry = {
+                "function_id": function_id,
+                "registered_at": datetime.now(timezone.utc).isoformat(),
+            }
+            self.entries[key] = entry
+            self._save()
+
+        # Com function_id o Executor só guarda o ID, sem chamar o serviço
+        for executor in executors.values():
+            executor.register_function(user_function, function_id=entry["function_id"])
+
+        self.stats[name] = {
+            "function_id": entry["function_id"],
+            "bytes": len(payload),
+            "serialize_time": serialize_time,
+            "register_time": register_time,
+            "reused": reused,
+        }
+        return entry["function_id"]
+
+    def report(self):
+        for name, stats in self.stats.items():
+            origin = (
+                "reaproveitado de execução anterior"
+                if stats["reused"]
+                else f"registrado em {stats['register_time']:.4f}s"
+            )
+            print(
+                f"[Dispatcher] Função {name} ({stats['bytes'] / 1024:.1f} KB): "
+                f"serializada uma vez em {stats['serialize_time']:.4f}s; "
+                f"ID {stats['function_id']} {origin}"
+            )
@@ -1,21 +1,25 @@
 import os
 import sys
 import argparse
-import io
 import mimetypes
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
-from googleapiclient.http import MediaIoBaseDownload, MediaFileUpload
+
+from drive_listing import DEFAULT_CACHE_DIR, list_folder_or_empty
+from drive_transfer import build_drive_service, download_to_stream, upload_stream
 
 # Escopo de permissão total
 SCOPES = ["https://www.googleapis.com/auth/drive"]
 
 
-def get_drive_service():
+def get_drive_service(drive_api_url=None):
     """Autentica e retorna o objeto de serviço da API do Drive."""
+    if drive_api_url:
+        # API emulada (drive_stub_server.py), sem autenticação
+        return build_drive_service(api_url=drive_api_url)
+
     creds = None
     if os.path.exists("token.json"):
         creds = Credentials.from_authorized_user_file("token.json", SCOPES)
@@ -30,7 +34,7 @@ def get_drive_service():
             token.write(creds.to_json())
 
     try:
-        service = build("drive", "v3", credentials=creds)
+        service = build_drive_service(creds)
         return service
     except HttpError as error:
         print(f"Um erro ocorreu ao construir o serviço: {error}")
@@ -38,21 +42,16 @@ def get_drive_service():
 
 
 # --- Função para Baixar (da resposta anterior) ---
-def download_file(service, file_id, local_destination):
-    """Baixa um arquivo do Google Drive."""
+def download_file(service, file_id, local_destination, chunk_size=None):
+    """Baixa um arquivo do Google Drive direto para o disco."""
     try:
-        request = service.files().get_media(fileId=file_id)
-        fh = io.BytesIO()
-        downloader = MediaIoBaseDownload(fh, request)
-        done = False
         print(f"Iniciando download do arquivo ID: {file_id}...")
-        while done is False:
-            status, done = downloader.next_chunk()
-            print(f"Download {int(status.progress() * 100)}%.")
-        fh.seek(0)
         with open(local_destination, "wb") as f:
-            f.write(fh.read())
-        print(f"Arquivo baixado e salvo em: {local_destination}")
+            stats = download_to_stream(service, file_id, f, chunk_size=chunk_size)
+        print(
+            f"Arquivo baixado e salvo em: {local_destination} "
+            f"({stats['bytes']} bytes, {stats['requests']} requisições, {stats['retries']} retomadas)"
+        )
         return True
     except HttpError as error:
         print(f"Um erro ocorreu no download: {error}")
@@ -60,7 +59,7 @@ def download_file(service, file_id, local_destination):
 
 
 # --- Função de Upload (da resposta anterior, usada pela nova função) ---
-def upload_file(service, local_filepath, mime_type, folder_id=None):
+def upload_file(service, local_filepath, mime_type, folder_id=None, chunk_size=None):
     """Faz upload de UM arquivo para o Google Drive."""
     try:
         file_metadata = {"name": os.path.basename(local_filepath)}
@@ -73,17 +72,17 @@ def upload_file(service, local_filepath, mime_type, folder_id=None):
             if not mime_type:
                 mime_type = "application/octet-stream"  # Tipo genérico
 
-        media = MediaFileUpload(local_filepath, mimetype=mime_type, resumable=True)
-
         print(f"Iniciando upload de: {local_filepath}...")
 
-        file = (
-            service.files()
-            .create(body=file_metadata, media_body=media, fields="id, name")
-            .execute()
-        )
+        with open(local_filepath, "rb") as fh:
+            file, stats = upload_stream(
+                service, fh, file_metadata, mime_type, chunk_size=chunk_size
+            )
 
-        print(f"Upload concluído! Nome: {file.get('name')}, ID: {file.get('id')}")
+        print(
+            f"Upload concluído! Nome: {file.get('name')}, ID: {file.get('id')} "
+            f"({'resumable' if stats['resumable'] else 'simples'}, {stats['requests']} requisições)"
+        )
         return file.get("id")
 
     except HttpError as error:
@@ -97,54 +96,39 @@ def upload_file(service, local_filepath, mime_type, folder_id=None):
 # --- NOVA FUNÇÃO 1: Listar Arquivos em um Diretório ---
 
 
-def list_files_in_folder(service, folder_id):
+def list_files_in_folder(
+    service,
+    folder_id,
+    recursive=False,
+    cache_dir=None,
+    service_factory=None,
+):
     """
     Lista todos os arquivos e subpastas dentro de uma pasta específica do Drive.
 
     Args:
         service: Objeto de serviço da API do Drive.
         folder_id (str): O ID da pasta do Drive a ser pesquisada.
+        recursive (bool): Se True, lista também o conteúdo das subpastas (em paralelo).
+        cache_dir (str): Diretório do cache da listagem (None desativa o cache).
+        service_factory (callable): Cria um serviço por thread na listagem recursiva.
 
     Returns:
         list: Uma lista de dicionários, onde cada dicionário contém 'id' e 'name' do arquivo.
     """
-    all_files = []
-    page_token = None
-    try:
-        print(f"Listando arquivos da pasta ID: {folder_id}...")
-        while True:
-            # A query 'q' filtra pela pasta pai
-            # fields='nextPageToken, files(id, name)' pede apenas os campos que queremos
-            response = (
-                service.files()
-                .list(
-                    q=f"'{folder_id}' in parents and trashed=false",
-                    spaces="drive",
-                    fields="nextPageToken, files(id, name)",
-                    pageToken=page_token,
-                )
-                .execute()
-            )
-
-            files = response.get("files", [])
-            all_files.extend(files)
-
-            page_token = response.get("nextPageToken", None)
-            if page_token is None:
-                break  # Sai do loop quando não há mais páginas
-
-        print(f"Encontrados {len(all_files)} arquivos.")
-        return all_files
-
-    except HttpError as error:
-        print(f"Um erro ocorreu ao listar os arquivos: {error}")
-        return []
+    return list_folder_or_empty(
+        service,
+        folder_id,
+        recursive=recursive,
+        cache_dir=cache_dir,
+        service_factory=service_factory,
+    )
 
 
 # --- NOVA FUNÇÃO 2: Hospedar Vários Arquivos e Obter IDs ---
 
 
-def upload_multiple_files(service, local_folder_path, drive_folder_id):
+def upload_multiple_files(service, local_folder_path, drive_folder_id, chunk_size=None):
     """
     Faz upload de todos os arquivos de um diretório local para uma pasta do Drive.
 
@@ -152,6 +136,7 @@ def upload_multiple_files(service, local_folder_path, drive_folder_id):
         service: Objeto de serviço da API do Drive.
         local_folder_path (str): O caminho para a pasta local (ex: './meus_arquivos').
         drive_folder_id (str): O ID da pasta de destino no Drive.
+        chunk_size (int): Tamanho de cada requisição de upload, em bytes.
 
     Returns:
         dict: Um dicionário mapeando o nome do arquivo local ao seu novo ID no Drive.
@@ -177,7 +162,7 @@ def upload_multiple_files(service, local_folder_path, drive_folder_id):
 
                 # Reutiliza nossa função de upload de arquivo único
                 file_id = upload_file(
-                    service, local_filepath, mime_type, drive_folder_id
+                    service, local_filepath, mime_type, drive_folder_id, chunk_size
                 )
 
                 if file_id:
@@ -197,22 +182,17 @@ def upload_multiple_files(service, local_folder_path, drive_folder_id):
         return uploaded_file_ids
 
 
-def download_folder(service, dir_path, folder_id):
-    files = list_files_in_folder(service, folder_id)
+def download_folder(service, dir_path, folder_id, chunk_size=None, cache_dir=None):
+    files = list_files_in_folder(service, folder_id, cache_dir=cache_dir)
     for file in files:
         file_id = file["id"]
         file_name = file["name"]
         local_path = os.path.join(dir_path, file_name)
-        download_file(service, file_id, local_path)
+        download_file(service, file_id, local_path, chunk_size)
     print("Arquivos baixados com sucesso!")
 
 
 if __name__ == "__main__":
-    drive_service = get_drive_service()
-    if not drive_service:
-        print("Não foi possível autenticar na API do Drive.")
-        sys.exit(1)
-
     parser = argparse.ArgumentParser(
         description="Faz o upload de arquivos de um diretório local para uma pasta do Drive."
     )
@@ -238,11 +218,42 @@ if __name__ == "__main__":
         required=True,
     )
 
+    parser.add_argument(
+        "--chunk_size_mb",
+        type=float,
+        default=None,
+        help="Tamanho de cada requisição de transferência em MB (múltiplo de 0.25)",
+    )
+
+    parser.add_argument(
+        "--drive_api_url",
+        type=str,
+        default=None,
+        help="URL de uma API do Drive emulada (drive_stub_server.py)",
+    )
+
+    parser.add_argument(
+        "--listing_cache",
+        type=str,
+        nargs="?",
+        const=DEFAULT_CACHE_DIR,
+        default=None,
+        help=f"Reaproveita a listagem da pasta entre execuções (diretório padrão: {DEFAULT_CACHE_DIR})",
+    )
+
     args = parser.parse_args()
 
+    drive_service = get_drive_service(args.drive_api_url)
+    if not drive_service:
+        print("Não foi possível autenticar na API do Drive.")
+        sys.exit(1)
+
     dir_path = args.dir_path
     drive_folder_id = args.drive_folder_id
     mode = args.mode
+    chunk_size = None
+    if args.chunk_size_mb:
+        chunk_size = int(args.chunk_size_mb * 1024 * 1024)
 
     if mode == "upload":
         if not os.path.exists(dir_path):
@@ -252,6 +263,7 @@ if __name__ == "__main__":
                 drive_service,
                 dir_path,
                 drive_folder_id,
+                chunk_size,
             )
 
             if ids_dos_arquivos_enviados:
@@ -262,4 +274,10 @@ if __name__ == "__main__":
         if not os.path.exists(dir_path):
             print(f"O diretório local '{dir_path}' nao foi encontrado.")
         else:
-            download_folder(drive_service, dir_path, drive_folder_id)
+            download_folder(
+                drive_service,
+                dir_path,
+                drive_folder_id,
+                chunk_size,
+                args.listing_cache,
+            )
@@ -2,33 +2,53 @@ import argparse
 import math
 import os
 import time
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Tuple
 
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 
+from dispatcher import (
+    DEFAULT_MAX_OUTSTANDING,
+    DEFAULT_MAX_RETRIES,
+    DEFAULT_SPECULATION_FACTOR,
+    create_master,
+)
+from endpoint_profile import DEFAULT_PROFILE_PATH, load_weights
+from function_registry import DEFAULT_REGISTRY_PATH, FunctionRegistry
+from drive_listing import DEFAULT_CACHE_DIR, DEFAULT_FIELDS, list_folder_or_empty
+from drive_transfer import build_drive_service, generate_file_ids
 from mwfaas.globus_compute_manager import GlobusComputeCloudManager
-from mwfaas.list_distribuition_strategy import ListDistributionStrategy
-from mwfaas.master import Master
+from payload_stats import chunk_payload_bytes
+from task_tracing import TaskTracer
+from worker_telemetry import TelemetryCollector
+
+# Modo de divisão: arquivos acima do limite são comprimidos por intervalos
+DEFAULT_SPLIT_THRESHOLD_MB = 1024
+DEFAULT_RANGE_SIZE_MB = 256
 
 
 def worker_function(files: List[dict[str, Any]], metadata: Dict[str, Any]):
     import gzip
     import io
     import json
+    import tempfile
     import time
     from typing import Any
 
     from google.auth.transport.requests import Request
     from google.oauth2.credentials import Credentials
-    from googleapiclient.discovery import build
     from googleapiclient.errors import HttpError
-    from googleapiclient.http import (
-        MediaIoBaseDownload,
-        MediaIoBaseUpload,
+
+    from drive_transfer import (
+        SIMPLE_UPLOAD_THRESHOLD,
+        build_drive_service,
+        delete_files,
+        download_range_to_stream,
+        download_to_stream,
+        is_file_id_in_use,
+        upload_stream,
     )
 
     all_time_start = time.perf_counter()
@@ -38,10 +58,20 @@ def worker_function(files: List[dict[str, Any]], metadata: Dict[str, Any]):
 
     SCOPES = ["https://www.googleapis.com/auth/drive"]
 
+    chunk_size = metadata.get("chunk_size")
+    simple_upload_threshold = metadata.get(
+        "simple_upload_threshold", SIMPLE_UPLOAD_THRESHOLD
+    )
+
     # --- Funções Auxiliares ---
 
     def get_drive_service():
         """Autentica e retorna o objeto de serviço da API do Drive."""
+        drive_api_url = metadata.get("drive_api_url")
+        if drive_api_url:
+            print(f"[Worker] Usando a API do Drive emulada em {drive_api_url}.")
+            return build_drive_service(api_url=drive_api_url)
+
         token_json_string = metadata.get("token")
         if not token_json_string:
             raise ValueError(
@@ -61,61 +91,96 @@ def worker_function(files: List[dict[str, Any]], metadata: Dict[str, Any]):
             return None
 
         try:
-            service = build("drive", "v3", credentials=creds)
+            service = build_drive_service(creds)
             print("[Worker] Serviço do Google Drive autenticado com sucesso.")
             return service
         except HttpError as error:
             print(f"Um erro ocorreu ao construir o serviço: {error}")
             return None
 
-    def download_file_to_memory(service, file_id) -> io.BytesIO:
+    def download_file_to_memory(service, file_id):
         """Baixa um arquivo do Google Drive para um buffer em memória."""
         try:
-            request = service.files().get_media(fileId=file_id)
             fh = io.BytesIO()
-            downloader = MediaIoBaseDownload(fh, request)
-            done = False
             print(f"Iniciando download em memória do arquivo ID: {file_id}...")
-            while done is False:
-                status, done = downloader.next_chunk()
+            stats = download_to_stream(service, file_id, fh, chunk_size=chunk_size)
             fh.seek(0)
-            return fh
+            return fh, stats
         except HttpError as error:
             print(f"Um erro ocorreu no download para memória: {error}")
             raise error
 
     def upload_bytes_to_drive(
-        service, file_bytes: bytes, new_filename: str, folder_id=None
+        service,
+        file_bytes,
+        new_filename: str,
+        folder_id=None,
+        file_id=None,
+        resumable=False,
     ):
-        """Faz upload de um objeto de bytes para o Google Drive."""
+        """
+        Faz upload de bytes (ou de um stream binário) para o Google Drive. Com
+        `file_id` (reservado pelo Master), uma segunda execução da mesma
+        tarefa encontra o arquivo já criado e não o duplica. Com `resumable`,
+        usa a sessão resumable qualquer que seja o tamanho.
+        """
         try:
             file_metadata: dict[str, Any] = {"name": new_filename}
             if folder_id:
                 file_metadata["parents"] = [folder_id]
+            if file_id:
+                file_metadata["id"] = file_id
 
             # Cria um buffer de bytes para o upload
-            fh = io.BytesIO(file_bytes)
-
-            media = MediaIoBaseUpload(
-                fh,
-                mimetype="application/gzip",
-                resumable=True,
-            )
+            fh = file_bytes if hasattr(file_bytes, "read") else io.BytesIO(file_bytes)
 
             print(f"Iniciando upload em memória de: {new_filename}...")
-            file = (
-                service.files()
-                .create(body=file_metadata, media_body=media, fields="id, name")
-                .execute()
+            file, stats = upload_stream(
+                service,
+                fh,
+                file_metadata,
+                "application/gzip",
+                chunk_size=chunk_size,
+                simple_upload_threshold=0 if resumable else simple_upload_threshold,
             )
             print(
                 f"Upload em memória concluído! Nome: {file.get('name')}, ID: {file.get('id')}"
             )
-            return file.get("id")
+            return file.get("id"), stats
         except HttpError as error:
+            if file_id and is_file_id_in_use(error):
+                print(f"{new_filename} já foi enviado por outra execução da tarefa.")
+                return file_id, {
+                    "bytes": 0,
+                    "requests": 1,
+                    "retries": 0,
+                    "time": 0.0,
+                    "duplicate": True,
+                }
             print(f"Um erro ocorreu no upload dos bytes: {error}")
             raise error
 
+    def compress_range(service, file):
+        """Comprime um intervalo do arquivo como um membro gzip independente."""
+        start, end = file["range"]
+        fh = io.BytesIO()
+        print(f"[Worker] Baixando os bytes {start}-{end} de {file['name']}...")
+        stats = download_range_to_stream(
+            service, file["id"], fh, start, end, chunk_size=chunk_size
+        )
+        return gzip.compress(fh.getvalue()), stats
+
+    def assemble_members(service, file, spool):
+        """Baixa os membros, na ordem, um após o outro em `spool`."""
+        stats = {"bytes": 0, "requests": 0, "retries": 0, "time": 0.0}
+        for member_id in file["members"]:
+            member_stats = download_to_stream(
+                service, member_id, spool, chunk_size=chunk_size
+            )
+            for key in stats:
+                stats[key] += member_stats[key]
+        return stats
+
     # --- Lógica Principal do Worker ---
 
     drive_service = get_drive_service()
@@ -128,37 +193,91 @@ def worker_function(files: List[dict[str, Any]], metadata: Dict[str, Any]):
             "Erro no Worker: O parâmetro 'metadata' não continha a chave 'folder_id' necessária para o upload."
         )
 
+    def output_name(file):
+        """
+        Nome de saída (sem a extensão). Na listagem recursiva os arquivos de
+        todas as subpastas vão para a mesma pasta de saída, então o caminho
+        relativo entra no nome ('a/b/data.txt' vira 'a__b__data.txt').
+        """
+        return file.get("path", file["name"]).replace("/", "__")
+
     results = []
     for file in files:
         start_time = time.perf_counter()
         file_name = file["name"]
         file_id = file["id"]
+        base_name = output_name(file)
         try:
-            print(f"[Worker] Processando file: {file_name}...")
-            downloaded_bytes_buffer = download_file_to_memory(drive_service, file_id)
-
-            print(f"[Worker] Compactando {file_name} em memória...")
-            uncompressed_data = downloaded_bytes_buffer.getvalue()
-            compressed_data = gzip.compress(uncompressed_data)
-
-            # Upload
-            new_filename = f"{file_name}.gz"
-            new_file_id = upload_bytes_to_drive(
-                drive_service,
-                compressed_data,
-                new_filename,
-                folder_id=folder_id,
-            )
+            if "members" in file:
+                # Membros gzip concatenados formam um .gz válido: o arquivo
+                # final é só a sequência dos membros, enviada por uma sessão
+                # resumable
+                print(
+                    f"[Worker] Montando {base_name}.gz com {len(file['members'])} membros..."
+                )
+                with tempfile.TemporaryFile() as spool:
+                    download_stats = assemble_members(drive_service, file, spool)
+                    new_file_id, upload_stats = upload_bytes_to_drive(
+                        drive_service,
+                        spool,
+                        f"{base_name}.gz",
+                        folder_id=folder_id,
+                        file_id=file.get("output_id"),
+                        resumable=True,
+                    )
+                # O arquivo montado já está no Drive: uma falha ao apagar os
+                # membros não desfaz o sucesso, só deixa sobras na pasta
+                leftover_members = []
+                try:
+                    delete_files(drive_service, file["members"])
+                except Exception as e:
+                    print(
+                        f"[Worker] {base_name}.gz montado, mas os membros não foram apagados: {e}"
+                    )
+                    leftover_members = file["members"]
+            elif "range" in file:
+                compressed_data, download_stats = compress_range(drive_service, file)
+                new_file_id, upload_stats = upload_bytes_to_drive(
+                    drive_service,
+                    compressed_data,
+                    f"{base_name}.gz.part{file['part']:05d}",
+                    folder_id=folder_id,
+                    file_id=file.get("output_id"),
+                )
+            else:
+                print(f"[Worker] Processando file: {file_name}...")
+                downloaded_bytes_buffer, download_stats = download_file_to_memory(
+                    drive_service, file_id
+                )
+
+                print(f"[Worker] Compactando {file_name} em memória...")
+                uncompressed_data = downloaded_bytes_buffer.getvalue()
+                compressed_data = gzip.compress(uncompressed_data)
+
+                # Upload
+                new_filename = f"{base_name}.gz"
+                new_file_id, upload_stats = upload_bytes_to_drive(
+                    drive_service,
+                    compressed_data,
+                    new_filename,
+                    folder_id=folder_id,
+                    file_id=file.get("output_id"),
+                )
 
             end_time = time.perf_counter()
-            results.append(
-                {
-                    "original_id": file_id,
-                    "new_id": new_file_id,
-                    "status": "success",
-                    "time": end_time - start_time,
-                }
-            )
+            result = {
+                "original_id": file_id,
+                "new_id": new_file_id,
+                "status": "success",
+                "time": end_time - start_time,
+                "download": download_stats,
+                "upload": upload_stats,
+            }
+            if "range" in file:
+                result["part"] = file["part"]
+            if "members" in file and leftover_members:
+                result["leftover_members"] = leftover_members
+            results.append(result)
         except Exception as e:
             print(f"[Worker] Falha ao processar {file_name}: {e}")
             results.append(
@@ -169,6 +288,7 @@ def worker_function(files: List[dict[str, Any]], metadata: Dict[str, Any]):
                     "new_name": None,
                     "status": "failed",
                     "error": str(e),
+                    "part": file.get("part"),
                 }
             )
 
@@ -176,8 +296,11 @@ def worker_function(files: List[dict[str, Any]], metadata: Dict[str, Any]):
     return {"data": results, "time": all_time_end - all_time_start}
 
 
-def google_drive_auth():
+def google_drive_auth(drive_api_url: Optional[str] = None):
     """Autentica e retorna o objeto de serviço da API do Drive."""
+    if drive_api_url:
+        return build_drive_service(api_url=drive_api_url)
+
     SCOPES = ["https://www.googleapis.com/auth/drive"]
     creds = None
     if os.path.exists("token.json"):
@@ -193,67 +316,178 @@ def google_drive_auth():
             token.write(creds.to_json())
 
     try:
-        service = build("drive", "v3", credentials=creds)
+        service = build_drive_service(creds)
         return service
     except HttpError as error:
         print(f"Um erro ocorreu ao construir o serviço: {error}")
         return None
 
 
-def list_files_in_folder(service, folder_id):
+def list_files_in_folder(
+    service,
+    folder_id,
+    recursive=False,
+    cache_dir=None,
+    service_factory=None,
+    fields=DEFAULT_FIELDS,
+):
     """
     Lista todos os arquivos e subpastas dentro de uma pasta específica do Drive.
 
     Args:
         service: Objeto de serviço da API do Drive.
         folder_id (str): O ID da pasta do Drive a ser pesquisada.
+        recursive (bool): Se True, lista também o conteúdo das subpastas (em paralelo).
+        cache_dir (str): Diretório do cache da listagem (None desativa o cache).
+        service_factory (callable): Cria um serviço por thread na listagem recursiva.
+        fields (list): Campos de cada arquivo pedidos à API.
 
     Returns:
         list: Uma lista de dicionários, onde cada dicionário contém 'id' e 'name' do arquivo.
     """
-    all_files = []
-    page_token = None
-    try:
-        print(f"Listando arquivos da pasta ID: {folder_id}...")
-        while True:
-            response = (
-                service.files()
-                .list(
-                    q=f"'{folder_id}' in parents and trashed=false",
-                    spaces="drive",
-                    fields="nextPageToken, files(id, name)",
-                    pageToken=page_token,
-                )
-                .execute()
-            )
+    return list_folder_or_empty(
+        service,
+        folder_id,
+        recursive=recursive,
+        cache_dir=cache_dir,
+        service_factory=service_factory,
+        fields=fields,
+    )
 
-            files = response.get("files", [])
-            all_files.extend(files)
 
-            page_token = response.get("nextPageToken", None)
-            if page_token is None:
-                break
+def split_large_files(
+    files: List[Dict[str, Any]], split_threshold: int, range_size: int
+) -> Tuple[List[Dict[str, Any]], Dict[str, Dict[str, Any]]]:
+    """
+    Troca cada arquivo maior que `split_threshold` bytes por itens de
+    intervalo de até `range_size` bytes, comprimidos em workers diferentes.
 
-        print(f"Encontrados {len(all_files)} arquivos.")
-        return all_files
+    Returns:
+        tuple: (itens a processar, {id do arquivo dividido: {'file', 'parts'}}).
+    """
+    items = []
+    split = {}
+    for file in files:
+        size = int(file.get("size") or 0)
+        if size <= split_threshold:
+            items.append(file)
+            continue
+        parts = math.ceil(size / range_size)
+        split[file["id"]] = {"file": file, "parts": parts}
+        for part in range(parts):
+            start = part * range_size
+            item = {
+                "id": file["id"],
+                "name": file["name"],
+                "range": [start, min(size, start + range_size) - 1],
+                "part": part,
+            }
+            if "path" in file:
+                item["path"] = file["path"]
+            items.append(item)
+    return items, split
+
+
+def assembly_items(
+    split: Dict[str, Dict[str, Any]], file_results: List[Dict[str, Any]]
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Monta, para cada arquivo dividido com todos os intervalos comprimidos, o
+    item que junta os membros na ordem.
 
-    except HttpError as error:
-        print(f"Um erro ocorreu ao listar os arquivos: {error}")
-        return []
+    Returns:
+        tuple: (itens de montagem, resultados de falha dos arquivos com
+               intervalos que falharam).
+    """
+    members: Dict[str, Dict[int, str]] = {file_id: {} for file_id in split}
+    for result in file_results:
+        if result.get("part") is not None and result.get("status") == "success":
+            members[result["original_id"]][result["part"]] = result["new_id"]
+
+    items, failed = [], []
+    for file_id, entry in split.items():
+        done = members[file_id]
+        file = entry["file"]
+        if len(done) < entry["parts"]:
+            failed.append(
+                {
+                    "original_id": file_id,
+                    "original_name": file["name"],
+                    "new_id": None,
+                    "new_name": None,
+                    "status": "failed",
+                    "error": f"{entry['parts'] - len(done)} de {entry['parts']} intervalos falharam",
+                }
+            )
+            continue
+        item = {
+            "id": file_id,
+            "name": file["name"],
+            "members": [done[part] for part in range(entry["parts"])],
+        }
+        if "path" in file:
+            item["path"] = file["path"]
+        items.append(item)
+    return items, failed
+
+
+def print_transfer_summary(file_results: List[Dict[str, Any]], prefix: str):
+    """Imprime o total de requisições e bytes transferidos por direção."""
+    for direction in ("download", "upload"):
+        stats = [r[direction] for r in file_results if r.get(direction)]
+        if not stats:
+            continue
+        total_bytes = sum(s["bytes"] for s in stats)
+        total_requests = sum(s["requests"] for s in stats)
+        total_retries = sum(s["retries"] for s in stats)
+        print(
+            f"[{prefix}] {direction}: {len(stats)} arquivos, {total_bytes / (1024 * 1024):.2f} MB, "
+            f"{total_requests} requisições ({total_requests / len(stats):.1f} por arquivo), "
+            f"{total_retries} retomadas"
+        )
 
 
-def main_local(folder_id, output_folder_id):
+def build_worker_metadata(
+    output_folder_id: str,
+    chunk_size: Optional[int] = None,
+    drive_api_url: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Monta o metadata enviado aos workers."""
+    metadata: Dict[str, Any] = {
+        "folder_id": output_folder_id,
+        "chunk_size": chunk_size,
+    }
+    if drive_api_url:
+        # O servidor emulado não exige credenciais
+        metadata["drive_api_url"] = drive_api_url
+    else:
+        with open("token.json", "r") as f:
+            metadata["token"] = f.read()
+    return metadata
+
+
+def main_local(
+    folder_id,
+    output_folder_id,
+    chunk_size=None,
+    drive_api_url=None,
+    recursive=False,
+    listing_cache=None,
+):
     print("[Local] Executando script localmente...")
-    service = google_drive_auth()
+    service = google_drive_auth(drive_api_url)
     if not service:
         return
 
-    files = list_files_in_folder(service=service, folder_id=folder_id)
-
-    with open("token.json", "r") as f:
-        token_json_string = f.read()
+    files = list_files_in_folder(
+        service=service,
+        folder_id=folder_id,
+        recursive=recursive,
+        cache_dir=listing_cache,
+        service_factory=lambda: google_drive_auth(drive_api_url),
+    )
 
-    metadata = {"folder_id": output_folder_id, "token": token_json_string}
+    metadata = build_worker_metadata(output_folder_id, chunk_size, drive_api_url)
     start_time = time.perf_counter()
     res = worker_function(files, metadata)
     end_time = time.perf_counter()
@@ -281,37 +515,180 @@ def main_local(folder_id, output_folder_id):
             f"[Local] Tempo mínimo de execução de um worker: {min(execution_times):.4f}s"
         )
         print("[Local] Execution times:", execution_times)
+        print_transfer_summary(results, "Local")
+
+
+def build_job(
+    folder_id: str,
+    output_folder_id: Optional[str] = None,
+    items_per_chunk: int = 1,
+    chunk_size: Optional[int] = None,
+    drive_api_url: Optional[str] = None,
+    recursive: bool = False,
+    listing_cache: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Job para o job_scheduler.py: a lista de arquivos, a função e o metadata,
+    e `finish`, que resume as transferências.
+    """
+    service = google_drive_auth(drive_api_url)
+    if not service:
+        raise RuntimeError("Falha na autenticação do Google Drive.")
+
+    files = list_files_in_folder(
+        service=service,
+        folder_id=folder_id,
+        recursive=recursive,
+        cache_dir=listing_cache,
+        service_factory=lambda: google_drive_auth(drive_api_url),
+    )
+    metadata = build_worker_metadata(
+        output_folder_id or folder_id, chunk_size, drive_api_url
+    )
+
+    def finish(results: List[Any]):
+        file_results = []
+        for result in results:
+            if isinstance(result, dict):
+                file_results.extend(result.get("data", []))
+        print_transfer_summary(file_results, "Gzip")
+        succeeded = [r for r in file_results if r.get("status") == "success"]
+        print(f"[Gzip] {len(succeeded)} de {len(files)} arquivos comprimidos.")
+
+    return {
+        "data_input": files,
+        "user_function": worker_function,
+        "metadata": metadata,
+        "items_per_chunk": items_per_chunk,
+        "finish": finish,
+    }
+
+
+def main(
+    folder_id: str,
+    output_folder_id: str,
+    one_per_worker: bool,
+    chunk_size: Optional[int] = None,
+    drive_api_url: Optional[str] = None,
+    recursive: bool = False,
+    listing_cache: Optional[str] = None,
+    trace_file: Optional[str] = None,
+    profile_file: Optional[str] = None,
+    speculation_factor: Optional[float] = None,
+    max_outstanding: Optional[int] = None,
+    share_metadata: bool = False,
+    registry_file: Optional[str] = None,
+    max_retries: int = 0,
+    collect_telemetry: bool = False,
+    split_threshold: Optional[int] = None,
+    range_size: int = DEFAULT_RANGE_SIZE_MB * 1024 * 1024,
+) -> Optional[Dict[str, Any]]:
+    """
+    Comprime via Globus Compute os arquivos de uma pasta do Drive.
 
+    Args:
+        trace_file (str): Se informado, rastreia cada tarefa e salva a linha do
+                          tempo (Chrome Trace) neste arquivo.
+        profile_file (str): Perfil de endpoint_profile.py; se informado, distribui
+                            a carga proporcionalmente à vazão de cada endpoint.
+        speculation_factor (float): Se informado, duplica em endpoints ociosos
+                                    as tarefas mais lentas que este múltiplo da
+                                    mediana. Os IDs dos arquivos de saída são
+                                    reservados antes, para que as cópias não
+                                    dupliquem uploads.
+        max_outstanding (int): Se informado, os chunks são entregues sob
+                               demanda, com no máximo este número de tarefas
+                               em andamento por endpoint, e encolhem no fim
+                               da execução.
+        share_metadata (bool): Se True, o metadata vai completo só na
+                               primeira tarefa de cada endpoint e as demais
+                               levam apenas uma referência ao conteúdo.
+        registry_file (str): Se informado, reaproveita o ID da função
+                             registrado em execuções anteriores (cache em
+                             function_registry.py).
+        max_retries (int): Resubmissões permitidas para cada chunk que falhar;
+                           como na execução especulativa, os IDs de saída
+                           são reservados para que não haja uploads
+                           duplicados.
+        collect_telemetry (bool): Se True, cada worker devolve a telemetria de
+                                  recursos (CPU, memória, E/S), resumida por
+                                  endpoint no fim da execução.
+        split_threshold (int): Se informado, arquivos maiores que este número
+                               de bytes são divididos em intervalos, cada um
+                               comprimido em uma tarefa como um membro gzip
+                               independente; uma segunda fase junta os
+                               membros, na ordem, em um único .gz por upload
+                               resumable. Nesse modo cada tarefa leva um item.
+        range_size (int): Tamanho dos intervalos, em bytes.
 
-def main(folder_id: str, output_folder_id: str, one_per_worker: bool):
-    service = google_drive_auth()
+    Returns:
+        dict: Métricas da execução (usadas pelo benchmark.py), ou None em caso
+              de falha.
+    """
+    service = google_drive_auth(drive_api_url)
     if not service:
         return
 
-    files = list_files_in_folder(service=service, folder_id=folder_id)
+    files = list_files_in_folder(
+        service=service,
+        folder_id=folder_id,
+        recursive=recursive,
+        cache_dir=listing_cache,
+        service_factory=lambda: google_drive_auth(drive_api_url),
+        fields=("id", "name", "size") if split_threshold else DEFAULT_FIELDS,
+    )
+
+    metadata = build_worker_metadata(output_folder_id, chunk_size, drive_api_url)
 
-    with open("token.json", "r") as f:
-        token_json_string = f.read()
+    items, split = files, {}
+    if split_threshold:
+        items, split = split_large_files(files, split_threshold, range_size)
+        print(
+            f"[Master] {len(split)} arquivos acima de {split_threshold / (1024 * 1024):g} MB "
+            f"divididos em {len(items) - len(files) + len(split)} intervalos de até "
+            f"{range_size / (1024 * 1024):g} MB"
+        )
 
-    metadata = {"folder_id": output_folder_id, "token": token_json_string}
+    # Cópias especulativas e novas tentativas podem enviar o mesmo arquivo de
+    # novo: com o ID reservado, o segundo upload é recusado pelo Drive
+    reserve_ids = bool(speculation_factor or max_retries)
+    if reserve_ids:
+        for item, output_id in zip(items, generate_file_ids(service, len(items))):
+            item["output_id"] = output_id
 
     with GlobusComputeCloudManager(auto_authenticate=True) as cloud_manager:
         worker_count = len(cloud_manager.available_endpoint_ids)
         print(f"Número de workers disponíveis: {worker_count}")
         items_per_worker = 1
-        if not one_per_worker:
+        if not one_per_worker and not split:
             items_per_worker = math.ceil(len(files) / worker_count)
 
         print(f"items_per_worker: {items_per_worker}")
-        distribuition = ListDistributionStrategy(items_per_worker)
-        master = Master(
-            cloud_manager=cloud_manager, distribution_strategy=distribuition
-        )
+        tracer = TaskTracer() if trace_file else None
+        telemetry = TelemetryCollector() if collect_telemetry else None
+        weights = load_weights(profile_file) if profile_file else None
+        function_registry = FunctionRegistry(registry_file) if registry_file else None
+
+        def make_master(items_per_chunk: int):
+            return create_master(
+                cloud_manager,
+                items_per_chunk,
+                tracer=tracer,
+                weights=weights,
+                speculation_factor=speculation_factor,
+                max_outstanding=max_outstanding,
+                share_metadata=share_metadata,
+                function_registry=function_registry,
+                max_retries=max_retries,
+                telemetry=telemetry,
+            )
+
+        master = make_master(items_per_worker)
 
         try:
             start_time = time.perf_counter()
             results = master.run(
-                data_input=files,
+                data_input=items,
                 user_function=worker_function,
                 metadata=metadata,
             )
@@ -336,8 +713,90 @@ def main(folder_id: str, output_folder_id: str, one_per_worker: bool):
                 )
                 print("[Master] Execution times:", execution_times)
 
+            file_results = []
+            for result in results:
+                if isinstance(result, dict):
+                    file_results.extend(result.get("data", []))
+
+            task_statuses = master.get_task_statuses()
+            assembly: List[Dict[str, Any]] = []
+            if split:
+                assembly, failed = assembly_items(split, file_results)
+                if reserve_ids:
+                    for item, output_id in zip(
+                        assembly, generate_file_ids(service, len(assembly))
+                    ):
+                        item["output_id"] = output_id
+                # Os intervalos também entram no resumo de transferências
+                print_transfer_summary(file_results, "Master (intervalos)")
+                file_results = [r for r in file_results if r.get("part") is None]
+                file_results.extend(failed)
+                if assembly:
+                    # Mesmo tracer dos intervalos: as tarefas de montagem
+                    # seguem a numeração e a duração total cobre as duas fases
+                    assembly_master = make_master(1)
+                    assembly_results = assembly_master.run(
+                        data_input=assembly,
+                        user_function=worker_function,
+                        metadata=metadata,
+                    )
+                    for result in assembly_results:
+                        if isinstance(result, dict):
+                            file_results.extend(result.get("data", []))
+                    names = {
+                        item["id"]: item.get("path", item["name"]) for item in assembly
+                    }
+                    for result in file_results:
+                        if result.get("leftover_members"):
+                            print(
+                                f"[Master] {names.get(result['original_id'], result['original_id'])} "
+                                "foi montado, mas nem todos os membros comprimidos foram "
+                                "apagados; remova manualmente da pasta de saída os que "
+                                f"restarem (IDs: {', '.join(result['leftover_members'])})."
+                            )
+                    task_statuses.update(
+                        (f"montagem-{task_id}", status)
+                        for task_id, status in assembly_master.get_task_statuses().items()
+                    )
+                assembly_time = time.perf_counter() - end_time
+                end_time = time.perf_counter()
+                print(
+                    f"[Master] Montagem de {len(assembly)} arquivos divididos: "
+                    f"{assembly_time:.4f} segundos"
+                )
+                for result in failed:
+                    print(
+                        f"[Master] {result['original_name']} não foi montado: {result['error']}; "
+                        "os membros comprimidos ficam na pasta de saída."
+                    )
+            print_transfer_summary(file_results, "Master")
+
             print("\n" + "-" * 15 + " Status das Tarefas " + "-" * 15)
-            print(master.get_task_statuses())
+            print(task_statuses)
+
+            if tracer:
+                tracer.print_phase_table()
+                tracer.export_chrome_trace(trace_file)
+            if telemetry:
+                telemetry.print_summary()
+
+            succeeded = [r for r in file_results if r.get("status") == "success"]
+            return {
+                "run_time": end_time - start_time,
+                "task_times": execution_times,
+                "num_tasks": (
+                    len(task_statuses)
+                    if max_outstanding
+                    else math.ceil(len(items) / max(1, items_per_worker))
+                    + len(assembly)
+                ),
+                "payload_bytes": chunk_payload_bytes(items, items_per_worker, metadata)
+                + (chunk_payload_bytes(assembly, 1, metadata) if assembly else 0),
+                "task_statuses": task_statuses,
+                "verified": len(succeeded) == len(files),
+                "phases": tracer.summary() if tracer else None,
+                "telemetry": telemetry.summary() if telemetry else None,
+            }
 
         except Exception as e:
             print(
@@ -375,6 +834,120 @@ if __name__ == "__main__":
         action="store_true",
     )
 
+    parser.add_argument(
+        "--chunk_size_mb",
+        type=float,
+        default=None,
+        help="Tamanho de cada requisição de transferência no worker em MB (múltiplo de 0.25)",
+    )
+
+    parser.add_argument(
+        "--drive_api_url",
+        type=str,
+        default=None,
+        help="URL de uma API do Drive emulada (drive_stub_server.py), acessível pelos workers",
+    )
+
+    parser.add_argument(
+        "--recursive",
+        action="store_true",
+        help="Se presente, processa também os arquivos das subpastas; o caminho relativo entra no nome de saída (a/b/x.txt vira a__b__x.txt.gz)",
+    )
+
+    parser.add_argument(
+        "--listing_cache",
+        type=str,
+        nargs="?",
+        const=DEFAULT_CACHE_DIR,
+        default=None,
+        help=f"Reaproveita a listagem da pasta entre execuções (diretório padrão: {DEFAULT_CACHE_DIR})",
+    )
+
+    parser.add_argument(
+        "--trace",
+        type=str,
+        default=None,
+        help="Arquivo JSON (Chrome Trace) para a linha do tempo de cada tarefa",
+    )
+
+    parser.add_argument(
+        "--weighted",
+        type=str,
+        nargs="?",
+        const=DEFAULT_PROFILE_PATH,
+        default=None,
+        help=f"Dimensiona os chunks pela vazão de cada endpoint (perfil padrão: {DEFAULT_PROFILE_PATH})",
+    )
+
+    parser.add_argument(
+        "--speculative",
+        type=float,
+        nargs="?",
+        const=DEFAULT_SPECULATION_FACTOR,
+        default=None,
+        metavar="FACTOR",
+        help=f"Duplica em endpoints ociosos as tarefas mais lentas que FACTOR vezes a mediana (padrão: {DEFAULT_SPECULATION_FACTOR})",
+    )
+
+    parser.add_argument(
+        "--share_metadata",
+        action="store_true",
+        help="Envia o metadata uma vez por endpoint; as demais tarefas levam só o hash",
+    )
+
+    parser.add_argument(
+        "--register_functions",
+        type=str,
+        nargs="?",
+        const=DEFAULT_REGISTRY_PATH,
+        default=None,
+        metavar="REGISTRY",
+        help=f"Reaproveita o ID da função registrado em execuções anteriores (cache padrão: {DEFAULT_REGISTRY_PATH})",
+    )
+
+    parser.add_argument(
+        "--retries",
+        type=int,
+        nargs="?",
+        const=DEFAULT_MAX_RETRIES,
+        default=0,
+        metavar="N",
+        help=f"Resubmete até N vezes, com backoff e em outro endpoint, os chunks que falharem (padrão: {DEFAULT_MAX_RETRIES})",
+    )
+
+    parser.add_argument(
+        "--telemetry",
+        action="store_true",
+        help="Coleta CPU, memória e E/S de cada tarefa e resume por endpoint",
+    )
+
+    parser.add_argument(
+        "--dynamic",
+        type=int,
+        nargs="?",
+        const=DEFAULT_MAX_OUTSTANDING,
+        default=None,
+        metavar="MAX_OUTSTANDING",
+        help=f"Entrega os chunks sob demanda, com até MAX_OUTSTANDING tarefas por endpoint (padrão: {DEFAULT_MAX_OUTSTANDING})",
+    )
+
+    parser.add_argument(
+        "--split_threshold_mb",
+        type=float,
+        nargs="?",
+        const=DEFAULT_SPLIT_THRESHOLD_MB,
+        default=None,
+        metavar="MB",
+        help=f"Divide os arquivos maiores que MB em intervalos comprimidos em paralelo e juntados em um .gz de vários membros (padrão: {DEFAULT_SPLIT_THRESHOLD_MB})",
+    )
+
+    parser.add_argument(
+        "--range_size_mb",
+        type=float,
+        default=DEFAULT_RANGE_SIZE_MB,
+        help=f"Com --split_threshold_mb, tamanho de cada intervalo em MB (padrão: {DEFAULT_RANGE_SIZE_MB})",
+    )
+
     args = parser.parse_args()
 
     folder_id = args.folder_id
@@ -385,7 +958,40 @@ if __name__ == "__main__":
     if output_folder_id is None:
         output_folder_id = folder_id
 
+    chunk_size = None
+    if args.chunk_size_mb:
+        chunk_size = int(args.chunk_size_mb * 1024 * 1024)
+
     if run_local:
-        main_local(folder_id, output_folder_id)
+        main_local(
+            folder_id,
+            output_folder_id,
+            chunk_size,
+            args.drive_api_url,
+            args.recursive,
+            args.listing_cache,
+        )
     else:
-        main(folder_id, output_folder_id, one_per_worker)
+        main(
+            folder_id,
+            output_folder_id,
+            one_per_worker,
+            chunk_size,
+            args.drive_api_url,
+            args.recursive,
+            args.listing_cache,
+            args.trace,
+            args.weighted,
+            args.speculative,
+            args.dynamic,
+            args.share_metadata,
+            args.register_functions,
+            args.retries,
+            args.telemetry,
+            (
+                int(args.split_threshold_mb * 1024 * 1024)
+                if args.split_threshold_mb is not None
+                else None
+            ),
+            int(args.range_size_mb * 1024 * 1024),
+        )
@@ -0,0 +1,363 @@
+"""
+Vários workloads ao mesmo tempo em um único Master, com asyncio.
+
+Cada script abre a sua sessão com o GlobusComputeCloudManager e bloqueia em
+master.run(); rodar bucket_sort, mandelbrot e gzip juntos exige processos
+separados que disputam os mesmos endpoints sem saber uns dos outros. O
+JobScheduler compartilha uma sessão e um Executor por endpoint entre todos os
+jobs, e o seu run() é awaitable: cada job é uma corrotina e o escalonador
+decide, a cada vaga livre em um endpoint, de qual job sai o próximo chunk.
+
+Políticas:
+    fair      o job que recebeu menos tempo de endpoint por unidade de
+              prioridade (tarefas concluídas mais a estimativa das em
+              andamento): com prioridades 2 e 1, o primeiro tende a ocupar o
+              dobro do tempo dos endpoints, mesmo que as tarefas dos dois
+              tenham custos diferentes.
+    priority  sempre o job de maior prioridade que ainda tenha chunks; os
+              demais só usam as vagas que sobrarem.
+
+O relatório mostra o makespan de cada job e a ocupação das vagas de cada
+endpoint, com a parte de cada job.
+
+Uso:
+    python job_scheduler.py jobs.json --policy fair --max_outstanding 2
+
+jobs.json:
+    [
+        {"workload": "mandelbrot", "priority": 2,
+         "params": {"output_filename": "m.png", "image_width": 1200,
+                    "image_height": 800, "max_iterations": 255,
+                    "lines_per_worker": 10}},
+        {"workload": "bucket_sort",
+         "params": {"json_filepath": "inputs/dataset.bin", "num_buckets": 50}}
+    ]
+"""
+
+import argparse
+import asyncio
+import importlib
+import json
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from globus_compute_sdk import Executor
+
+from dispatcher import DEFAULT_MAX_OUTSTANDING
+from distribution import split_into_chunks
+from endpoints import label_endpoint
+from mwfaas.globus_compute_manager import GlobusComputeCloudManager
+
+POLICIES = ("fair", "priority")
+
+# Módulo de cada workload; cada um expõe build_job(**params)
+WORKLOAD_MODULES = {
+    "bucket_sort": "bucket_sort",
+    "mandelbrot": "mandelbrot",
+    "gzip": "gzip_google_drive",
+}
+
+
+class JobScheduler:
+    """
+    Args:
+        cloud_manager: GlobusComputeCloudManager já autenticado, compartilhado
+                       por todos os jobs.
+        max_outstanding (int): Tarefas em andamento por endpoint, somando
+                               todos os jobs.
+        policy (str): "fair" ou "priority" (ver o docstring do módulo).
+    """
+
+    def __init__(
+        self,
+        cloud_manager,
+        max_outstanding: int = DEFAULT_MAX_OUTSTANDING,
+        policy: str = "fair",
+    ):
+        if policy not in POLICIES:
+            raise ValueError(f"Política desconhecida: {policy}")
+        self.cloud_manager = cloud_manager
+        self.max_outstanding = max(1, max_outstanding)
+        self.policy = policy
+        self.jobs: List[Dict[str, Any]] = []
+        self.endpoint_ids = list(cloud_manager.available_endpoint_ids)
+        if not self.endpoint_ids:
+            raise RuntimeError("Nenhum endpoint disponível para executar as tarefas.")
+        self._executors = {e: Executor(endpoint_id=e) for e in self.endpoint_ids}
+        self._running = {e: 0 for e in self.endpoint_ids}
+        self._busy = {e: 0.0 for e in self.endpoint_ids}
+        self._tasks = {e: 0 for e in self.endpoint_ids}
+        self._started_at: Optional[float] = None
+        self._finished_at: Optional[float] = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *_):
+        self.close()
+
+    def close(self):
+        for executor in self._executors.values():
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    async def run(
+        self,
+        data_input: Sequence[Any],
+        user_function: Callable,
+        metadata: Any = None,
+        name: Optional[str] = None,
+        items_per_chunk: int = 1,
+        priority: float = 1.0,
+    ) -> List[Any]:
+        """
+        Executa um job e devolve os resultados na ordem dos chunks, como
+        master.run(); os chunks que falharem ficam de fora.
+
+        Args:
+            name (str): Nome do job no relatório.
+            items_per_chunk (int): Itens da entrada por tarefa.
+            priority (float): Peso do job na política (maior = mais vagas).
+        """
+        if priority <= 0:
+            raise ValueError("A prioridade deve ser positiva.")
+        job = {
+            "name": name or getattr(user_function, "__name__", f"job{len(self.jobs)}"),
+            "order": len(self.jobs),
+            "priority": priority,
+            "function": user_function,
+            "metadata": metadata,
+            "chunks": split_into_chunks(data_input, items_per_chunk),
+            "next": 0,
+            "results": {},
+            "failed": {},
+            "busy": {e: 0.0 for e in self.endpoint_ids},
+            "running": 0,
+            "tasks": {e: 0 for e in self.endpoint_ids},
+            "submitted_at": time.time(),
+            "first_task_at": None,
+            "finished_at": None,
+            "done": asyncio.get_running_loop().create_future(),
+        }
+        self.jobs.append(job)
+        if self._started_at is None:
+            self._started_at = job["submitted_at"]
+        print(
+            f"[Scheduler] Job {job['name']}: {len(job['chunks'])} chunks, prioridade {priority}"
+        )
+        if not job["chunks"]:
+            self._finish(job)
+        # Na próxima volta do loop: os jobs iniciados juntos (gather) se
+        # registram antes de as vagas serem distribuídas
+        asyncio.get_running_loop().call_soon(self._pump)
+        await job["done"]
+        return [job["results"][i] for i in sorted(job["results"])]
+
+    def _pick_job(self) -> Optional[Dict[str, Any]]:
+        waiting = [j for j in self.jobs if j["next"] < len(j["chunks"])]
+        if not waiting:
+            return None
+        if self.policy == "priority":
+            return max(waiting, key=lambda j: (j["priority"], -j["order"]))
+        return min(
+            waiting,
+            key=lambda j: (
+                self._service(j) / j["priority"],
+                j["next"] / j["priority"],
+                j["order"],
+            ),
+        )
+
+    @staticmethod
+    def _service(job: Dict[str, Any]) -> float:
+        """Tempo de endpoint já recebido pelo job, com as tarefas em andamento."""
+        completed = len(job["results"]) + len(job["failed"])
+        busy = sum(job["busy"].values())
+        mean = busy / completed if completed else 0.0
+        return busy + job["running"] * mean
+
+    def _pump(self):
+        """Ocupa as vagas livres, sempre no endpoint com menos tarefas."""
+        while True:
+            endpoint_id = min(self.endpoint_ids, key=self._running.get)
+            if self._running[endpoint_id] >= self.max_outstanding:
+                return
+            job = self._pick_job()
+            if job is None:
+                return
+            self._submit(job, endpoint_id)
+
+    def _submit(self, job: Dict[str, Any], endpoint_id: str):
+        index = job["next"]
+        job["next"] += 1
+        submitted_at = time.time()
+        if job["first_task_at"] is None:
+            job["first_task_at"] = submitted_at
+        self._running[endpoint_id] += 1
+        job["running"] += 1
+        future = self._executors[endpoint_id].submit(
+            job["function"], job["chunks"][index], job["metadata"]
+        )
+        # O callback roda no loop do asyncio, não na thread do Executor
+        asyncio.wrap_future(future).add_done_callback(
+            lambda done: self._on_done(job, index, endpoint_id, submitted_at, done)
+        )
+
+    def _on_done(
+        self,
+        job: Dict[str, Any],
+        index: int,
+        endpoint_id: str,
+        submitted_at: float,
+        future: asyncio.Future,
+    ):
+        duration = time.time() - submitted_at
+        self._running[endpoint_id] -= 1
+        job["running"] -= 1
+        self._busy[endpoint_id] += duration
+        self._tasks[endpoint_id] += 1
+        job["busy"][endpoint_id] += duration
+        job["tasks"][endpoint_id] += 1
+        try:
+            job["results"][index] = future.result()
+        except Exception as e:
+            job["failed"][index] = f"{type(e).__name__}: {e}"
+            print(f"[Scheduler] Job {job['name']}: chunk {index} falhou: {e}")
+        if len(job["results"]) + len(job["failed"]) == len(job["chunks"]):
+            self._finish(job)
+        self._pump()
+
+    def _finish(self, job: Dict[str, Any]):
+        job["finished_at"] = time.time()
+        self._finished_at = job["finished_at"]
+        print(
+            f"[Scheduler] Job {job['name']} concluído em "
+            f"{job['finished_at'] - job['submitted_at']:.4f}s"
+        )
+        job["done"].set_result(None)
+
+    def summary(self) -> Dict[str, Any]:
+        """Makespan de cada job e ocupação de cada endpoint."""
+        start = self._started_at or time.time()
+        wall = max(1e-9, (self._finished_at or time.time()) - start)
+        jobs = {}
+        for job in self.jobs:
+            end = job["finished_at"] or time.time()
+            jobs[job["name"]] = {
+                "priority": job["priority"],
+                "chunks": len(job["chunks"]),
+                "failed": len(job["failed"]),
+                "started": job["submitted_at"] - start,
+                "wait": (job["first_task_at"] or end) - job["submitted_at"],
+                "makespan": end - job["submitted_at"],
+            }
+        endpoints = {}
+        for endpoint_id in self.endpoint_ids:
+            endpoints[label_endpoint(endpoint_id)] = {
+                "tasks": self._tasks[endpoint_id],
+                "busy": self._busy[endpoint_id],
+                # Tempo das vagas ocupadas sobre o total de vagas na execução
+                "utilization": self._busy[endpoint_id] / (self.max_outstanding * wall),
+                "share": {
+                    job["name"]: job["busy"][endpoint_id]
+                    / max(1e-9, self._busy[endpoint_id])
+                    for job in self.jobs
+                },
+            }
+        return {"wall_time": wall, "jobs": jobs, "endpoints": endpoints}
+
+    def report(self):
+        summary = self.summary()
+        print("\n" + "-" * 15 + f" Jobs (política {self.policy}) " + "-" * 15)
+        print(
+            f"{'job':<20} {'prio':>5} {'chunks':>7} {'falhas':>7} {'início':>8} "
+            f"{'espera':>8} {'makespan':>9}"
+        )
+        for name, entry in summary["jobs"].items():
+            print(
+                f"{name:<20} {entry['priority']:>5g} {entry['chunks']:>7} {entry['failed']:>7} "
+                f"{entry['started']:>7.2f}s {entry['wait']:>7.2f}s {entry['makespan']:>8.2f}s"
+            )
+        print(
+            f"\n{'endpoint':<12} {'tarefas':>7} {'ocupado':>9} {'ocupação':>9}  parte de cada job"
+        )
+        for label, entry in summary["endpoints"].items():
+            shares = ", ".join(
+                f"{name} {share:.0%}" for name, share in entry["share"].items()
+            )
+            print(
+                f"{label:<12} {entry['tasks']:>7} {entry['busy']:>8.2f}s "
+                f"{entry['utilization']:>8.0%}  {shares}"
+            )
+        print(f"Tempo total: {summary['wall_time']:.4f} segundos")
+
+
+async def run_jobs(
+    specs: List[Dict[str, Any]],
+    policy: str = "fair",
+    max_outstanding: int = DEFAULT_MAX_OUTSTANDING,
+) -> Dict[str, Any]:
+    """
+    Monta os jobs com o build_job() de cada workload e os executa juntos.
+
+    Args:
+        specs (list): {workload, params, priority?, name?} de cada job.
+
+    Returns:
+        dict: summary() do escalonador.
+    """
+    jobs = []
+    for number, spec in enumerate(specs):
+        module = importlib.import_module(WORKLOAD_MODULES[spec["workload"]])
+        job = module.build_job(**spec.get("params", {}))
+        name = spec.get("name") or f"{spec['workload']}#{number}"
+        jobs.append((name, spec.get("priority", 1.0), job))
+
+    with GlobusComputeCloudManager(auto_authenticate=True) as cloud_manager:
+        async with JobScheduler(cloud_manager, max_outstanding, policy) as scheduler:
+
+            async def run_job(name, priority, job):
+                results = await scheduler.run(
+                    job["data_input"],
+                    job["user_function"],
+                    job["metadata"],
+                    name=name,
+                    items_per_chunk=job["items_per_chunk"],
+                    priority=priority,
+                )
+                job["finish"](results)
+
+            await asyncio.gather(*(run_job(*job) for job in jobs))
+            scheduler.report()
+            return scheduler.summary()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Executa vários workloads ao mesmo tempo nos mesmos endpoints.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument(
+        "jobs_file",
+        type=str,
+        help="JSON com a lista de jobs {workload, params, priority, name}",
+    )
+    parser.add_argument("--policy", choices=POLICIES, default="fair")
+    parser.add_argument(
+        "--max_outstanding",
+        type=int,
+        default=DEFAULT_MAX_OUTSTANDING,
+        help="Tarefas em andamento por endpoint, somando todos os jobs",
+    )
+    args = parser.parse_args()
+
+    with open(args.jobs_file, "r") as f:
+        job_specs = json.load(f)
+    unknown = [
+        s["workload"] for s in job_specs if s["workload"] not in WORKLOAD_MODULES
+    ]
+    if unknown:
+        parser.error(f"Workloads desconhecidos: {', '.join(unknown)}")
+
+    asyncio.run(run_jobs(job_specs, args.policy, args.max_outstanding))
+    sys.exit(0)
@@ -1,11 +1,25 @@
 import argparse
+import decimal
+import os
 import sys
 import time
-from typing import Any, Dict, List
-
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from chunk_tuner import DEFAULT_TUNING_PATH, tune_chunk_size
+from dispatcher import (
+    DEFAULT_MAX_OUTSTANDING,
+    DEFAULT_MAX_RETRIES,
+    DEFAULT_SPECULATION_FACTOR,
+    create_master,
+)
+from endpoint_profile import DEFAULT_PROFILE_PATH, load_weights
+from function_registry import DEFAULT_REGISTRY_PATH, FunctionRegistry
 from mwfaas.globus_compute_manager import GlobusComputeCloudManager
-from mwfaas.list_distribuition_strategy import ListDistributionStrategy
-from mwfaas.master import Master
+from payload_stats import chunk_payload_bytes
+from strip_writer import StripPNGWriter, gray_to_rgb
+from task_tracing import TaskTracer
+from worker_telemetry import TelemetryCollector
 
 try:
     from PIL import Image
@@ -14,14 +28,39 @@ except ImportError:
     print("Por favor, instale-a no venv do Master com: pip install Pillow")
     sys.exit(1)
 
+# Passo da grade da primeira prévia no modo progressivo
+DEFAULT_PROGRESSIVE_STEP = 8
+
+# Memória das faixas fora de ordem no modo --stream, em MB
+DEFAULT_STREAM_BUFFER_MB = 64
+
+# Região do plano complexo: x_min, x_max, y_min, y_max
+DEFAULT_BOUNDS = ("-2.0", "1.0", "-1.0", "1.0")
+
 
 def mandelbrot_worker(chunk: List[int], metadata: Dict[str, Any]) -> Dict[str, Any]:
     """
     Função do Worker.
     Calcula um LOTE de linhas do conjunto de Mandelbrot.
     O chunk é uma lista de números de linha, ex: [10, 11, 12, ..., 19].
+
+    Com metadata["cores"] > 1 (ou 0, para usar todos os núcleos do host), as
+    linhas são intercaladas entre processos filhos e o resultado traz o tempo
+    de cada núcleo em "core_times".
+
+    Um item do chunk também pode ser (linha, primeira coluna, passo), para
+    calcular só as colunas range(primeira coluna, largura, passo) da linha
+    (usado pelo modo progressivo); o item volta como primeiro elemento do par.
+
+    Com metadata["reference_orbit"] (modo deep zoom), cada pixel é calculado
+    por perturbação: em precisão double, só a diferença para a órbita de
+    referência calculada no centro da imagem pelo Master. Quando a diferença
+    deixa de ser pequena em relação ao valor (glitch) ou a órbita de
+    referência acaba, o pixel é rebaseado para o início da órbita.
     """
 
+    import multiprocessing
+    import os
     import time
 
     start_time = time.perf_counter()
@@ -33,17 +72,59 @@ def mandelbrot_worker(chunk: List[int], metadata: Dict[str, Any]) -> Dict[str, A
     Y_MIN = metadata.get("y_min", -1.0)
     Y_MAX = metadata.get("y_max", 1.0)
     MAX_ITER = metadata.get("max_iter", 255)
+    REFERENCE_ORBIT = metadata.get("reference_orbit")
+
+    if REFERENCE_ORBIT is not None:
+        DOUBLED_ORBIT = [2 * value for value in REFERENCE_ORBIT]
+
+    def perturbed_row(y_pixel, columns):
+        orbit = REFERENCE_ORBIT
+        doubled = DOUBLED_ORBIT
+        last = len(orbit) - 1
+        span_x = metadata["span_x"]
+        # Distância ao centro (onde está a referência) em double: só a
+        # diferença precisa caber na precisão, não a coordenada
+        dc_y = (y_pixel / HEIGHT - 0.5) * metadata["span_y"]
+        row_colors = []
+        for x_pixel in columns:
+            dc = complex((x_pixel / WIDTH - 0.5) * span_x, dc_y)
+            dz = 0j
+            n = 0
+            iteration = 0
+            while iteration < MAX_ITER:
+                dz = (doubled[n] + dz) * dz + dc
+                n += 1
+                z = orbit[n] + dz
+                iteration += 1
+                magnitude = abs(z)
+                if magnitude > 2:
+                    break
+                if n == last or magnitude < abs(dz):
+                    dz = z
+                    n = 0
+            row_colors.append(iteration)
+        return row_colors
+
+    def compute_rows(rows):
+        rows_result = []
+        for row in rows:
+            if isinstance(row, int):
+                y_pixel, columns = row, range(WIDTH)
+            else:
+                y_pixel, first_column, column_step = row
+                columns = range(first_column, WIDTH, column_step)
+
+            if REFERENCE_ORBIT is not None:
+                rows_result.append((row, perturbed_row(y_pixel, columns)))
+                continue
 
-    results = []
-    try:
-        for y_pixel in chunk:
             # Converte a coordenada do pixel Y para a coordenada do plano complexo
             y0 = Y_MIN + (y_pixel / HEIGHT) * (Y_MAX - Y_MIN)
 
             row_colors = []
 
             # Itera sobre cada pixel X nesta linha
-            for x_pixel in range(WIDTH):
+            for x_pixel in columns:
                 x0 = X_MIN + (x_pixel / WIDTH) * (X_MAX - X_MIN)
 
                 # (Cálculo do Mandelbrot)
@@ -56,14 +137,77 @@ def mandelbrot_worker(chunk: List[int], metadata: Dict[str, Any]) -> Dict[str, A
 
                 row_colors.append(iteration)
 
-            results.append((y_pixel, row_colors))
+            rows_result.append((row, row_colors))
+        return rows_result
+
+    def compute_rows_in_parallel(cores):
+        # Com fork o filho herda compute_rows, que não precisa ser serializada
+        context = multiprocessing.get_context("fork")
+
+        def core_main(rows, connection):
+            core_start = time.perf_counter()
+            try:
+                rows_result = compute_rows(rows)
+                connection.send(("ok", rows_result, time.perf_counter() - core_start))
+            except Exception as e:
+                connection.send(("error", f"{type(e).__name__}: {e}", 0.0))
+            connection.close()
+
+        processes = []
+        for core in range(cores):
+            # Linhas intercaladas: o custo varia ao longo da imagem
+            rows = chunk[core::cores]
+            receiver, sender = context.Pipe(duplex=False)
+            process = context.Process(target=core_main, args=(rows, sender))
+            process.start()
+            sender.close()
+            processes.append((process, receiver, len(rows)))
+
+        rows_result = []
+        core_times = []
+        errors = []
+        for core, (process, receiver, row_count) in enumerate(processes):
+            try:
+                status, payload, core_time = receiver.recv()
+            except EOFError:
+                status, payload, core_time = "error", "processo encerrado", 0.0
+            process.join()
+            if status == "ok":
+                rows_result.extend(payload)
+            else:
+                errors.append(f"núcleo {core}: {payload}")
+            core_times.append({"core": core, "rows": row_count, "time": core_time})
+        if errors:
+            raise RuntimeError("; ".join(errors))
+        rows_result.sort(key=lambda row: row[0])
+        return rows_result, core_times
+
+    cores = metadata.get("cores", 1)
+    if cores == 0:
+        try:
+            cores = len(os.sched_getaffinity(0))
+        except AttributeError:
+            cores = os.cpu_count() or 1
+    if "fork" not in multiprocessing.get_all_start_methods():
+        cores = 1
+    cores = max(1, min(cores or 1, len(chunk)))
+
+    try:
+        core_times = None
+        if cores > 1:
+            results, core_times = compute_rows_in_parallel(cores)
+        else:
+            results = compute_rows(chunk)
 
         end_time = time.perf_counter()
-        return {
+        result = {
             "data": results,
             "time": end_time - start_time,
             "chunk_avg_time": (end_time - start_time) / len(results),
         }
+        if core_times is not None:
+            result["core_times"] = core_times
+        return result
 
     except Exception as e:
         print(
@@ -72,18 +216,471 @@ def mandelbrot_worker(chunk: List[int], metadata: Dict[str, Any]) -> Dict[str, A
         raise e
 
 
+def print_core_times(results: List[Any], prefix: str):
+    """
+    Resume o tempo de cada núcleo nas tarefas que dividiram as linhas entre
+    vários núcleos. O equilíbrio de uma tarefa é a média dos tempos dos seus
+    núcleos dividida pelo maior deles (1.0 = nenhum núcleo ocioso).
+    """
+    tasks = [
+        r["core_times"] for r in results if isinstance(r, dict) and r.get("core_times")
+    ]
+    if not tasks:
+        return
+    times = [core["time"] for task in tasks for core in task]
+    balances = []
+    for task in tasks:
+        slowest = max(core["time"] for core in task)
+        if slowest > 0:
+            balances.append(sum(core["time"] for core in task) / len(task) / slowest)
+    print(
+        f"\n[{prefix}] {len(times)} execuções por núcleo em {len(tasks)} tarefas "
+        f"(até {max(len(task) for task in tasks)} núcleos por tarefa)"
+    )
+    print(f"[{prefix}] Tempo médio por núcleo: {sum(times) / len(times):.4f}s")
+    print(f"[{prefix}] Tempo máximo de um núcleo: {max(times):.4f}s")
+    print(f"[{prefix}] Tempo mínimo de um núcleo: {min(times):.4f}s")
+    if balances:
+        print(
+            f"[{prefix}] Equilíbrio médio entre núcleos: {sum(balances) / len(balances):.2f}"
+        )
+
+
+def reference_orbit(
+    center_x: Decimal, center_y: Decimal, max_iter: int, digits: int
+) -> List[complex]:
+    """
+    Órbita Z(n+1) = Z(n)^2 + c no centro da imagem, calculada com `digits`
+    dígitos e guardada em double (só as diferenças para ela precisam de
+    precisão, e elas são pequenas). Para quando a órbita escapa.
+    """
+    orbit = [0j]
+    with decimal.localcontext() as context:
+        context.prec = digits
+        zx = Decimal(0)
+        zy = Decimal(0)
+        for _ in range(max_iter):
+            zx, zy = zx * zx - zy * zy + center_x, 2 * zx * zy + center_y
+            orbit.append(complex(float(zx), float(zy)))
+            if zx * zx + zy * zy > 4:
+                break
+    return orbit
+
+
+def build_task_metadata(
+    width: int,
+    height: int,
+    max_iter: int,
+    bounds: Sequence[str] = DEFAULT_BOUNDS,
+    deep_zoom: bool = False,
+) -> Dict[str, Any]:
+    """
+    Metadata do mandelbrot_worker. Com `deep_zoom`, os limites (x_min, x_max,
+    y_min, y_max, em texto para não perder precisão) definem o centro da
+    órbita de referência, calculada aqui, e o worker usa perturbação.
+    """
+    task_metadata = {"width": width, "height": height, "max_iter": max_iter}
+    if not deep_zoom:
+        x_min, x_max, y_min, y_max = (float(value) for value in bounds)
+        task_metadata.update(x_min=x_min, x_max=x_max, y_min=y_min, y_max=y_max)
+        return task_metadata
+
+    x_min, x_max, y_min, y_max = (Decimal(value) for value in bounds)
+    span_x = x_max - x_min
+    span_y = y_max - y_min
+    # Dígitos para distinguir pixels vizinhos, com folga
+    pixel_size = min(span_x / width, span_y / height)
+    digits = max(20, -pixel_size.adjusted() + 20)
+    with decimal.localcontext() as context:
+        context.prec = digits
+        center_x = (x_min + x_max) / 2
+        center_y = (y_min + y_max) / 2
+
+    start_time = time.perf_counter()
+    orbit = reference_orbit(center_x, center_y, max_iter, digits)
+    print(
+        f"[Master] Órbita de referência com {digits} dígitos: {len(orbit) - 1} iterações "
+        f"em {time.perf_counter() - start_time:.4f} segundos"
+    )
+    task_metadata.update(
+        x_min=str(x_min),
+        x_max=str(x_max),
+        y_min=str(y_min),
+        y_max=str(y_max),
+        span_x=float(span_x),
+        span_y=float(span_y),
+        reference_orbit=orbit,
+    )
+    return task_metadata
+
+
+def tune_lines_per_task(
+    task_metadata: Dict[str, Any], tuning_file: str, retune: bool = False
+) -> int:
+    """Escolhe o número de linhas por tarefa com ensaios curtos nos endpoints."""
+    height = task_metadata["height"]
+
+    def make_chunk(size: int) -> List[int]:
+        # Linhas espalhadas pela imagem, para que o custo médio seja o do todo
+        return [i * height // size for i in range(min(size, height))]
+
+    with GlobusComputeCloudManager() as cloud_manager:
+        endpoint_ids = list(cloud_manager.available_endpoint_ids)
+    return tune_chunk_size(
+        "mandelbrot",
+        f"{task_metadata['width']}x{height}@{task_metadata['max_iter']}",
+        height,
+        endpoint_ids,
+        mandelbrot_worker,
+        make_chunk,
+        task_metadata,
+        path=tuning_file,
+        retune=retune,
+    )
+
+
+def write_row_bands(writer: StripPNGWriter, rows: List[Any]) -> int:
+    """
+    Entrega ao StripPNGWriter as linhas de um resultado, agrupadas em faixas
+    de linhas consecutivas.
+
+    Returns:
+        int: Número de linhas entregues.
+    """
+    band_start = 0
+    band: List[bytes] = []
+    for y, iterations in rows:
+        if band and y != band_start + len(band):
+            writer.add_rows(band_start, band)
+            band = []
+        if not band:
+            band_start = y
+        band.append(gray_to_rgb(bytes(255 - (i % 256) for i in iterations)))
+    if band:
+        writer.add_rows(band_start, band)
+    return len(rows)
+
+
+def progressive_passes(
+    width: int, height: int, step: int
+) -> List[Tuple[int, List[Tuple[int, int, int]]]]:
+    """
+    Passos do modo progressivo. O primeiro calcula os pixels com x e y
+    múltiplos de `step` (potência de 2); cada refinamento, com a metade do
+    passo anterior, calcula só os pixels da nova grade que ainda faltam, de
+    modo que cada pixel é calculado uma única vez.
+
+    Returns:
+        list: (passo da grade, itens (linha, primeira coluna, passo)) de cada
+              passo, do mais grosso ao final (passo 1).
+    """
+    passes = [(step, [(y, 0, step) for y in range(0, height, step)])]
+    current = step
+    while current > 1:
+        previous, current = current, current // 2
+        rows = []
+        for y in range(0, height, current):
+            if y % previous == 0:
+                # A linha já tem as colunas múltiplas de `previous`
+                rows.append((y, current, previous))
+            else:
+                rows.append((y, 0, current))
+        passes.append((current, rows))
+    return passes
+
+
+def store_shades(shades: bytearray, width: int, rows: List[Any]):
+    """Grava o tom de cinza de cada pixel calculado no buffer da imagem."""
+    for (y, first_column, column_step), iterations in rows:
+        start = y * width
+        shades[start + first_column : start + width : column_step] = bytes(
+            255 - (iteration % 256) for iteration in iterations
+        )
+
+
+def preview_image(shades: bytearray, width: int, height: int, step: int) -> Any:
+    """
+    Imagem com os pixels da grade `step`, cada um repetido no bloco
+    step x step que ele representa. Com step 1 é a imagem final.
+    """
+    if step == 1:
+        return Image.frombytes("L", (width, height), bytes(shades)).convert("RGB")
+    coarse = b"".join(
+        shades[y * width : (y + 1) * width : step] for y in range(0, height, step)
+    )
+    coarse_size = (-(-width // step), -(-height // step))
+    return (
+        Image.frombytes("L", coarse_size, coarse)
+        .resize((width, height), Image.NEAREST, box=(0, 0, width / step, height / step))
+        .convert("RGB")
+    )
+
+
+def render_progressive(
+    output_filename: str,
+    task_metadata: Dict[str, Any],
+    lines_per_task: int,
+    step: int,
+    make_master: Callable[[Any, int], Any],
+) -> Optional[Dict[str, Any]]:
+    """
+    Renderiza em passos de resolução crescente (progressive_passes), salvando
+    uma prévia ao fim de cada passo e a imagem completa no último.
+
+    Args:
+        step (int): Passo da grade do primeiro passo (arredondado para a
+                    próxima potência de 2).
+        make_master: Cria o Master de um passo, dado o cloud manager e o
+                     número de linhas por tarefa.
+
+    Returns:
+        dict: Métricas da execução, com o tempo até a primeira prévia.
+    """
+    width = task_metadata["width"]
+    height = task_metadata["height"]
+    step = 1 << max(0, (step - 1).bit_length())
+    passes = progressive_passes(width, height, step)
+    root, ext = os.path.splitext(output_filename)
+    preview_filename = f"{root}.preview{ext}"
+
+    print(
+        f"[Progressivo] {len(passes)} passos, da grade {step}x{step} até a imagem completa; "
+        f"prévias em '{preview_filename}'"
+    )
+
+    shades = bytearray(width * height)
+    records = []
+    task_times = []
+    task_statuses = {}
+    results = []
+    computed_pixels = 0
+    payload_bytes = 0
+    first_preview_time = None
+
+    start_time = time.perf_counter()
+    with GlobusComputeCloudManager() as cloud_manager:
+        for number, (pass_step, rows) in enumerate(passes):
+            # As linhas dos passos grossos têm menos colunas: mais linhas por
+            # tarefa mantêm o número de pixels por tarefa
+            items_per_chunk = lines_per_task * pass_step
+            master = make_master(cloud_manager, items_per_chunk)
+
+            pass_start = time.perf_counter()
+            pass_results = master.run(
+                data_input=rows,
+                user_function=mandelbrot_worker,
+                metadata=task_metadata,
+            )
+            run_time = time.perf_counter() - pass_start
+
+            rows_done = 0
+            pixels = 0
+            for r in pass_results:
+                if not isinstance(r, dict) or "data" not in r:
+                    continue
+                store_shades(shades, width, r["data"])
+                rows_done += len(r["data"])
+                pixels += sum(len(colors) for _, colors in r["data"])
+                task_times.append(r.get("time", 0))
+            computed_pixels += pixels
+            results.extend(pass_results)
+            for key, status in master.get_task_statuses().items():
+                task_statuses[f"{number}:{key}"] = status
+            payload_bytes += chunk_payload_bytes(rows, items_per_chunk, task_metadata)
+
+            image = preview_image(shades, width, height, pass_step)
+            image.save(output_filename if pass_step == 1 else preview_filename)
+            elapsed = time.perf_counter() - start_time
+            if first_preview_time is None:
+                first_preview_time = elapsed
+            records.append(
+                {
+                    "step": pass_step,
+                    "rows": len(rows),
+                    "pixels": pixels,
+                    "run_time": run_time,
+                    "elapsed": elapsed,
+                }
+            )
+            print(
+                f"[Progressivo] Passo {number} (grade {pass_step}): {pixels:,} pixels "
+                f"em {run_time:.4f}s; imagem salva aos {elapsed:.4f}s"
+            )
+            if rows_done < len(rows):
+                print(
+                    f"AVISO: {len(rows) - rows_done} linhas do passo {number} ficaram sem cálculo."
+                )
+    end_time = time.perf_counter()
+
+    if not computed_pixels:
+        print("Nenhuma tarefa foi concluída com sucesso. Imagem não pode ser gerada.")
+        return None
+
+    print(
+        f"\n{'passo':>6} {'grade':>6} {'linhas':>7} {'pixels':>12} {'tempo':>9} {'salvo aos':>10}"
+    )
+    for number, record in enumerate(records):
+        print(
+            f"{number:>6} {record['step']:>6} {record['rows']:>7} {record['pixels']:>12,} "
+            f"{record['run_time']:>8.4f}s {record['elapsed']:>9.4f}s"
+        )
+    print(f"\nImagem salva com sucesso em '{output_filename}'")
+    print(
+        f"[Progressivo] Primeira prévia em {first_preview_time:.4f}s; "
+        f"imagem completa em {end_time - start_time:.4f}s"
+    )
+    print(
+        f"[Progressivo] {computed_pixels:,} pixels calculados para {width * height:,} "
+        f"pixels da imagem (nenhum recalculado)"
+    )
+    print_core_times(results, "Master")
+
+    return {
+        "run_time": end_time - start_time,
+        "first_preview_time": first_preview_time,
+        "passes": records,
+        "task_times": task_times,
+        "num_tasks": len(task_statuses),
+        "payload_bytes": payload_bytes,
+        "task_statuses": task_statuses,
+        "verified": computed_pixels == width * height,
+    }
+
+
+def build_job(
+    output_filename: str,
+    image_width: int,
+    image_height: int,
+    max_iterations: int,
+    lines_per_worker: int,
+    cores_per_task: Optional[int] = None,
+    bounds: Sequence[str] = DEFAULT_BOUNDS,
+    deep_zoom: bool = False,
+) -> Dict[str, Any]:
+    """
+    Job para o job_scheduler.py: entrada, função e metadata da renderização,
+    e `finish`, que grava o PNG com os resultados.
+    """
+    task_metadata = build_task_metadata(
+        image_width, image_height, max_iterations, bounds, deep_zoom
+    )
+    if cores_per_task is not None:
+        task_metadata["cores"] = cores_per_task
+
+    def finish(results: List[Any]):
+        with StripPNGWriter(output_filename, image_width, image_height) as writer:
+            rows = 0
+            for result in results:
+                if isinstance(result, dict) and "data" in result:
+                    rows += write_row_bands(writer, result["data"])
+        print(
+            f"[Mandelbrot] Imagem salva em '{output_filename}': "
+            f"{rows} de {image_height} linhas renderizadas."
+        )
+
+    return {
+        "data_input": list(range(image_height)),
+        "user_function": mandelbrot_worker,
+        "metadata": task_metadata,
+        "items_per_chunk": lines_per_worker,
+        "finish": finish,
+    }
+
+
 def main(
     output_filename: str,
     image_width: int,
     image_height: int,
     max_iterations: int,
     lines_per_worker: int,
-):
+    trace_file: Optional[str] = None,
+    profile_file: Optional[str] = None,
+    speculation_factor: Optional[float] = None,
+    max_outstanding: Optional[int] = None,
+    share_metadata: bool = False,
+    registry_file: Optional[str] = None,
+    tuning_file: Optional[str] = None,
+    retune: bool = False,
+    max_retries: int = 0,
+    collect_telemetry: bool = False,
+    cores_per_task: Optional[int] = None,
+    progressive_step: Optional[int] = None,
+    compare_single_pass: bool = False,
+    stream_buffer_mb: Optional[float] = None,
+    bounds: Sequence[str] = DEFAULT_BOUNDS,
+    deep_zoom: bool = False,
+) -> Optional[Dict[str, Any]]:
+    """
+    Renderiza o Mandelbrot via Globus Compute e salva a imagem.
+
+    Args:
+        trace_file (str): Se informado, rastreia cada tarefa e salva a linha do
+                          tempo (Chrome Trace) neste arquivo.
+        profile_file (str): Perfil de endpoint_profile.py; se informado, distribui
+                            a carga proporcionalmente à vazão de cada endpoint.
+        speculation_factor (float): Se informado, duplica em endpoints ociosos
+                                    as tarefas mais lentas que este múltiplo da
+                                    mediana; vale o primeiro resultado.
+        max_outstanding (int): Se informado, os chunks são entregues sob
+                               demanda, com no máximo este número de tarefas
+                               em andamento por endpoint, e encolhem no fim
+                               da execução.
+        share_metadata (bool): Se True, o metadata vai completo só na
+                               primeira tarefa de cada endpoint e as demais
+                               levam apenas uma referência ao conteúdo.
+        registry_file (str): Se informado, reaproveita o ID da função
+                             registrado em execuções anteriores (cache em
+                             function_registry.py).
+        tuning_file (str): Se informado, ignora `lines_per_worker` e usa o
+                           número de linhas por tarefa ajustado por
+                           chunk_tuner.py (salvo neste arquivo).
+        retune (bool): Refaz os ensaios mesmo que haja um ajuste salvo.
+        max_retries (int): Resubmissões permitidas para cada chunk que falhar.
+        collect_telemetry (bool): Se True, cada worker devolve a telemetria de
+                                  recursos (CPU, memória, E/S), resumida por
+                                  endpoint no fim da execução.
+        cores_per_task (int): Se informado, cada tarefa divide as suas linhas
+                              entre este número de núcleos do worker (0 usa
+                              todos os núcleos do host).
+        progressive_step (int): Se informado, renderiza primeiro uma grade com
+                                um pixel a cada `progressive_step` linhas e
+                                colunas, salva uma prévia e refina em passos
+                                que só calculam os pixels que faltam.
+        compare_single_pass (bool): No modo progressivo, renderiza também em
+                                    um único passo e mostra o custo extra.
+        stream_buffer_mb (float): Se informado, o PNG é gravado em faixas
+                                  conforme os resultados chegam
+                                  (strip_writer.py), sem montar a imagem em
+                                  memória; as faixas fora de ordem ocupam até
+                                  este número de MB antes de irem para disco.
+        bounds (list): x_min, x_max, y_min, y_max da região renderizada, em
+                       texto (com precisão arbitrária no modo deep zoom).
+        deep_zoom (bool): Se True, os workers calculam por perturbação em
+                          torno de uma órbita de referência de alta precisão,
+                          o que permite zooms além da precisão do double. O
+                          metadata (com a órbita) vai uma vez por endpoint.
+
+    Returns:
+        dict: Métricas da execução (usadas pelo benchmark.py), ou None se
+              nenhuma tarefa foi concluída.
+    """
     IMAGE_WIDTH = image_width
     IMAGE_HEIGHT = image_height
     MAX_ITERATIONS = max_iterations
     LINES_PER_TASK = lines_per_worker
 
+    task_metadata = build_task_metadata(
+        IMAGE_WIDTH, IMAGE_HEIGHT, MAX_ITERATIONS, bounds, deep_zoom
+    )
+    if cores_per_task is not None:
+        task_metadata["cores"] = cores_per_task
+
+    if deep_zoom:
+        share_metadata = True
+
+    if tuning_file:
+        LINES_PER_TASK = tune_lines_per_task(task_metadata, tuning_file, retune)
+
     total_tasks = (IMAGE_HEIGHT + LINES_PER_TASK - 1) // LINES_PER_TASK
 
     print(f"Iniciando renderização de Mandelbrot ({IMAGE_WIDTH}x{IMAGE_HEIGHT})...")
@@ -92,19 +689,95 @@ def main(
 
     tasks_to_run = list(range(IMAGE_HEIGHT))
 
-    task_metadata = {
-        "width": IMAGE_WIDTH,
-        "height": IMAGE_HEIGHT,
-        "max_iter": MAX_ITERATIONS,
-        "x_min": -2.0,
-        "x_max": 1.0,
-        "y_min": -1.0,
-        "y_max": 1.0,
-    }
+    tracer = TaskTracer() if trace_file else None
+    telemetry = TelemetryCollector() if collect_telemetry else None
+    weights = load_weights(profile_file) if profile_file else None
+    function_registry = FunctionRegistry(registry_file) if registry_file else None
+
+    def make_master(cloud_manager, items_per_chunk, on_result=None):
+        return create_master(
+            cloud_manager,
+            items_per_chunk=items_per_chunk,
+            tracer=tracer,
+            weights=weights,
+            speculation_factor=speculation_factor,
+            max_outstanding=max_outstanding,
+            share_metadata=share_metadata,
+            function_registry=function_registry,
+            max_retries=max_retries,
+            telemetry=telemetry,
+            on_result=on_result,
+        )
+
+    if progressive_step:
+        metrics = render_progressive(
+            output_filename,
+            task_metadata,
+            LINES_PER_TASK,
+            progressive_step,
+            make_master,
+        )
+        if metrics is None:
+            return None
+        if tracer:
+            tracer.print_phase_table()
+            tracer.export_chrome_trace(trace_file)
+        if telemetry:
+            telemetry.print_summary()
+        metrics["phases"] = tracer.summary() if tracer else None
+        metrics["telemetry"] = telemetry.summary() if telemetry else None
+
+        if compare_single_pass:
+            root, ext = os.path.splitext(output_filename)
+            print("\n--- RENDERIZAÇÃO EM UM PASSO (comparação) ---")
+            single_pass = main(
+                f"{root}.single{ext}",
+                IMAGE_WIDTH,
+                IMAGE_HEIGHT,
+                MAX_ITERATIONS,
+                LINES_PER_TASK,
+                profile_file=profile_file,
+                speculation_factor=speculation_factor,
+                max_outstanding=max_outstanding,
+                share_metadata=share_metadata,
+                registry_file=registry_file,
+                max_retries=max_retries,
+                cores_per_task=cores_per_task,
+                bounds=bounds,
+                deep_zoom=deep_zoom,
+            )
+            if single_pass:
+                metrics["single_pass_time"] = single_pass["run_time"]
+                print(
+                    f"\n[Progressivo] Um passo: {single_pass['run_time']:.4f}s; "
+                    f"progressivo: primeira prévia em {metrics['first_preview_time']:.4f}s "
+                    f"({metrics['first_preview_time'] / single_pass['run_time']:.1%} do tempo), "
+                    f"imagem completa em {metrics['run_time']:.4f}s "
+                    f"(custo extra de {metrics['run_time'] - single_pass['run_time']:+.4f}s, "
+                    f"{metrics['run_time'] / single_pass['run_time'] - 1:+.1%})"
+                )
+        return metrics
+
+    writer = None
+    on_result = None
+    if stream_buffer_mb is not None:
+        writer = StripPNGWriter(
+            output_filename,
+            IMAGE_WIDTH,
+            IMAGE_HEIGHT,
+            max_buffer_bytes=int(stream_buffer_mb * 1024 * 1024),
+        )
+
+        def write_result(_, result):
+            # As linhas vão para o PNG e saem do resultado guardado
+            if isinstance(result, dict) and "data" in result:
+                result["rows_written"] = write_row_bands(writer, result.pop("data"))
+            return result
+
+        on_result = write_result
 
     with GlobusComputeCloudManager() as cloud_manager:
-        strategy = ListDistributionStrategy(items_per_chunk=LINES_PER_TASK)
-        master = Master(cloud_manager, distribution_strategy=strategy)
+        master = make_master(cloud_manager, LINES_PER_TASK, on_result)
 
         start_time = time.perf_counter()
 
@@ -122,43 +795,61 @@ def main(
         successful_chunks = []
         execution_times = []
         chunk_avg_times = []
+        rows_written = 0
         for r in results:
             if not isinstance(r, dict):
                 print(f"ERRO: Resultado não reconhecido: {r}")
                 continue
             if "data" in r:
                 successful_chunks.append(r["data"])
+            rows_written += r.get("rows_written", 0)
             if "time" in r:
                 execution_times.append(r["time"])
             if "chunk_avg_time" in r:
                 chunk_avg_times.append(r["chunk_avg_time"])
 
-        successful_rows = []
-        for chunk_result in successful_chunks:
-            successful_rows.extend(chunk_result)
-
-        if not successful_rows:
+        if writer:
+            writer.close()
+            rows_rendered = rows_written
             print(
-                "Nenhuma tarefa foi concluída com sucesso. Imagem não pode ser gerada."
+                f"\n[Master] PNG gravado em faixas: buffer de no máximo "
+                f"{writer.stats['peak_buffer_bytes'] / (1024 * 1024):.2f} MB, "
+                f"{writer.stats['spilled_bytes'] / (1024 * 1024):.2f} MB despejados em disco"
             )
-            return
+        else:
+            successful_rows = []
+            for chunk_result in successful_chunks:
+                successful_rows.extend(chunk_result)
+
+            if not successful_rows:
+                print(
+                    "Nenhuma tarefa foi concluída com sucesso. Imagem não pode ser gerada."
+                )
+                return
 
-        successful_rows.sort(key=lambda x: x[0])
+            successful_rows.sort(key=lambda x: x[0])
 
-        img = Image.new("RGB", (IMAGE_WIDTH, IMAGE_HEIGHT), color="black")
-        pixels = img.load()
-        if not pixels:
-            print("Erro: A imagem não pode ser gerada.")
-            return
+            img = Image.new("RGB", (IMAGE_WIDTH, IMAGE_HEIGHT), color="black")
+            pixels = img.load()
+            if not pixels:
+                print("Erro: A imagem não pode ser gerada.")
+                return
 
-        for y, row_data in successful_rows:
-            for x, iterations in enumerate(row_data):
-                color_value = 255 - (iterations % 256)
-                pixels[x, y] = (color_value, color_value, color_value)
+            for y, row_data in successful_rows:
+                for x, iterations in enumerate(row_data):
+                    color_value = 255 - (iterations % 256)
+                    pixels[x, y] = (color_value, color_value, color_value)
+
+            img.save(output_filename)
+            rows_rendered = len(successful_rows)
 
-        img.save(output_filename)
         print(f"\nImagem salva com sucesso em '{output_filename}'")
-        print(f"Total de {len(successful_rows)} linhas renderizadas.")
+        print(f"Total de {rows_rendered} linhas renderizadas.")
+        missing_rows = IMAGE_HEIGHT - rows_rendered
+        if missing_rows:
+            print(
+                f"AVISO: {missing_rows} linhas ausentes ficaram em preto; use --retries para resubmeter os chunks que falharem."
+            )
 
         if execution_times:
             print(
@@ -184,8 +875,31 @@ def main(
             )
             print("[Master] Chunk average times:", chunk_avg_times)
 
+        print_core_times(results, "Master")
+
         print("\n" + "-" * 15 + " Status das Tarefas " + "-" * 15)
-        print(master.get_task_statuses())
+        task_statuses = master.get_task_statuses()
+        print(task_statuses)
+
+        if tracer:
+            tracer.print_phase_table()
+            tracer.export_chrome_trace(trace_file)
+        if telemetry:
+            telemetry.print_summary()
+
+        return {
+            "run_time": end_time - start_time,
+            "task_times": execution_times,
+            # No modo dinâmico o número de chunks só é conhecido no fim
+            "num_tasks": len(task_statuses) if max_outstanding else total_tasks,
+            "payload_bytes": chunk_payload_bytes(
+                tasks_to_run, LINES_PER_TASK, task_metadata
+            ),
+            "task_statuses": task_statuses,
+            "verified": rows_rendered == IMAGE_HEIGHT,
+            "phases": tracer.summary() if tracer else None,
+            "telemetry": telemetry.summary() if telemetry else None,
+        }
 
 
 def main_local(
@@ -194,6 +908,9 @@ def main_local(
     image_height: int,
     max_iterations: int,
     lines_per_worker: int,
+    cores_per_task: Optional[int] = None,
+    bounds: Sequence[str] = DEFAULT_BOUNDS,
+    deep_zoom: bool = False,
 ):
     """
     Executa o cálculo do Mandelbrot localmente, sem o Globus Compute.
@@ -213,15 +930,11 @@ def main_local(
 
     tasks_to_run = list(range(IMAGE_HEIGHT))
 
-    task_metadata = {
-        "width": IMAGE_WIDTH,
-        "height": IMAGE_HEIGHT,
-        "max_iter": MAX_ITERATIONS,
-        "x_min": -2.0,
-        "x_max": 1.0,
-        "y_min": -1.0,
-        "y_max": 1.0,
-    }
+    task_metadata = build_task_metadata(
+        IMAGE_WIDTH, IMAGE_HEIGHT, MAX_ITERATIONS, bounds, deep_zoom
+    )
+    if cores_per_task is not None:
+        task_metadata["cores"] = cores_per_task
 
     print("[Local] Iniciando processamento local...")
     start_time = time.perf_counter()
@@ -311,6 +1024,8 @@ def main_local(
         )
         print("[Local] Chunk average times:", chunk_avg_times)
 
+    print_core_times(results, "Local")
+
     print("\n[Local] Execução local concluída.")
 
 
@@ -343,13 +1058,142 @@ if __name__ == "__main__":
         help="Número de linhas de pixel a serem agrupadas em cada tarefa (chunk).",
     )
 
+    parser.add_argument(
+        "--bounds",
+        type=str,
+        nargs=4,
+        default=list(DEFAULT_BOUNDS),
+        metavar=("X_MIN", "X_MAX", "Y_MIN", "Y_MAX"),
+        help="Região do plano complexo; aceita qualquer número de dígitos com --deep_zoom",
+    )
+    parser.add_argument(
+        "--deep_zoom",
+        action="store_true",
+        help="Calcula por perturbação em torno de uma órbita de referência de alta precisão (zooms além de ~1e-13)",
+    )
+    parser.add_argument(
+        "--cores",
+        type=int,
+        nargs="?",
+        const=0,
+        default=None,
+        help="Divide as linhas de cada tarefa entre CORES núcleos do worker (sem valor: todos os núcleos do host)",
+    )
+    parser.add_argument(
+        "--progressive",
+        type=int,
+        nargs="?",
+        const=DEFAULT_PROGRESSIVE_STEP,
+        default=None,
+        metavar="STEP",
+        help=f"Salva primeiro uma prévia com um pixel a cada STEP linhas e colunas e refina sem recalcular pixels (padrão: {DEFAULT_PROGRESSIVE_STEP})",
+    )
+    parser.add_argument(
+        "--stream",
+        type=float,
+        nargs="?",
+        const=DEFAULT_STREAM_BUFFER_MB,
+        default=None,
+        metavar="BUFFER_MB",
+        help=f"Grava o PNG em faixas conforme as linhas chegam, com até BUFFER_MB de faixas fora de ordem em memória (padrão: {DEFAULT_STREAM_BUFFER_MB})",
+    )
+    parser.add_argument(
+        "--compare_single_pass",
+        action="store_true",
+        help="Com --progressive, renderiza também em um passo e mostra o custo extra",
+    )
+    parser.add_argument(
+        "--tune",
+        type=str,
+        nargs="?",
+        const=DEFAULT_TUNING_PATH,
+        default=None,
+        metavar="TUNING",
+        help=f"Ignora --lines e usa o valor ajustado por ensaios nos endpoints (salvo em {DEFAULT_TUNING_PATH})",
+    )
+    parser.add_argument(
+        "--retune",
+        action="store_true",
+        help="Com --tune, refaz os ensaios mesmo que haja um ajuste salvo",
+    )
+
     parser.add_argument(
         "--run_local",
         action="store_true",
         help="Se presente, executa o script localmente",
     )
 
+    parser.add_argument(
+        "--trace",
+        type=str,
+        default=None,
+        help="Arquivo JSON (Chrome Trace) para a linha do tempo de cada tarefa",
+    )
+
+    parser.add_argument(
+        "--weighted",
+        type=str,
+        nargs="?",
+        const=DEFAULT_PROFILE_PATH,
+        default=None,
+        help=f"Dimensiona os chunks pela vazão de cada endpoint (perfil padrão: {DEFAULT_PROFILE_PATH})",
+    )
+
+    parser.add_argument(
+        "--speculative",
+        type=float,
+        nargs="?",
+        const=DEFAULT_SPECULATION_FACTOR,
+        default=None,
+        metavar="FACTOR",
+        help=f"Duplica em endpoints ociosos as tarefas mais lentas que FACTOR vezes a mediana (padrão: {DEFAULT_SPECULATION_FACTOR})",
+    )
+
+    parser.add_argument(
+        "--share_metadata",
+        action="store_true",
+        help="Envia o metadata uma vez por endpoint; as demais tarefas levam só o hash",
+    )
+
+    parser.add_argument(
+        "--register_functions",
+        type=str,
+        nargs="?",
+        const=DEFAULT_REGISTRY_PATH,
+        default=None,
+        metavar="REGISTRY",
+        help=f"Reaproveita o ID da função registrado em execuções anteriores (cache padrão: {DEFAULT_REGISTRY_PATH})",
+    )
+
+    parser.add_argument(
+        "--retries",
+        type=int,
+        nargs="?",
+        const=DEFAULT_MAX_RETRIES,
+        default=0,
+        metavar="N",
+        help=f"Resubmete até N vezes, com backoff e em outro endpoint, os chunks que falharem (padrão: {DEFAULT_MAX_RETRIES})",
+    )
+
+    parser.add_argument(
+        "--telemetry",
+        action="store_true",
+        help="Coleta CPU, memória e E/S de cada tarefa e resume por endpoint",
+    )
+
+    parser.add_argument(
+        "--dynamic",
+        type=int,
+        nargs="?",
+        const=DEFAULT_MAX_OUTSTANDING,
+        default=None,
+        metavar="MAX_OUTSTANDING",
+        help=f"Entrega os chunks sob demanda, com até MAX_OUTSTANDING tarefas por endpoint (padrão: {DEFAULT_MAX_OUTSTANDING})",
+    )
+
     args = parser.parse_args()
+    if args.stream is not None and (args.progressive or args.run_local):
+        parser.error("--stream não pode ser usado com --progressive ou --run_local")
 
     try:
         if args.run_local:
@@ -359,6 +1203,9 @@ if __name__ == "__main__":
                 image_height=args.height,
                 max_iterations=args.iter,
                 lines_per_worker=args.lines,
+                cores_per_task=args.cores,
+                bounds=args.bounds,
+                deep_zoom=args.deep_zoom,
             )
         else:
             main(
@@ -367,6 +1214,22 @@ if __name__ == "__main__":
                 image_height=args.height,
                 max_iterations=args.iter,
                 lines_per_worker=args.lines,
+                trace_file=args.trace,
+                profile_file=args.weighted,
+                speculation_factor=args.speculative,
+                max_outstanding=args.dynamic,
+                share_metadata=args.share_metadata,
+                registry_file=args.register_functions,
+                tuning_file=args.tune,
+                retune=args.retune,
+                max_retries=args.retries,
+                collect_telemetry=args.telemetry,
+                cores_per_task=args.cores,
+                progressive_step=args.progressive,
+                compare_single_pass=args.compare_single_pass,
+                stream_buffer_mb=args.stream,
+                bounds=args.bounds,
+                deep_zoom=args.deep_zoom,
             )
     except Exception as e:
         print("\nERRO: Uma falha inesperada ocorreu durante a execução:")
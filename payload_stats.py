@@ -0,0 +1,21 @@
+"""
+Medição do tamanho serializado dos payloads enviados aos workers.
+"""
+
+from typing import Any, Sequence
+
+import cloudpickle
+
+
+def chunk_payload_bytes(
+    data_input: Sequence[Any], items_per_chunk: int, metadata: Any = None
+) -> int:
+    """
+    Soma o tamanho serializado (cloudpickle) de cada tarefa (chunk, metadata)
+    que a ListDistributionStrategy gera a partir de `data_input`.
+    """
+    total = 0
+    for start in range(0, len(data_input), max(1, items_per_chunk)):
+        chunk = list(data_input[start : start + items_per_chunk])
+        total += len(cloudpickle.dumps((chunk, metadata)))
+    return total
@@ -61,6 +61,9 @@ if [ $INSTALL_ENDPOINT -eq 1 ]; then
     echo "--- Configuração do Worker concluída ---"
     echo "Para configurar o endpoint, ative o venv ($ source $VENV_DIR/bin/activate) e execute:"
     echo "globus-compute-endpoint configure SEU_NOME_DE_ENDPOINT"
+    echo "Os workers importam módulos deste repositório (ex: drive_transfer.py)."
+    echo "Adicione ao worker_init do config.yaml do endpoint:"
+    echo "  export PYTHONPATH=$(pwd):\$PYTHONPATH"
 
 else
     SUBMODULE_REQ_FILE="mwfaas/requirements.txt"
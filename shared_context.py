@@ -0,0 +1,114 @@
+"""
+Envio único do metadata compartilhado pelas tarefas de uma execução.
+
+Em vez de mandar o metadata completo com cada chunk, o Master manda o conteúdo
+só nas primeiras tarefas de cada endpoint e, nas demais, apenas o hash do
+conteúdo. O worker guarda o metadata em um cache do processo, indexado pelo
+hash. Se uma tarefa com referência cair em um processo que ainda não tem o
+conteúdo, o worker devolve um aviso e o Master reenvia a tarefa com o metadata
+completo.
+
+O cache de cada processo guarda só os MAX_CACHED_CONTEXTS metadatas usados mais
+recentemente, para que workers de vida longa não acumulem os metadatas (tokens,
+órbitas de referência) de todas as execuções anteriores.
+"""
+
+import hashlib
+from typing import Any, Callable, Dict, Tuple
+
+import cloudpickle
+
+CONTEXT_MISSING_KEY = "__context_missing__"
+
+# Tarefas de cada endpoint que levam o metadata completo antes das referências
+DEFAULT_PRIME_TASKS = 1
+
+# Metadatas mantidos no cache de cada processo do worker
+MAX_CACHED_CONTEXTS = 4
+
+
+def with_shared_context(user_function: Callable) -> Callable:
+    """
+    Envolve a função do worker para que receba um envelope {'key', 'value'}
+    no lugar do metadata e o resolva pelo cache do processo.
+    """
+
+    max_cached = MAX_CACHED_CONTEXTS
+
+    def shared_context_worker(chunk, envelope):
+        import builtins
+
+        cache = getattr(builtins, "_mwfaas_shared_context", None)
+        if cache is None:
+            cache = builtins._mwfaas_shared_context = {}
+
+        key = envelope["key"]
+        if "value" in envelope:
+            cache[key] = envelope["value"]
+        elif key not in cache:
+            return {"__context_missing__": key}
+        # Ordem de inserção do dict como LRU: o usado vai para o fim e os mais
+        # antigos saem quando o cache passa do limite
+        value = cache.pop(key)
+        cache[key] = value
+        while len(cache) > max_cached:
+            del cache[next(iter(cache))]
+        return user_function(chunk, value)
+
+    return shared_context_worker
+
+
+def is_context_missing(result: Any) -> bool:
+    return isinstance(result, dict) and CONTEXT_MISSING_KEY in result
+
+
+class ContextBroadcaster:
+    """
+    Decide, por endpoint, se a tarefa leva o metadata completo ou só a
+    referência, e contabiliza os bytes economizados.
+    """
+
+    def __init__(self, metadata: Any, prime_tasks: int = DEFAULT_PRIME_TASKS):
+        payload = cloudpickle.dumps(metadata)
+        self.key = hashlib.sha256(payload).hexdigest()
+        self.full_envelope = {"key": self.key, "value": metadata}
+        self.ref_envelope = {"key": self.key}
+        self.full_bytes = len(cloudpickle.dumps(self.full_envelope))
+        self.ref_bytes = len(cloudpickle.dumps(self.ref_envelope))
+        self.metadata_bytes = len(payload)
+        self.prime_tasks = prime_tasks
+        self.full_sent: Dict[str, int] = {}
+        self.stats = {"full": 0, "ref": 0, "resent": 0}
+
+    def envelope(self, endpoint_id: str, force_full: bool = False) -> Dict[str, Any]:
+        if force_full:
+            self.stats["resent"] += 1
+            return self.full_envelope
+        if self.full_sent.get(endpoint_id, 0) >= self.prime_tasks:
+            self.stats["ref"] += 1
+            return self.ref_envelope
+        self.full_sent[endpoint_id] = self.full_sent.get(endpoint_id, 0) + 1
+        self.stats["full"] += 1
+        return self.full_envelope
+
+    def bytes_saved(self) -> Tuple[int, int]:
+        """
+        Returns:
+            tuple: (bytes que o metadata ocuparia enviado em toda tarefa,
+                    bytes economizados descontando os reenvios).
+        """
+        tasks = self.stats["full"] + self.stats["ref"]
+        baseline = tasks * self.metadata_bytes
+        sent = (
+            self.stats["full"] + self.stats["resent"]
+        ) * self.full_bytes + self.stats["ref"] * self.ref_bytes
+        return baseline, baseline - sent
+
+    def report(self):
+        baseline, saved = self.bytes_saved()
+        print(
+            f"[Dispatcher] Metadata compartilhado ({self.metadata_bytes / 1024:.1f} KB): "
+            f"{self.stats['full']} envios completos, {self.stats['ref']} referências, "
+            f"{self.stats['resent']} reenvios; {saved / 1024:.1f} KB economizados "
+            f"de {baseline / 1024:.1f} KB"
+        )
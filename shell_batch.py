@@ -0,0 +1,255 @@
+"""
+Execução em lote de programas nativos nos endpoints via ShellFunction.
+
+O external_function.py submete um comando e espera o resultado. Aqui uma lista
+de comandos é distribuída entre todos os endpoints e submetida de uma vez; a
+saída, o código de retorno e o tempo de cada comando são mostrados assim que
+ele termina. Uma única ShellFunction ("{command}") é registrada por Executor e
+cada comando vai como argumento, em vez de uma função registrada por comando.
+
+A função main() segue a interface dos workloads, então lotes de comandos podem
+ser medidos pelo benchmark.py (workload "shell").
+
+Uso:
+    python shell_batch.py "go run generate_json.go -mb 10 -o /tmp/d1.json" \\
+        "go run generate_json.go -mb 10 -o /tmp/d2.json"
+    python shell_batch.py --commands_file comandos.txt --walltime 600
+"""
+
+import argparse
+import sys
+import time
+from concurrent.futures import as_completed
+from typing import Any, Callable, Dict, List, Optional, Sequence, Union
+
+from globus_compute_sdk import Executor, ShellFunction
+
+from distribution import create_distribution
+from endpoint_profile import DEFAULT_PROFILE_PATH, load_weights
+from endpoints import label_endpoint
+from mwfaas.globus_compute_manager import GlobusComputeCloudManager
+
+DEFAULT_SNIPPET_LINES = 1000
+
+
+def read_commands(path: str) -> List[str]:
+    """Um comando por linha; linhas vazias e começadas por '#' são ignoradas."""
+    with open(path, "r") as f:
+        lines = [line.strip() for line in f]
+    return [line for line in lines if line and not line.startswith("#")]
+
+
+def print_command_result(record: Dict[str, Any]):
+    print(
+        f"[Shell] #{record['index']} em {label_endpoint(record['endpoint_id'])}: "
+        f"código {record['returncode']} em {record['time']:.2f}s: {record['cmd']}"
+    )
+    if record["error"]:
+        print(f"    erro: {record['error']}")
+    for stream in ("stdout", "stderr"):
+        text = (record[stream] or "").rstrip()
+        if text:
+            print(f"    --- {stream} ---")
+            for line in text.splitlines():
+                print(f"    {line}")
+
+
+def run_shell_batch(
+    commands: Sequence[str],
+    endpoint_ids: Sequence[str],
+    walltime: Optional[float] = None,
+    snippet_lines: int = DEFAULT_SNIPPET_LINES,
+    weights: Optional[Dict[str, float]] = None,
+    on_complete: Optional[Callable[[Dict[str, Any]], None]] = print_command_result,
+) -> List[Dict[str, Any]]:
+    """
+    Submete todos os comandos ao mesmo tempo e chama `on_complete` com o
+    registro de cada um conforme terminam.
+
+    Args:
+        commands (list): Linhas de comando a executar nos endpoints.
+        endpoint_ids (list): Endpoints disponíveis.
+        walltime (float): Tempo máximo de cada comando, em segundos.
+        snippet_lines (int): Linhas finais de stdout/stderr devolvidas.
+        weights (dict): Vazão relativa dos endpoints (endpoint_profile.py);
+                        os mais rápidos recebem mais comandos.
+
+    Returns:
+        list: Registro de cada comando (índice, endpoint, código de retorno,
+              stdout, stderr, tempo), na ordem da entrada.
+    """
+    shell_function = ShellFunction(
+        "{command}", walltime=walltime, snippet_lines=snippet_lines
+    )
+    distribution = create_distribution(1, weights, scale_chunks=False)
+    assignments = distribution.assign(list(commands), list(endpoint_ids))
+
+    executors = {e: Executor(endpoint_id=e) for e in endpoint_ids}
+    records: List[Dict[str, Any]] = []
+    try:
+        pending = {}
+        for index, (endpoint_id, chunk) in enumerate(assignments):
+            record = {
+                "index": index,
+                "cmd": chunk[0],
+                "endpoint_id": endpoint_id,
+                "submitted_at": time.time(),
+                "done_at": None,
+            }
+            future = executors[endpoint_id].submit(shell_function, command=chunk[0])
+
+            def on_done(_, record=record):
+                record["done_at"] = time.time()
+
+            future.add_done_callback(on_done)
+            pending[future] = record
+
+        for future in as_completed(pending):
+            record = pending[future]
+            record.update(returncode=None, stdout="", stderr="", error=None)
+            try:
+                result = future.result()
+                record["returncode"] = result.returncode
+                record["stdout"] = result.stdout
+                record["stderr"] = result.stderr
+                if result.exception_name:
+                    record["error"] = result.exception_name
+            except Exception as e:
+                record["error"] = f"{type(e).__name__}: {e}"
+            record["time"] = (record["done_at"] or time.time()) - record["submitted_at"]
+            records.append(record)
+            if on_complete:
+                on_complete(record)
+    finally:
+        for executor in executors.values():
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    return sorted(records, key=lambda r: r["index"])
+
+
+def print_summary(records: List[Dict[str, Any]]):
+    print(f"\n{'#':>4} {'endpoint':<12} {'código':>6} {'tempo':>9}  comando")
+    for record in records:
+        print(
+            f"{record['index']:>4} {label_endpoint(record['endpoint_id']):<12} "
+            f"{str(record['returncode']):>6} {record['time']:>8.2f}s  {record['cmd']}"
+        )
+    failed = sum(1 for r in records if r["returncode"] != 0)
+    print(f"{len(records)} comandos, {failed} com falha")
+
+
+def main(
+    commands: Optional[Union[str, List[str]]] = None,
+    commands_file: Optional[str] = None,
+    walltime: Optional[float] = None,
+    snippet_lines: int = DEFAULT_SNIPPET_LINES,
+    profile_file: Optional[str] = None,
+) -> Optional[Dict[str, Any]]:
+    """
+    Executa um lote de comandos nos endpoints disponíveis.
+
+    Args:
+        commands (list): Comandos a executar. Uma string é tratada como um
+                         único comando: no benchmark.py,
+                         `--param commands="go run generate_json.go"` executa
+                         um comando por configuração (a vírgula separa
+                         configurações); para vários comandos por execução,
+                         use `--param commands_file=comandos.txt`.
+        commands_file (str): Arquivo com um comando por linha (somado a
+                             `commands`).
+        walltime (float): Tempo máximo de cada comando, em segundos.
+        snippet_lines (int): Linhas finais de stdout/stderr devolvidas.
+        profile_file (str): Perfil de endpoint_profile.py; se informado, os
+                            endpoints mais rápidos recebem mais comandos.
+
+    Returns:
+        dict: Métricas da execução (usadas pelo benchmark.py), ou None se não
+              houver comandos.
+    """
+    if isinstance(commands, str):
+        commands = [commands]
+    commands = list(commands or [])
+    if commands_file:
+        commands.extend(read_commands(commands_file))
+    if not commands:
+        print("Nenhum comando informado.")
+        return None
+
+    weights = load_weights(profile_file) if profile_file else None
+    with GlobusComputeCloudManager(auto_authenticate=True) as cloud_manager:
+        endpoint_ids = list(cloud_manager.available_endpoint_ids)
+    if not endpoint_ids:
+        print("Erro: nenhum endpoint disponível.")
+        return None
+
+    print(f"Submetendo {len(commands)} comandos a {len(endpoint_ids)} endpoints...")
+    start_time = time.perf_counter()
+    records = run_shell_batch(commands, endpoint_ids, walltime, snippet_lines, weights)
+    end_time = time.perf_counter()
+    print(f"Tempo de execução do lote: {end_time - start_time:.4f} segundos")
+    print_summary(records)
+
+    return {
+        "run_time": end_time - start_time,
+        "task_times": [r["time"] for r in records],
+        "num_tasks": len(records),
+        "payload_bytes": None,
+        "task_statuses": {
+            r["index"]: {
+                "status": "completed" if r["returncode"] == 0 else "failed",
+                "endpoint_id": r["endpoint_id"],
+                "returncode": r["returncode"],
+            }
+            for r in records
+        },
+        "verified": all(r["returncode"] == 0 for r in records),
+        "phases": None,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Executa um lote de comandos nos endpoints do Globus Compute.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument("commands", nargs="*", help="Comandos a executar.")
+    parser.add_argument(
+        "--commands_file",
+        type=str,
+        default=None,
+        help="Arquivo com um comando por linha ('#' inicia comentário).",
+    )
+    parser.add_argument(
+        "--walltime",
+        type=float,
+        default=None,
+        help="Tempo máximo de cada comando, em segundos.",
+    )
+    parser.add_argument(
+        "--snippet_lines",
+        type=int,
+        default=DEFAULT_SNIPPET_LINES,
+        help="Linhas finais de stdout/stderr devolvidas por comando.",
+    )
+    parser.add_argument(
+        "--weighted",
+        type=str,
+        nargs="?",
+        const=DEFAULT_PROFILE_PATH,
+        default=None,
+        help=f"Distribui os comandos pela vazão de cada endpoint (perfil padrão: {DEFAULT_PROFILE_PATH})",
+    )
+
+    args = parser.parse_args()
+    if not args.commands and not args.commands_file:
+        parser.print_usage()
+        sys.exit(1)
+
+    result = main(
+        args.commands,
+        args.commands_file,
+        args.walltime,
+        args.snippet_lines,
+        args.weighted,
+    )
+    sys.exit(0 if result and result["verified"] else 1)
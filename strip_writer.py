@@ -0,0 +1,203 @@
+"""
+Gravação incremental de imagens PNG em faixas de linhas.
+
+O StripPNGWriter codifica o PNG conforme as faixas de linhas chegam, sem
+manter a imagem inteira em memória: a faixa que continua a imagem é
+comprimida e gravada na hora; as que chegam fora de ordem esperam em um buffer
+limitado e, quando ele enche, as mais distantes da próxima linha são
+despejadas em um arquivo temporário e lidas de volta na sua vez. A memória do
+Master fica limitada pelo buffer, não pelo tamanho da imagem.
+
+Usa só zlib e struct, então serve também para imagens maiores que as que o
+Pillow aceita.
+"""
+
+import struct
+import tempfile
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+# Tipo de cor do PNG e bytes por pixel de cada modo
+COLOR_TYPES = {"L": (0, 1), "RGB": (2, 3)}
+
+DEFAULT_BUFFER_BYTES = 64 * 1024 * 1024
+
+# Tamanho dos blocos IDAT gravados
+IDAT_SIZE = 1024 * 1024
+
+
+def gray_to_rgb(shades: bytes) -> bytes:
+    """Repete cada tom de cinza nos três canais."""
+    rgb = bytearray(len(shades) * 3)
+    rgb[0::3] = shades
+    rgb[1::3] = shades
+    rgb[2::3] = shades
+    return bytes(rgb)
+
+
+class StripPNGWriter:
+    """
+    Args:
+        path (str): Arquivo PNG de saída.
+        width (int): Largura da imagem, em pixels.
+        height (int): Altura da imagem, em pixels.
+        mode (str): "L" (cinza) ou "RGB".
+        max_buffer_bytes (int): Limite das faixas fora de ordem em memória;
+                                o excedente vai para um arquivo temporário.
+        compress_level (int): Nível do zlib (0 a 9).
+    """
+
+    def __init__(
+        self,
+        path: str,
+        width: int,
+        height: int,
+        mode: str = "RGB",
+        max_buffer_bytes: int = DEFAULT_BUFFER_BYTES,
+        compress_level: int = 6,
+    ):
+        if mode not in COLOR_TYPES:
+            raise ValueError(f"Modo de imagem não suportado: {mode}")
+        color_type, self.bytes_per_pixel = COLOR_TYPES[mode]
+        self.width = width
+        self.height = height
+        self.row_bytes = width * self.bytes_per_pixel
+        self.max_buffer_bytes = max_buffer_bytes
+
+        self.next_row = 0
+        # Faixas à espera: linha inicial -> linhas (em memória) ou
+        # (deslocamento, número de linhas) no arquivo temporário
+        self._buffered: Dict[int, List[bytes]] = {}
+        self._spilled: Dict[int, Tuple[int, int]] = {}
+        self._buffered_bytes = 0
+        self._spill_file = None
+        self._compressor = zlib.compressobj(compress_level)
+        self._pending = bytearray()
+
+        self.stats = {
+            "rows_received": 0,
+            "peak_buffer_bytes": 0,
+            "spilled_bytes": 0,
+            "bytes_written": 0,
+        }
+
+        self._file = open(path, "wb")
+        self._file.write(PNG_SIGNATURE)
+        self._write_chunk(
+            b"IHDR", struct.pack(">IIBBBBB", width, height, 8, color_type, 0, 0, 0)
+        )
+
+    def _write_chunk(self, kind: bytes, data: bytes):
+        self._file.write(struct.pack(">I", len(data)))
+        self._file.write(kind)
+        self._file.write(data)
+        self._file.write(struct.pack(">I", zlib.crc32(data, zlib.crc32(kind))))
+        self.stats["bytes_written"] += len(data) + 12
+
+    def _encode_rows(self, rows: List[bytes]):
+        for row in rows:
+            # Filtro 0 (nenhum) em todas as linhas
+            self._pending += self._compressor.compress(b"\x00" + row)
+        self.next_row += len(rows)
+        while len(self._pending) >= IDAT_SIZE:
+            self._write_chunk(b"IDAT", bytes(self._pending[:IDAT_SIZE]))
+            del self._pending[:IDAT_SIZE]
+
+    def _spill(self):
+        """Despeja as faixas mais distantes até o buffer caber no limite."""
+        if self._spill_file is None:
+            self._spill_file = tempfile.TemporaryFile()
+        for start in sorted(self._buffered, reverse=True):
+            if self._buffered_bytes <= self.max_buffer_bytes:
+                break
+            rows = self._buffered.pop(start)
+            self._spill_file.seek(0, 2)
+            offset = self._spill_file.tell()
+            self._spill_file.write(b"".join(rows))
+            size = len(rows) * self.row_bytes
+            self._spilled[start] = (offset, len(rows))
+            self._buffered_bytes -= size
+            self.stats["spilled_bytes"] += size
+
+    def _take(self, start: int) -> Optional[List[bytes]]:
+        if start in self._buffered:
+            rows = self._buffered.pop(start)
+            self._buffered_bytes -= len(rows) * self.row_bytes
+            return rows
+        if start in self._spilled:
+            offset, count = self._spilled.pop(start)
+            self._spill_file.seek(offset)
+            raw = self._spill_file.read(count * self.row_bytes)
+            return [
+                raw[i : i + self.row_bytes] for i in range(0, len(raw), self.row_bytes)
+            ]
+        return None
+
+    def _drain(self):
+        while True:
+            rows = self._take(self.next_row)
+            if rows is None:
+                return
+            self._encode_rows(rows)
+
+    def add_rows(self, start: int, rows: List[bytes]):
+        """
+        Recebe uma faixa de linhas consecutivas a partir de `start`, cada uma
+        com width * bytes por pixel bytes.
+        """
+        for row in rows:
+            if len(row) != self.row_bytes:
+                raise ValueError(
+                    f"Linha com {len(row)} bytes; esperado {self.row_bytes}."
+                )
+        self.stats["rows_received"] += len(rows)
+        if start == self.next_row:
+            self._encode_rows(rows)
+            self._drain()
+            return
+        self._buffered[start] = rows
+        self._buffered_bytes += len(rows) * self.row_bytes
+        self.stats["peak_buffer_bytes"] = max(
+            self.stats["peak_buffer_bytes"], self._buffered_bytes
+        )
+        if self._buffered_bytes > self.max_buffer_bytes:
+            self._spill()
+
+    def _first_waiting_row(self) -> Optional[int]:
+        starts = list(self._buffered) + list(self._spilled)
+        return min(starts) if starts else None
+
+    def close(self) -> int:
+        """
+        Completa a imagem (linhas que não chegaram ficam em preto) e fecha o
+        arquivo.
+
+        Returns:
+            int: Número de linhas que não chegaram.
+        """
+        missing = 0
+        black = bytes(self.row_bytes)
+        while self.next_row < self.height:
+            if self._first_waiting_row() == self.next_row:
+                self._drain()
+                continue
+            self._encode_rows([black])
+            missing += 1
+        self._pending += self._compressor.flush()
+        for start in range(0, len(self._pending), IDAT_SIZE):
+            self._write_chunk(b"IDAT", bytes(self._pending[start : start + IDAT_SIZE]))
+        self._pending = bytearray()
+        self._write_chunk(b"IEND", b"")
+        self._file.close()
+        if self._spill_file is not None:
+            self._spill_file.close()
+        return missing
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        if not self._file.closed:
+            self.close()
@@ -0,0 +1,257 @@
+"""
+Rastreamento da linha do tempo de cada tarefa (submissão, fila, execução no
+worker e retorno do resultado).
+
+O Master registra a serialização, a submissão e o recebimento de cada tarefa;
+o worker, envolvido por `traced()`, registra o início e o fim da execução e se
+aquela foi a primeira tarefa do processo (cold start). As fases de fila e de
+retorno comparam relógios de máquinas diferentes, então dependem de os relógios
+do Master e dos endpoints estarem sincronizados (NTP).
+
+O resultado pode ser exportado no formato Chrome Trace (abrir em
+https://ui.perfetto.dev ou chrome://tracing) e resumido em uma tabela por fase.
+"""
+
+import json
+import os
+import statistics
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import cloudpickle
+
+from endpoints import label_endpoint
+
+TRACE_KEY = "trace"
+
+# Fases na ordem em que ocorrem: (nome, marca inicial, marca final)
+PHASES = (
+    ("serialização", "serialize_start", "serialize_end"),
+    ("submissão", "submit_start", "submit_end"),
+    ("fila", "submit_end", "worker_start"),
+    ("execução", "worker_start", "worker_end"),
+    ("retorno", "worker_end", "received"),
+)
+
+
+def traced(user_function: Callable) -> Callable:
+    """
+    Envolve a função do worker para que o resultado (quando for um dict) leve
+    as marcas de tempo da execução na chave 'trace'.
+    """
+
+    def traced_worker(chunk, metadata):
+        import builtins
+        import os
+        import socket
+        import time
+
+        cold_start = not getattr(builtins, "_mwfaas_trace_warm", False)
+        builtins._mwfaas_trace_warm = True
+
+        worker_start = time.time()
+        result = user_function(chunk, metadata)
+        worker_end = time.time()
+
+        if isinstance(result, dict):
+            result["trace"] = {
+                "worker_start": worker_start,
+                "worker_end": worker_end,
+                "host": socket.gethostname(),
+                "pid": os.getpid(),
+                "cold_start": cold_start,
+            }
+        return result
+
+    return traced_worker
+
+
+class TaskTracer:
+    """
+    Coleta as marcas de tempo de cada tarefa de uma execução. Um mesmo tracer
+    pode acompanhar várias chamadas de run() (ex.: as passadas do
+    mandelbrot.py): os IDs das tarefas seguem numerados e a duração total vai
+    do início da primeira ao fim da última.
+    """
+
+    def __init__(self):
+        self.tasks: Dict[int, Dict[str, Any]] = {}
+        self.run_start: Optional[float] = None
+        self.run_end: Optional[float] = None
+        self._next_task_id = 0
+        self._lock = threading.Lock()
+
+    def next_task_id(self) -> int:
+        with self._lock:
+            task_id = self._next_task_id
+            self._next_task_id += 1
+            return task_id
+
+    def start_run(self):
+        if self.run_start is None:
+            self.run_start = time.time()
+
+    def end_run(self):
+        self.run_end = time.time()
+
+    def mark(self, task_id: int, name: str, **info):
+        with self._lock:
+            task = self.tasks.setdefault(task_id, {"task_id": task_id})
+            task[name] = time.time()
+            task.update(info)
+
+    def measure_serialization(self, task_id: int, payload: Any):
+        """
+        Mede o tempo e o tamanho da serialização (cloudpickle) do payload. O
+        Executor serializa de novo em segundo plano, então o valor é uma
+        estimativa que só é calculada quando o rastreamento está ativo.
+        """
+        self.mark(task_id, "serialize_start")
+        size = len(cloudpickle.dumps(payload))
+        self.mark(task_id, "serialize_end", payload_bytes=size)
+
+    def attach_worker_trace(self, task_id: int, result: Any, status: str = "completed"):
+        """Move as marcas do worker (chave 'trace') do resultado para a tarefa."""
+        worker_trace = {}
+        if isinstance(result, dict):
+            worker_trace = result.pop(TRACE_KEY, None) or {}
+        with self._lock:
+            task = self.tasks.setdefault(task_id, {"task_id": task_id})
+            task.update(worker_trace, status=status)
+
+    def phase_durations(self) -> Dict[str, List[float]]:
+        """Duração de cada fase, em segundos, para as tarefas que a registraram."""
+        durations: Dict[str, List[float]] = {name: [] for name, _, _ in PHASES}
+        for task in self.tasks.values():
+            for name, start, end in PHASES:
+                if start in task and end in task:
+                    durations[name].append(task[end] - task[start])
+        return durations
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Estatísticas de cada fase (usadas pelo benchmark.py)."""
+        summary = {}
+        for name, values in self.phase_durations().items():
+            if not values:
+                continue
+            ordered = sorted(values)
+            summary[name] = {
+                "n": len(values),
+                "mean": statistics.fmean(values),
+                "median": statistics.median(values),
+                "p95": ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))],
+                "max": ordered[-1],
+                "total": sum(values),
+            }
+        return summary
+
+    def print_phase_table(self):
+        summary = self.summary()
+        if not summary:
+            print("[Trace] Nenhuma tarefa rastreada.")
+            return
+
+        print("\n" + "-" * 15 + " Linha do Tempo das Tarefas " + "-" * 15)
+        print(
+            f"{'fase':<14} {'n':>5} {'média':>10} {'mediana':>10} {'p95':>10} {'máx':>10} {'total':>10}"
+        )
+        for name, d in summary.items():
+            print(
+                f"{name:<14} {d['n']:>5} {d['mean']:>10.4f} {d['median']:>10.4f} "
+                f"{d['p95']:>10.4f} {d['max']:>10.4f} {d['total']:>10.4f}"
+            )
+
+        cold_starts = sum(1 for t in self.tasks.values() if t.get("cold_start"))
+        if cold_starts:
+            print(f"[Trace] Tarefas executadas em worker recém-iniciado: {cold_starts}")
+        if "fila" in summary and summary["fila"]["mean"] < 0:
+            print(
+                "[Trace] Aviso: tempo de fila negativo; os relógios do Master e dos endpoints não estão sincronizados."
+            )
+        if self.run_start is not None and self.run_end is not None:
+            print(
+                f"[Trace] Duração total: {self.run_end - self.run_start:.4f} segundos"
+            )
+
+    def export_chrome_trace(self, path: str):
+        """
+        Salva a linha do tempo no formato Chrome Trace (JSON). Cada endpoint é
+        um processo e cada tarefa uma thread, com um evento por fase.
+        """
+        origin = self.run_start
+        if origin is None:
+            origin = min(
+                (t.get("submit_start", time.time()) for t in self.tasks.values()),
+                default=time.time(),
+            )
+
+        endpoint_pids: Dict[str, int] = {}
+        events: List[Dict[str, Any]] = [
+            {"name": "process_name", "ph": "M", "pid": 0, "args": {"name": "master"}}
+        ]
+        if self.run_start is not None and self.run_end is not None:
+            events.append(
+                {
+                    "name": "master.run",
+                    "ph": "X",
+                    "pid": 0,
+                    "tid": 0,
+                    "ts": 0,
+                    "dur": (self.run_end - self.run_start) * 1e6,
+                }
+            )
+
+        for task_id, task in sorted(self.tasks.items()):
+            endpoint_id = str(task.get("endpoint_id", "desconhecido"))
+            if endpoint_id not in endpoint_pids:
+                pid = endpoint_pids[endpoint_id] = len(endpoint_pids) + 1
+                events.append(
+                    {
+                        "name": "process_name",
+                        "ph": "M",
+                        "pid": pid,
+                        "args": {"name": label_endpoint(endpoint_id)},
+                    }
+                )
+            pid = endpoint_pids[endpoint_id]
+            events.append(
+                {
+                    "name": "thread_name",
+                    "ph": "M",
+                    "pid": pid,
+                    "tid": task_id,
+                    "args": {"name": f"tarefa {task_id}"},
+                }
+            )
+            for name, start, end in PHASES:
+                if start not in task or end not in task:
+                    continue
+                events.append(
+                    {
+                        "name": name,
+                        "cat": "task",
+                        "ph": "X",
+                        "pid": pid,
+                        "tid": task_id,
+                        "ts": (task[start] - origin) * 1e6,
+                        "dur": max(0.0, task[end] - task[start]) * 1e6,
+                        "args": {
+                            key: task[key]
+                            for key in (
+                                "items",
+                                "payload_bytes",
+                                "host",
+                                "cold_start",
+                                "status",
+                            )
+                            if key in task
+                        },
+                    }
+                )
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+        print(f"[Trace] Linha do tempo salva em '{path}' ({len(self.tasks)} tarefas)")
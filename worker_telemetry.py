@@ -0,0 +1,194 @@
+"""
+Telemetria de recursos do worker devolvida junto com cada resultado.
+
+O worker, envolvido por `with_telemetry()`, mede o tempo de CPU (usuário e
+sistema), o pico de memória (RSS), os bytes lidos e escritos, as faltas de
+página com acesso a disco e as trocas de contexto involuntárias da execução, e
+identifica o host. O Master, pelo TelemetryCollector, agrega esses valores por
+endpoint no fim da execução.
+
+Os contadores são do processo do worker (getrusage e /proc/self/io), que no
+Globus Compute executa uma tarefa por vez. O pico de RSS é o maior valor desde
+o início do processo, não só da tarefa. Em sistemas sem /proc os bytes de E/S
+ficam como None.
+"""
+
+import statistics
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+from endpoints import label_endpoint
+
+TELEMETRY_KEY = "telemetry"
+
+# Campos sempre presentes em result["telemetry"] (None quando indisponíveis)
+TELEMETRY_FIELDS = (
+    "host",
+    "pid",
+    "cpu_count",
+    "wall_time",
+    "cpu_user",
+    "cpu_system",
+    "cpu_utilization",
+    "peak_rss_bytes",
+    "read_bytes",
+    "write_bytes",
+    "major_faults",
+    "involuntary_switches",
+)
+
+
+def with_telemetry(user_function: Callable) -> Callable:
+    """
+    Envolve a função do worker para que o resultado (quando for um dict) leve
+    a telemetria da execução na chave 'telemetry'.
+    """
+
+    def telemetry_worker(chunk, metadata):
+        import os
+        import socket
+        import sys
+        import time
+
+        try:
+            import resource
+        except ImportError:
+            resource = None
+
+        def read_io():
+            try:
+                with open("/proc/self/io", "r") as f:
+                    fields = dict(line.split(": ") for line in f.read().splitlines())
+                # rchar/wchar contam também E/S de rede e de cache de página
+                return int(fields["rchar"]), int(fields["wchar"])
+            except (OSError, KeyError, ValueError):
+                return None, None
+
+        usage_start = resource.getrusage(resource.RUSAGE_SELF) if resource else None
+        read_start, write_start = read_io()
+        wall_start = time.perf_counter()
+
+        result = user_function(chunk, metadata)
+
+        wall_time = time.perf_counter() - wall_start
+        read_end, write_end = read_io()
+        usage_end = resource.getrusage(resource.RUSAGE_SELF) if resource else None
+
+        if not isinstance(result, dict):
+            return result
+
+        telemetry = {
+            "host": socket.gethostname(),
+            "pid": os.getpid(),
+            "cpu_count": os.cpu_count(),
+            "wall_time": wall_time,
+            "cpu_user": None,
+            "cpu_system": None,
+            "cpu_utilization": None,
+            "peak_rss_bytes": None,
+            "read_bytes": None,
+            "write_bytes": None,
+            "major_faults": None,
+            "involuntary_switches": None,
+        }
+        if usage_start and usage_end:
+            cpu_user = usage_end.ru_utime - usage_start.ru_utime
+            cpu_system = usage_end.ru_stime - usage_start.ru_stime
+            # ru_maxrss está em KB no Linux e em bytes no macOS
+            rss_unit = 1 if sys.platform == "darwin" else 1024
+            telemetry.update(
+                cpu_user=cpu_user,
+                cpu_system=cpu_system,
+                cpu_utilization=(
+                    (cpu_user + cpu_system) / wall_time if wall_time > 0 else None
+                ),
+                peak_rss_bytes=usage_end.ru_maxrss * rss_unit,
+                major_faults=usage_end.ru_majflt - usage_start.ru_majflt,
+                involuntary_switches=usage_end.ru_nivcsw - usage_start.ru_nivcsw,
+            )
+        if read_start is not None and read_end is not None:
+            telemetry["read_bytes"] = read_end - read_start
+            telemetry["write_bytes"] = write_end - write_start
+
+        result["telemetry"] = telemetry
+        return result
+
+    return telemetry_worker
+
+
+def _total(values: List[Optional[float]]) -> Optional[float]:
+    known = [v for v in values if v is not None]
+    return sum(known) if known else None
+
+
+class TelemetryCollector:
+    """Agrupa por endpoint a telemetria dos resultados de uma execução."""
+
+    def __init__(self):
+        self.records: Dict[str, List[Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, endpoint_id: str, result: Any):
+        """Move a telemetria (chave 'telemetry') do resultado para o coletor."""
+        if not isinstance(result, dict):
+            return
+        telemetry = result.pop(TELEMETRY_KEY, None)
+        if telemetry:
+            with self._lock:
+                self.records.setdefault(endpoint_id, []).append(telemetry)
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        """Totais e picos de cada endpoint (usados pelo benchmark.py)."""
+        summary = {}
+        for endpoint_id, records in self.records.items():
+            utilizations = [
+                r["cpu_utilization"]
+                for r in records
+                if r["cpu_utilization"] is not None
+            ]
+            rss = [r["peak_rss_bytes"] for r in records if r["peak_rss_bytes"]]
+            summary[label_endpoint(endpoint_id)] = {
+                "tasks": len(records),
+                "hosts": sorted({r["host"] for r in records}),
+                "wall_time": _total([r["wall_time"] for r in records]),
+                "cpu_user": _total([r["cpu_user"] for r in records]),
+                "cpu_system": _total([r["cpu_system"] for r in records]),
+                "cpu_utilization": (
+                    statistics.mean(utilizations) if utilizations else None
+                ),
+                "peak_rss_bytes": max(rss) if rss else None,
+                "read_bytes": _total([r["read_bytes"] for r in records]),
+                "write_bytes": _total([r["write_bytes"] for r in records]),
+                "major_faults": _total([r["major_faults"] for r in records]),
+                "involuntary_switches": _total(
+                    [r["involuntary_switches"] for r in records]
+                ),
+            }
+        return summary
+
+    def print_summary(self):
+        summary = self.summary()
+        if not summary:
+            print("[Telemetria] Nenhum resultado trouxe telemetria.")
+            return
+
+        def fmt(value, scale=1.0, digits=2):
+            return "-" if value is None else f"{value / scale:.{digits}f}"
+
+        print("\n" + "-" * 15 + " Telemetria dos Workers " + "-" * 15)
+        print(
+            f"{'endpoint':<12} {'tarefas':>7} {'user(s)':>9} {'sys(s)':>8} {'uso CPU':>8} "
+            f"{'RSS(MB)':>8} {'lido(MB)':>9} {'escrito(MB)':>11} {'faltas':>7} {'invol.':>7}"
+        )
+        for label, entry in summary.items():
+            print(
+                f"{label:<12} {entry['tasks']:>7} {fmt(entry['cpu_user']):>9} "
+                f"{fmt(entry['cpu_system']):>8} {fmt(entry['cpu_utilization']):>8} "
+                f"{fmt(entry['peak_rss_bytes'], 2**20, 1):>8} "
+                f"{fmt(entry['read_bytes'], 2**20, 1):>9} "
+                f"{fmt(entry['write_bytes'], 2**20, 1):>11} "
+                f"{fmt(entry['major_faults'], 1, 0):>7} "
+                f"{fmt(entry['involuntary_switches'], 1, 0):>7}"
+            )
+        for label, entry in summary.items():
+            print(f"[Telemetria] {label}: hosts {', '.join(entry['hosts'])}")